@@ -51,6 +51,19 @@ CRYPTOPANIC_API_KEYS = [
 ]
 CRYPTOPANIC_KEY_INDEX = 0  # Current key index, rotates on failure
 
+# Full safety analysis: latency budget, result cache TTL and APY bucket width (%)
+SAFETY_TIMEOUT_SECONDS = float(os.environ.get("SAFETY_TIMEOUT_SECONDS", "10"))
+SAFETY_CACHE_TTL = 60
+SAFETY_APY_BUCKET = 0.5
+# Upper limit on Monte Carlo paths for the optional IL tail-risk simulation
+MAX_IL_SIMULATION_PATHS = 50000
+
+# DeFiLlama pools snapshot refresh interval (background task)
+POOL_REFRESH_TTL = float(os.environ.get("POOL_REFRESH_TTL_SECONDS", "900"))
+# Live quote polling interval for intraday realized volatility (background task)
+QUOTE_POLL_INTERVAL = float(os.environ.get("QUOTE_POLL_INTERVAL_SECONDS", "60"))
+POOLS_MAX_PAGE_SIZE = 200
+
 
 # -------------------------------------------------------------------------
 # GLOBAL STATE
@@ -60,6 +73,9 @@ sentiment_session = None
 redis_client = None
 tokenizer = None
 calculator = None
+safety_engine = None
+pool_service = None
+quote_poller = None
 device = "cpu"
 
 # -------------------------------------------------------------------------
@@ -74,6 +90,15 @@ class QuickAnalysisRequest(BaseModel):
 class SafetyAnalysisRequest(BaseModel):
     token_a: str
     token_b: str
+    pool_apy: float
+    confidence_level: Optional[float] = 0.80
+    volatility_estimator: Optional[str] = "sample"
+    simulate_il_paths: Optional[int] = None
+
+class SafetyRescoreRequest(BaseModel):
+    analysis_id: str
+    pool_apy: float
+    gas_fees: Optional[Dict[str, float]] = None
 
 class ILRequest(BaseModel):
     token_a: str
@@ -98,6 +123,12 @@ async def load_models():
     except Exception as e:
         print(f"[!!] Redis connection failed: {e}. Running without cache.")
         redis_client = None
+    
+    # Staking sources are cached per source (shared through Redis when available)
+    # and warmed here so /api/staking/apy never waits on upstream APIs
+    configure_staking_cache(redis_client)
+    await warm_staking_cache()
+    print(f"[OK] Staking APY cache warmed: {staking_cache_status()}")
 
     print("Loading ONNX Volatility Models...")
     onnx_dir = "models/onnx"
@@ -138,6 +169,38 @@ async def load_models():
     except Exception as e:
         print(f"[!!] BoundsCalculator init failed: {e}")
 
+    # Quotes polled in the background feed intraday realized volatility
+    global quote_poller
+    if calculator:
+        from m5_yield_farming.realized_volatility import QuotePoller
+        volatile_tokens = [t for t in SUPPORTED_TOKENS if t not in ['usdc', 'usdt']]
+        quote_poller = QuotePoller(calculator.fetch_quote, volatile_tokens, interval=QUOTE_POLL_INTERVAL)
+        quote_poller.start()
+        print(f"[OK] Quote poller started ({len(volatile_tokens)} tokens every {QUOTE_POLL_INTERVAL:.0f}s)")
+    
+    # Full safety engine shares the calculator (no second model load)
+    global safety_engine
+    if calculator:
+        try:
+            from m5_yield_farming.safety_engine import YieldFarmingSafetyEngine
+            safety_engine = YieldFarmingSafetyEngine(bounds_calculator=calculator)
+            print("[OK] YieldFarmingSafetyEngine initialized")
+        except Exception as e:
+            print(f"[!!] YieldFarmingSafetyEngine init failed: {e}")
+
+    # Pools snapshot refreshed in the background, never on the request path
+    global pool_service
+    try:
+        from m5_yield_farming.pool_service import get_pool_service
+        pool_service = get_pool_service(ttl=POOL_REFRESH_TTL)
+        print(f"[OK] PoolService started ({pool_service.status()['pools']} pools from disk)")
+        
+        # Live tvl_change_7d / apy_cv for the LSTM come from the pool history
+        if calculator:
+            calculator.pool_features = pool_service.token_features
+    except Exception as e:
+        print(f"[!!] PoolService init failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -147,6 +210,10 @@ async def lifespan(app: FastAPI):
     await load_models()
     yield
     # Shutdown
+    if pool_service:
+        pool_service.stop()
+    if quote_poller:
+        quote_poller.stop()
     if redis_client:
         await redis_client.close()
     print("Shutting down...")
@@ -276,7 +343,9 @@ async def health_check():
             "volatility": {t: (t in volatility_sessions) for t in SUPPORTED_TOKENS},
             "sentiment": sentiment_session is not None
         },
-        "cache": redis_client is not None
+        "cache": redis_client is not None,
+        "pools": pool_service.status() if pool_service else None,
+        "staking": staking_cache_status()
     }
 
 @app.get("/api/tokens")
@@ -286,6 +355,38 @@ async def list_tokens():
         "loaded": list(volatility_models.keys())
     }
 
+@app.get("/api/pools")
+async def list_pools(
+    token: Optional[str] = None,
+    token_b: Optional[str] = None,
+    sort_by: str = "apy",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    min_tvl: float = 10000,
+    project: Optional[str] = None,
+    exposure: Optional[str] = None
+):
+    """
+    Ranked, cursor-paginated Solana pools from the background-refreshed snapshot.
+    
+    sort_by is one of apy, tvl_usd or risk_adjusted_apy; pass next_cursor
+    from a response as cursor to get the following page.
+    """
+    if limit < 1 or limit > POOLS_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {POOLS_MAX_PAGE_SIZE}")
+    if pool_service is None:
+        raise HTTPException(status_code=503, detail="Pool service not initialized")
+    
+    try:
+        result = pool_service.query_pools(
+            token=token, token_b=token_b, sort_by=sort_by, limit=limit, cursor=cursor,
+            min_tvl=min_tvl, project=project, exposure=exposure
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return replace_nan({"success": True, **result})
+
 @app.get("/api/farming/tokens")
 async def farming_tokens():
     return {
@@ -387,6 +488,238 @@ async def quick_analysis(req: QuickAnalysisRequest):
         
     return response
 
+def safety_apy_bucket(pool_apy: float) -> float:
+    """Round a pool APY to the cache bucket it is analyzed and cached under."""
+    return round(round(pool_apy / SAFETY_APY_BUCKET) * SAFETY_APY_BUCKET, 2)
+
+@app.post("/api/farming/safety")
+async def full_safety_analysis(req: SafetyAnalysisRequest):
+    """
+    Full yield farming safety analysis (IL, correlation, volatility, profitability).
+    
+    Runs YieldFarmingSafetyEngine on the shared calculator in the thread pool.
+    Results are cached per pair, APY bucket and confidence level; the pool APY
+    is analyzed at its bucket value so cached and fresh results agree. With
+    simulate_il_paths, details also carry the Monte Carlo IL distribution
+    (quantiles, VaR, CVaR) as 'il_tail_risk'; the score is unchanged.
+    """
+    token_a = req.token_a.lower()
+    token_b = req.token_b.lower()
+    
+    if token_a not in SUPPORTED_TOKENS or token_b not in SUPPORTED_TOKENS:
+        raise HTTPException(status_code=400, detail="Unsupported token(s)")
+    if not np.isfinite(req.pool_apy) or req.pool_apy < 0 or req.pool_apy > 100_000:
+        raise HTTPException(status_code=400, detail="pool_apy must be between 0 and 100000")
+    if req.simulate_il_paths is not None and not 0 < req.simulate_il_paths <= MAX_IL_SIMULATION_PATHS:
+        raise HTTPException(status_code=400, detail=f"simulate_il_paths must be between 1 and {MAX_IL_SIMULATION_PATHS}")
+    if safety_engine is None:
+        raise HTTPException(status_code=503, detail="Safety engine not initialized")
+    if req.confidence_level not in safety_engine.bounds_calculator.Z_SCORES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"confidence_level must be one of {sorted(safety_engine.bounds_calculator.Z_SCORES)}"
+        )
+    
+    pool_apy = safety_apy_bucket(req.pool_apy)
+    cache_key = (
+        f"safety:{token_a}:{token_b}:{pool_apy}:{req.confidence_level}:"
+        f"{req.volatility_estimator}:{req.simulate_il_paths or 0}"
+    )
+    
+    # 1. Try Cache (best effort: a cache outage only costs a fresh analysis)
+    if redis_client:
+        try:
+            cached_data = await redis_client.get(cache_key)
+        except Exception as e:
+            print(f"  [!] Safety cache read failed: {e}")
+            cached_data = None
+        if cached_data:
+            return json.loads(cached_data)
+    
+    headlines_a, headlines_b = await asyncio.gather(
+        fetch_crypto_news(token_a),
+        fetch_crypto_news(token_b)
+    )
+    
+    # 2. Run the engine in the thread pool within the latency budget
+    loop = asyncio.get_event_loop()
+    analysis = loop.run_in_executor(
+        None,
+        lambda: safety_engine.calculate_safety(
+            token_a=token_a,
+            token_b=token_b,
+            pool_apy=pool_apy,
+            confidence_level=req.confidence_level,
+            headlines_a=headlines_a,
+            headlines_b=headlines_b,
+            volatility_estimator=req.volatility_estimator,
+            simulate_il_paths=req.simulate_il_paths
+        )
+    )
+    
+    async def save(result: Dict) -> Dict:
+        response = replace_nan({"success": True, **result})
+        if redis_client:
+            try:
+                await redis_client.setex(cache_key, SAFETY_CACHE_TTL, json.dumps(response))
+                # Market artifacts let any worker re-score this analysis
+                market = safety_engine.get_analysis(result['analysis_id'])
+                if market is not None:
+                    await redis_client.setex(
+                        f"safety:analysis:{result['analysis_id']}",
+                        safety_engine.ANALYSIS_TTL,
+                        json.dumps(replace_nan(market))
+                    )
+            except Exception as e:
+                print(f"  [!] Safety cache write failed: {e}")
+        return response
+    
+    def save_in_background(done: asyncio.Future):
+        if done.cancelled():
+            return
+        if done.exception() is not None:
+            print(f"[!!] Background safety analysis failed: {done.exception()}")
+            return
+        asyncio.ensure_future(save(done.result()))
+    
+    try:
+        result = await asyncio.wait_for(asyncio.shield(analysis), timeout=SAFETY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Let the analysis finish in the background so a retry hits the cache
+        analysis.add_done_callback(save_in_background)
+        raise HTTPException(status_code=504, detail="Safety analysis exceeded its latency budget, retry shortly")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[!!] Safety analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # 3. Save to Cache
+    return await save(result)
+
+@app.get("/api/farming/safety/ranking")
+async def safety_ranking(
+    pool_apy: float,
+    confidence_level: float = 0.80,
+    volatility_estimator: str = "sample"
+):
+    """
+    Every supported token pair ranked by total safety score at one pool APY.
+    
+    Per-token work runs once and the pair components are scored as arrays
+    (YieldFarmingSafetyEngine.rank_pairs). Cached like /api/farming/safety,
+    per APY bucket, confidence level and estimator.
+    """
+    if not np.isfinite(pool_apy) or pool_apy < 0 or pool_apy > 100_000:
+        raise HTTPException(status_code=400, detail="pool_apy must be between 0 and 100000")
+    if safety_engine is None:
+        raise HTTPException(status_code=503, detail="Safety engine not initialized")
+    if confidence_level not in safety_engine.bounds_calculator.Z_SCORES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"confidence_level must be one of {sorted(safety_engine.bounds_calculator.Z_SCORES)}"
+        )
+    
+    pool_apy = safety_apy_bucket(pool_apy)
+    cache_key = f"safety:ranking:{pool_apy}:{confidence_level}:{volatility_estimator}"
+    
+    # 1. Try Cache (best effort, as in full_safety_analysis)
+    if redis_client:
+        try:
+            cached_data = await redis_client.get(cache_key)
+        except Exception as e:
+            print(f"  [!] Safety ranking cache read failed: {e}")
+            cached_data = None
+        if cached_data:
+            return json.loads(cached_data)
+    
+    news = await asyncio.gather(*(fetch_crypto_news(token) for token in SUPPORTED_TOKENS))
+    headlines = dict(zip(SUPPORTED_TOKENS, news))
+    
+    # 2. Rank in the thread pool within the latency budget
+    loop = asyncio.get_event_loop()
+    ranking = loop.run_in_executor(
+        None,
+        lambda: safety_engine.rank_pairs(
+            pool_apy=pool_apy,
+            tokens=SUPPORTED_TOKENS,
+            confidence_level=confidence_level,
+            headlines=headlines,
+            volatility_estimator=volatility_estimator
+        )
+    )
+    
+    async def save(rows: List[Dict]) -> Dict:
+        response = replace_nan({
+            "success": True,
+            "pool_apy": pool_apy,
+            "confidence_level": confidence_level,
+            "volatility_estimator": volatility_estimator,
+            "pairs": rows
+        })
+        if redis_client:
+            try:
+                await redis_client.setex(cache_key, SAFETY_CACHE_TTL, json.dumps(response))
+            except Exception as e:
+                print(f"  [!] Safety ranking cache write failed: {e}")
+        return response
+    
+    def save_in_background(done: asyncio.Future):
+        if done.cancelled():
+            return
+        if done.exception() is not None:
+            print(f"[!!] Background safety ranking failed: {done.exception()}")
+            return
+        asyncio.ensure_future(save(done.result()))
+    
+    try:
+        rows = await asyncio.wait_for(asyncio.shield(ranking), timeout=SAFETY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Let the ranking finish in the background so a retry hits the cache
+        ranking.add_done_callback(save_in_background)
+        raise HTTPException(status_code=504, detail="Safety ranking exceeded its latency budget, retry shortly")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[!!] Safety ranking failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # 3. Save to Cache
+    return await save(rows)
+
+@app.post("/api/farming/safety/rescore")
+async def rescore_safety_analysis(req: SafetyRescoreRequest):
+    """
+    What-if re-scoring of a full safety analysis for a new pool APY / gas fees.
+    
+    Reuses the market artifacts (bounds, IL, correlation, volatility) stored
+    under the analysis_id returned by /api/farming/safety; only profitability
+    and the weighted score are recomputed.
+    """
+    if not np.isfinite(req.pool_apy) or req.pool_apy < 0 or req.pool_apy > 100_000:
+        raise HTTPException(status_code=400, detail="pool_apy must be between 0 and 100000")
+    if req.gas_fees and any(not np.isfinite(v) or v < 0 or v > 1 for v in req.gas_fees.values()):
+        raise HTTPException(status_code=400, detail="gas_fees must be decimals between 0 and 1")
+    if safety_engine is None:
+        raise HTTPException(status_code=503, detail="Safety engine not initialized")
+    
+    # Analyses run on another worker are restored from the shared cache
+    if safety_engine.get_analysis(req.analysis_id) is None and redis_client:
+        try:
+            stored = await redis_client.get(f"safety:analysis:{req.analysis_id}")
+        except Exception as e:
+            print(f"  [!] Safety analysis cache read failed: {e}")
+            stored = None
+        if stored:
+            safety_engine.store_analysis(json.loads(stored), req.analysis_id)
+    
+    try:
+        result = safety_engine.rescore(req.analysis_id, req.pool_apy, req.gas_fees)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Analysis not found or expired, run /api/farming/safety again")
+    
+    return replace_nan({"success": True, **result})
+
 async def analyze_sentiment_detailed(headlines: List[str]) -> Dict[str, Any]:
     """Analyze sentiment using ONNX FinBERT."""
     if not headlines or sentiment_session is None:
@@ -467,6 +800,7 @@ async def get_token_news(token: str):
 # STAKING APY ENDPOINTS
 # -------------------------------------------------------------------------
 from staking_api import get_staking_apy, get_token_staking_apy, is_lst_token, calculate_combined_yield
+from staking_api import configure_cache as configure_staking_cache, warm_staking_cache, staking_cache_status
 
 @app.get("/api/staking/apy")
 async def staking_apy():
@@ -7,35 +7,77 @@ into farming safety recommendations.
 Components:
 - bounds_calculator: Multi-token price bounds calculation
 - il_calculator: Impermanent loss range calculation  
+- concentrated_liquidity: Concentrated liquidity IL for Whirlpool price ranges
+- range_optimizer: Pareto-optimal Whirlpool range search
+- monte_carlo: Monte Carlo IL distribution (quantiles, CVaR)
 - correlation_analyzer: Token correlation/divergence risk
+- correlation_service: Cached all-pairs correlation/beta matrices
+- returns_panel: Shared date-aligned returns panel for all analyzers
 - volatility_analyzer: Intra-week volatility calculation
+- volatility_estimators: EWMA / GARCH(1,1) volatility forecasts
+- realized_volatility: Intraday realized volatility from polled live quotes
 - profitability_analyzer: Break-even APY calculation
 - safety_engine: Complete yield farming safety score
 - pool_fetcher: Real-time APY fetching from DeFiLlama
+- feed_cache: Conditional-GET disk cache for bulk feeds
+- pool_snapshot: Columnar (Arrow/Parquet) pool snapshots
+- pool_service: Process-wide pools with TTL background refresh
+- pool_history: Daily per-pool APY / TVL history and live LSTM features
 """
 
 from .bounds_calculator import BoundsCalculator, calculate_prediction_bounds
-from .il_calculator import ILCalculator, calculate_il_range
-from .correlation_analyzer import CorrelationAnalyzer, calculate_correlation_risk
+from .il_calculator import ILCalculator, calculate_il_range, calculate_il_surface
+from .concentrated_liquidity import ConcentratedLiquidityCalculator, calculate_concentrated_il
+from .range_optimizer import RangeOptimizer, optimize_position_range
+from .monte_carlo import MonteCarloILSimulator, simulate_il_distribution
+from .correlation_analyzer import CorrelationAnalyzer, RollingCorrelationTracker, calculate_correlation_risk
+from .correlation_service import CorrelationService
+from .returns_panel import ReturnsPanel
 from .volatility_analyzer import VolatilityAnalyzer, calculate_intra_week_volatility
+from .volatility_estimators import VolatilityEstimators, EWMAEstimator, GARCHEstimator
+from .realized_volatility import RealizedVolatility, QuotePoller
 from .profitability_analyzer import ProfitabilityAnalyzer, calculate_breakeven_apy
 from .safety_engine import YieldFarmingSafetyEngine, calculate_yield_farming_safety
 from .pool_fetcher import PoolFetcher, fetch_pool_apy
+from .feed_cache import FeedCache
+from .pool_snapshot import PoolSnapshot
+from .pool_history import PoolHistoryStore
+from .pool_service import PoolService, get_pool_service
 
 __all__ = [
     'BoundsCalculator',
     'calculate_prediction_bounds',
     'ILCalculator', 
     'calculate_il_range',
+    'calculate_il_surface',
+    'ConcentratedLiquidityCalculator',
+    'calculate_concentrated_il',
+    'RangeOptimizer',
+    'optimize_position_range',
+    'MonteCarloILSimulator',
+    'simulate_il_distribution',
     'CorrelationAnalyzer',
+    'RollingCorrelationTracker',
     'calculate_correlation_risk',
+    'CorrelationService',
+    'ReturnsPanel',
     'VolatilityAnalyzer',
     'calculate_intra_week_volatility',
+    'VolatilityEstimators',
+    'EWMAEstimator',
+    'GARCHEstimator',
+    'RealizedVolatility',
+    'QuotePoller',
     'ProfitabilityAnalyzer',
     'calculate_breakeven_apy',
     'YieldFarmingSafetyEngine',
     'calculate_yield_farming_safety',
     'PoolFetcher',
-    'fetch_pool_apy'
+    'fetch_pool_apy',
+    'FeedCache',
+    'PoolSnapshot',
+    'PoolHistoryStore',
+    'PoolService',
+    'get_pool_service'
 ]
 
@@ -9,7 +9,7 @@ import pandas as pd
 import os
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,6 +18,8 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
 import tensorflow as tf
 
+from .realized_volatility import RealizedVolatility
+
 
 class BoundsCalculator:
     """
@@ -55,6 +57,25 @@ class BoundsCalculator:
         'pengu': 0.35      # PENGU: already capturing well
     }
     
+    # Token-specific max range caps (calibrated for the 7-day horizon)
+    MAX_RANGES = {
+        'sol': 0.10,      # Max 10% for SOL
+        'jup': 0.12,      # Max 12% for JUP  
+        'usdt': 0.005,    # Max 0.5% for USDT
+        'usdc': 0.005,
+        'jupsol': 0.10,   # Max 10% for JUPSOL
+        'pengu': 0.15     # Max 15% for PENGU
+    }
+    
+    # Horizon the calibrated parameters refer to
+    DEFAULT_HORIZON_DAYS = 7
+    
+    # Ceiling on the horizon-scaled max range (keeps the lower bound positive)
+    MAX_RANGE_LIMIT = 0.95
+    
+    # Volatility sources accepted by calculate_bounds
+    VOLATILITY_ESTIMATORS = ['sample', 'ewma', 'garch', 'realized']
+    
     # DexScreener Token Addresses (Solana)
     TOKEN_ADDRESSES = {
         'sol': 'So11111111111111111111111111111111111111112',
@@ -65,14 +86,37 @@ class BoundsCalculator:
         'pengu': '2zMMhcVQEXDtdE6vsFS7S7D5oUodfJHE8vd1gnBouauv'
     }
     
-    def __init__(self, models_dir: str = "models"):
-        """Initialize with volatility models directory."""
+    def __init__(
+        self,
+        models_dir: str = "models",
+        returns_panel=None,
+        volatility_estimators=None,
+        pool_features: Optional[Callable[[str], Optional[Dict]]] = None
+    ):
+        """
+        Initialize with volatility models directory.
+        
+        Args:
+            models_dir: Directory with the LSTM volatility models
+            returns_panel: Optional shared ReturnsPanel used for recent volatility
+                when no historical_data is passed (returns between its
+                loaded history rows, as if read from the parquet store)
+            volatility_estimators: Optional fitted VolatilityEstimators (EWMA / GARCH)
+            pool_features: Optional token -> live pool features lookup
+                (e.g., PoolService.token_features) for the LSTM's
+                tvl_change_7d / apy_cv inputs
+        """
         print(f"DEBUG: BoundsCalculator init from {__file__}", flush=True)
         self.models_dir = models_dir
+        self.returns_panel = returns_panel
+        self.volatility_estimators = volatility_estimators
+        self.pool_features = pool_features
+        # Intraday realized volatility, fed by every live quote fetched
+        # (start a QuotePoller on fetch_quote to keep it filled)
+        self.realized_volatility = RealizedVolatility()
         self.volatility_models = {}
         self.sentiment_model = None
         self.sentiment_tokenizer = None
-        self._last_24h_change = 0.0  # Initialize to prevent stale values across tokens
         self._load_models()
     
     def _load_models(self):
@@ -136,11 +180,20 @@ class BoundsCalculator:
         """
         Fetch real-time price from DexScreener (Solana native, fast, reliable).
         """
+        return self.fetch_quote(token)[0]
+    
+    def fetch_quote(self, token: str) -> Tuple[float, float]:
+        """
+        Fetch real-time price and 24h change from DexScreener.
+        
+        Returns:
+            Tuple of (price, 24h price change in percent); (0.0, 0.0) if unavailable
+        """
         token = token.lower()
         
         # 0. Stablecoin shortcut
         if token in ['usdc', 'usdt']:
-            return 1.0
+            return 1.0, 0.0
             
         # 1. Try DexScreener
         try:
@@ -173,23 +226,40 @@ class BoundsCalculator:
                                 if base_symbol == token or (address and base_address == address):
                                     price = float(pair.get('priceUsd', 0))
                                     if price > 0:
-                                        self._last_24h_change = float(pair.get('priceChange', {}).get('h24', 0.0))
+                                        change_24h = float(pair.get('priceChange', {}).get('h24', 0.0))
+                                        self.realized_volatility.add_quote(token, price)
                                         print(f"  [+] Fetched {token} price: ${price}")
-                                        return price
+                                        return price, change_24h
         except Exception as e:
             print(f"  [!] DexScreener error for {token}: {e}")
             
-        return 0.0
+        return 0.0, 0.0
     
     def fetch_historical_data(self, token: str, days: int = 30) -> pd.DataFrame:
         """
         Fetch historical price data from local parquet files.
         CoinGecko removed due to rate limits - using local data only.
         """
+        for parquet_path in self._historical_data_paths(token):
+            if os.path.exists(parquet_path):
+                try:
+                    df = pd.read_parquet(parquet_path)
+                    if len(df) > days:
+                        df = df.iloc[-days:]
+                    return df
+                except Exception as e:
+                    print(f"Error reading {parquet_path}: {e}")
+                    continue
+        
+        # Return empty DataFrame if no local data found
+        return pd.DataFrame()
+    
+    def _historical_data_paths(self, token: str) -> List[str]:
+        """Candidate locations of a token's parquet history, in search order."""
         token = token.lower()
         
         # Search in multiple possible locations for parquet files
-        possible_paths = [
+        return [
             f"data/processed/{token}_aligned.parquet",
             os.path.join(os.path.dirname(__file__), f"../../../../processed/{token}_aligned.parquet"),
             os.path.join(os.path.dirname(__file__), f"../../data/processed/{token}_aligned.parquet"),
@@ -198,20 +268,52 @@ class BoundsCalculator:
             f"../ml models and appraoch/data/processed/{token}_aligned.parquet",
             f"../../ml models and appraoch/data/processed/{token}_aligned.parquet",
         ]
+    
+    def historical_data_stat(self, token: str) -> Optional[Tuple]:
+        """
+        Cheap change detector for a token's local history (no parquet read).
         
-        for parquet_path in possible_paths:
-            if os.path.exists(parquet_path):
-                try:
-                    df = pd.read_parquet(parquet_path)
-                    if len(df) > days:
-                        df = df.iloc[-days:]
-                    return df
-                except Exception as e:
-                    print(f"Error reading {parquet_path}: {e}")
-                    continue
+        Returns:
+            Tuple of (path, mtime_ns, size) of the file fetch_historical_data
+            reads, or None if there is no local data
+        """
+        for parquet_path in self._historical_data_paths(token):
+            try:
+                stat = os.stat(parquet_path)
+            except OSError:
+                continue
+            return (parquet_path, stat.st_mtime_ns, stat.st_size)
+        return None
+    
+    def panel_recent_returns(self, token: str, current_price: Optional[float], n: int = 14) -> np.ndarray:
+        """Last n history-row returns from the shared panel, ending with the live price."""
+        return self.returns_panel.live_returns(token, current_price, n)
+    
+    def live_pool_features(self, token: str) -> Dict[str, float]:
+        """
+        Current tvl_change_7d and apy_cv for a token's live row.
         
-        # Return empty DataFrame if no local data found
-        return pd.DataFrame()
+        Args:
+            token: Token symbol
+        
+        Returns:
+            Dict with both features (0.0 where no pool history is available)
+        """
+        features = {'tvl_change_7d': 0.0, 'apy_cv': 0.0}
+        if self.pool_features is None:
+            return features
+        
+        try:
+            live = self.pool_features(token.upper()) or {}
+        except Exception as e:
+            print(f"Warning: live pool features unavailable for {token}: {e}")
+            return features
+        
+        for name in features:
+            value = live.get(name)
+            if value is not None and np.isfinite(value):
+                features[name] = float(value)
+        return features
     
     def get_lstm_prediction(self, token: str, historical_data: pd.DataFrame) -> Dict:
         """Get LSTM model prediction for token."""
@@ -298,7 +400,12 @@ class BoundsCalculator:
         current_price: Optional[float] = None,
         historical_data: Optional[pd.DataFrame] = None,
         headlines: Optional[List[str]] = None,
-        confidence_level: float = 0.80
+        confidence_level: float = 0.80,
+        horizons: Optional[List[int]] = None,
+        volatility_estimator: str = 'sample',
+        price_change_24h: Optional[float] = None,
+        recent_returns: Optional[np.ndarray] = None,
+        volatility_estimators=None
     ) -> Dict:
         """
         Calculate price prediction bounds for a token.
@@ -309,19 +416,50 @@ class BoundsCalculator:
             historical_data: Optional historical data (fetched if not provided)
             headlines: Optional news headlines for sentiment
             confidence_level: Confidence interval (default 0.80)
+            horizons: Optional list of positive horizons in days (e.g., [1, 7, 30]).
+                All horizons share the same price, LSTM and sentiment inputs.
+            volatility_estimator: 'sample' (std of the last 14 returns), 'ewma',
+                'garch' or 'realized'. Model estimators forecast volatility per
+                horizon from the fitted state plus the live price; 'realized'
+                uses intraday realized volatility from live quotes (polled by
+                a QuotePoller, plus every quote fetched). Tokens without a
+                fitted model or enough quotes fall back to 'sample'; the
+                result reports the estimator actually used, and for
+                'realized' whether intraday data was ready.
+            price_change_24h: Optional 24h price change in percent; together
+                with current_price it skips the live quote request
+            recent_returns: Optional recent returns (ending with the live
+                price) for the sample volatility, e.g. ReturnsPanel.live_returns;
+                defaults to the shared panel when historical_data is not provided
+            volatility_estimators: Optional fitted VolatilityEstimators for
+                'ewma' / 'garch' (defaults to the calculator's own)
         
         Returns:
-            Dictionary with bounds, safety score, and component breakdown
+            Dictionary with bounds, safety score, and component breakdown.
+            Top-level fields describe the 7-day horizon; requested horizons
+            are returned under 'horizons' keyed by label (e.g., '30d').
         """
         token = token.lower()
+        if volatility_estimators is None:
+            volatility_estimators = self.volatility_estimators
+        
+        if volatility_estimator not in self.VOLATILITY_ESTIMATORS:
+            raise ValueError(f"Unknown volatility estimator '{volatility_estimator}'. Use one of {self.VOLATILITY_ESTIMATORS}")
         
-        # Reset 24h change to prevent cross-token contamination
-        self._last_24h_change = 0.0
+        # A zero horizon gives zero-width bounds and a negative one NaN bounds
+        if horizons and any(days <= 0 for days in horizons):
+            raise ValueError(f"Horizons must be positive numbers of days, got {list(horizons)}")
         
-        # ALWAYS fetch from DexScreener to get 24h change data for volatility
+        # Fetch from DexScreener to get 24h change data for volatility,
+        # unless the caller already holds a quote for this token
         print(f"DEBUG: BoundsCalculator.calculate_bounds for {token}", flush=True)
-        fetched_price = self.fetch_current_price(token)
-        print(f"DEBUG: fetched_price={fetched_price}, passed_price={current_price}, last_24h_change={self._last_24h_change}", flush=True)
+        if current_price and current_price > 0 and price_change_24h is not None:
+            fetched_price = current_price
+        else:
+            fetched_price, fetched_change = self.fetch_quote(token)
+            if price_change_24h is None:
+                price_change_24h = fetched_change
+        print(f"DEBUG: fetched_price={fetched_price}, passed_price={current_price}, last_24h_change={price_change_24h}", flush=True)
         
         # PRIORITY: Use provided price from frontend if valid, otherwise use fetched price
         # This ensures the displayed current_price matches what frontend shows
@@ -332,7 +470,12 @@ class BoundsCalculator:
             # Fallback to fetched price only if no valid price was passed
             current_price = fetched_price
             print(f"DEBUG: Using FETCHED price: ${current_price}")
-        # Note: _last_24h_change is now populated from fetch_current_price()
+        
+        # Recent returns come from the shared panel when reading the local store
+        panel_returns = recent_returns
+        if (panel_returns is None and historical_data is None
+                and self.returns_panel is not None and self.returns_panel.has_token(token)):
+            panel_returns = self.panel_recent_returns(token, current_price)
         
         # Fetch historical data if not provided
         if historical_data is None:
@@ -341,11 +484,12 @@ class BoundsCalculator:
         # Append current price to historical data to make volatility dynamic
         # This ensures the safety score reacts immediately to recent price action
         if current_price and current_price > 0 and historical_data is not None and not historical_data.empty:
+            pool_features = self.live_pool_features(token)
             new_row = pd.DataFrame({
                 'date': [datetime.now()],
                 'price': [float(current_price)],
-                'tvl_change_7d': [0.0],
-                'apy_cv': [0.0]
+                'tvl_change_7d': [pool_features['tvl_change_7d']],
+                'apy_cv': [pool_features['apy_cv']]
             })
             historical_data = pd.concat([historical_data, new_row], ignore_index=True)
         
@@ -360,43 +504,146 @@ class BoundsCalculator:
         # Special handling for stablecoins - they have very low volatility
         if token in ['usdc', 'usdt']:
             daily_volatility = 0.001  # 0.1% daily volatility for stablecoins
+        elif panel_returns is not None and len(panel_returns) > 7:
+            daily_volatility = float(panel_returns.std(ddof=1))
         elif len(historical_data) > 7:
             recent_returns = historical_data['price'].pct_change().dropna().iloc[-14:]
             daily_volatility = recent_returns.std() if len(recent_returns) > 0 else 0.02
         else:
             # Fallback: Estimate volatility from 24h price change if available
-            if hasattr(self, '_last_24h_change') and self._last_24h_change != 0:
+            if price_change_24h:
                 # Approximate daily volatility as abs(24h_change) / 2 (conservative estimate)
-                daily_volatility = max(0.02, abs(self._last_24h_change / 100.0) * 0.6)
+                daily_volatility = max(0.02, abs(price_change_24h / 100.0) * 0.6)
             else:
                 # Default fallback when NO data is available
                 daily_volatility = 0.05
         
-        # Scale to weekly (sqrt(7) rule)
-        weekly_volatility = daily_volatility * np.sqrt(7)
+        # Alternative volatility sources replace the sample estimate when available
+        estimator_used = 'sample'
+        if token not in ['usdc', 'usdt']:
+            if volatility_estimator == 'realized':
+                realized_volatility = self.realized_volatility.daily_volatility(token)
+                if realized_volatility is not None:
+                    daily_volatility = realized_volatility
+                    estimator_used = 'realized'
+            elif (volatility_estimator != 'sample' and volatility_estimators is not None
+                    and volatility_estimators.has(token)):
+                estimator_used = volatility_estimator
+        
+        # Fitted EWMA / GARCH models forecast a volatility per horizon
+        use_estimator = estimator_used in ['ewma', 'garch']
+        
+        # Get z-score for confidence level
+        z_score = self.Z_SCORES.get(confidence_level, 1.28)
+        
+        # Primary 7-day view (backward compatible top-level fields)
+        if use_estimator:
+            daily_volatility = volatility_estimators.forecast_daily_volatility(
+                token, self.DEFAULT_HORIZON_DAYS, volatility_estimator, live_price=current_price
+            )
+        primary = self._calculate_horizon_bounds(
+            token, current_price, daily_volatility, lstm_result,
+            sentiment_result, z_score, self.DEFAULT_HORIZON_DAYS
+        )
+        
+        result = {
+            'token': token.upper(),
+            'current_price': round(current_price, 6),
+            'predicted_price': primary['predicted_price'],
+            'lower_bound': primary['lower_bound'],
+            'upper_bound': primary['upper_bound'],
+            'range_width_pct': primary['range_width_pct'],
+            'safety_score': primary['safety_score'],
+            
+            # Component breakdown
+            'lstm_expected_return': round(lstm_result['expected_return'] * 100, 2),
+            'lstm_volatility': round(lstm_result['volatility'] * 100, 2),
+            'downside_probability': round(lstm_result['downside_prob'], 4),
+            'net_sentiment': round(sentiment_result['net_sentiment'], 4),
+            'sentiment_confidence': round(sentiment_result['confidence'], 4),
+            'recent_volatility_pct': primary['recent_volatility_pct'],
+            
+            # Metadata
+            'confidence_level': confidence_level,
+            'horizon_days': self.DEFAULT_HORIZON_DAYS,
+            'prediction_horizon': primary['prediction_horizon'],
+            'volatility_estimator': estimator_used
+        }
+        if volatility_estimator == 'realized':
+            result['realized_volatility_ready'] = estimator_used == 'realized'
+        
+        # Additional horizons reuse the same LSTM and sentiment inputs (and the
+        # same volatility unless a model estimator forecasts one per horizon)
+        if horizons:
+            result['horizons'] = {}
+            for days in horizons:
+                if days == self.DEFAULT_HORIZON_DAYS:
+                    horizon = primary
+                else:
+                    if use_estimator:
+                        daily_volatility = volatility_estimators.forecast_daily_volatility(
+                            token, days, volatility_estimator, live_price=current_price
+                        )
+                    horizon = self._calculate_horizon_bounds(
+                        token, current_price, daily_volatility, lstm_result,
+                        sentiment_result, z_score, days
+                    )
+                result['horizons'][f"{days}d"] = {
+                    'token': token.upper(),
+                    'current_price': round(current_price, 6),
+                    'confidence_level': confidence_level,
+                    **horizon
+                }
+        
+        return result
+    
+    def _calculate_horizon_bounds(
+        self,
+        token: str,
+        current_price: float,
+        daily_volatility: float,
+        lstm_result: Dict,
+        sentiment_result: Dict,
+        z_score: float,
+        horizon_days: int
+    ) -> Dict:
+        """
+        Calculate bounds for a single horizon from shared volatility, LSTM and sentiment inputs.
+        
+        Calibrated constants (range multipliers, LSTM weight, max range caps) are
+        defined for the 7-day horizon and scaled by sqrt(horizon / 7); the expected
+        return drift scales linearly with the horizon.
+        """
+        if horizon_days <= 0:
+            raise ValueError(f"horizon_days must be positive, got {horizon_days}")
+        
+        horizon_scale = np.sqrt(horizon_days / self.DEFAULT_HORIZON_DAYS)
+        drift_scale = horizon_days / self.DEFAULT_HORIZON_DAYS
+        
+        # Scale to horizon (sqrt(t) rule)
+        horizon_volatility = daily_volatility * np.sqrt(horizon_days)
         
         # Get token-specific range multiplier (calibrated from backtest)
         range_multiplier = self.RANGE_MULTIPLIERS.get(token, 0.5)
         
         # LSTM contribution (small weight, mostly for direction)
-        lstm_volatility = lstm_result['volatility'] * 0.2  # 20% weight to LSTM
+        lstm_volatility = lstm_result['volatility'] * 0.2 * horizon_scale  # 20% weight to LSTM
         
         # Sentiment impact
         max_sentiment_impact = self.SENTIMENT_IMPACT.get(token, 0.02)
         net_sentiment = sentiment_result['net_sentiment']
         
         # Calculate base uncertainty using HISTORICAL DATA primarily
-        # Formula: weekly_vol * range_multiplier + small LSTM adjustment
-        base_uncertainty = (weekly_volatility * range_multiplier) + (lstm_volatility * 0.1)
-        
-        # Get z-score for confidence level
-        z_score = self.Z_SCORES.get(confidence_level, 1.28)
+        # Formula: horizon_vol * range_multiplier + small LSTM adjustment
+        base_uncertainty = (horizon_volatility * range_multiplier) + (lstm_volatility * 0.1)
         
         # Apply z-score scaling
         scaled_uncertainty = base_uncertainty * z_score
         
         # Add small sentiment adjustment
-        sentiment_adjusted_return = lstm_result['expected_return'] * 0.3 + (net_sentiment * max_sentiment_impact)
+        sentiment_adjusted_return = (
+            lstm_result['expected_return'] * 0.3 + (net_sentiment * max_sentiment_impact)
+        ) * drift_scale
         
         # Calculate predicted price (small adjustment from current)
         predicted_price = current_price * (1 + sentiment_adjusted_return)
@@ -407,16 +654,7 @@ class BoundsCalculator:
         lower_bound = current_price * (1 - scaled_uncertainty * (1 + asymmetry))
         upper_bound = current_price * (1 + scaled_uncertainty * (1 - asymmetry))
         
-        # Token-specific max range caps
-        MAX_RANGES = {
-            'sol': 0.10,      # Max 10% for SOL
-            'jup': 0.12,      # Max 12% for JUP  
-            'usdt': 0.005,    # Max 0.5% for USDT
-            'usdc': 0.005,
-            'jupsol': 0.10,   # Max 10% for JUPSOL
-            'pengu': 0.15     # Max 15% for PENGU
-        }
-        max_range = MAX_RANGES.get(token, 0.15)
+        max_range = min(self.MAX_RANGES.get(token, 0.15) * horizon_scale, self.MAX_RANGE_LIMIT)
         
         if lower_bound < current_price * (1 - max_range):
             lower_bound = current_price * (1 - max_range)
@@ -430,33 +668,43 @@ class BoundsCalculator:
             range_width_pct = 0.0
         
         # Safety score: narrower range + lower volatility = safer
-        volatility_score = max(0, 100 - weekly_volatility * 500)  # Adjusted scale
+        volatility_score = max(0, 100 - horizon_volatility * 500)  # Adjusted scale
         range_score = max(0, 100 - range_width_pct * 8)  # Tighter scoring
         confidence_score = sentiment_result['confidence'] * 100
         
         safety_score = (volatility_score * 0.4 + range_score * 0.4 + confidence_score * 0.2)
         
         return {
-            'token': token.upper(),
-            'current_price': round(current_price, 6),
             'predicted_price': round(predicted_price, 6),
             'lower_bound': round(lower_bound, 6),
             'upper_bound': round(upper_bound, 6),
             'range_width_pct': round(range_width_pct, 2),
             'safety_score': round(safety_score, 1),
-            
-            # Component breakdown
-            'lstm_expected_return': round(lstm_result['expected_return'] * 100, 2),
-            'lstm_volatility': round(lstm_result['volatility'] * 100, 2),
-            'downside_probability': round(lstm_result['downside_prob'], 4),
-            'net_sentiment': round(net_sentiment, 4),
-            'sentiment_confidence': round(sentiment_result['confidence'], 4),
-            'recent_volatility_pct': round(weekly_volatility * 100, 2),
-            
-            # Metadata
-            'confidence_level': confidence_level,
-            'prediction_horizon': '7 days'
+            'lstm_volatility': round(lstm_result['volatility'] * horizon_scale * 100, 2),
+            'recent_volatility_pct': round(horizon_volatility * 100, 2),
+            'horizon_days': horizon_days,
+            'prediction_horizon': f"{horizon_days} day{'s' if horizon_days != 1 else ''}"
         }
+    
+    @staticmethod
+    def get_horizon_bounds(bounds: Dict, horizon_days: int) -> Dict:
+        """
+        Select the bounds for a given horizon from a multi-horizon result.
+        
+        Args:
+            bounds: Result of calculate_bounds (with or without 'horizons')
+            horizon_days: Horizon in days
+        
+        Returns:
+            Bounds dictionary for that horizon
+        """
+        if bounds.get('horizon_days') == horizon_days:
+            return bounds
+        
+        horizon = bounds.get('horizons', {}).get(f"{horizon_days}d")
+        if horizon is None:
+            raise KeyError(f"Horizon {horizon_days}d was not calculated for {bounds.get('token')}")
+        return horizon
 
 
 def calculate_prediction_bounds(
@@ -465,7 +713,8 @@ def calculate_prediction_bounds(
     historical_data: Optional[pd.DataFrame] = None,
     headlines: Optional[List[str]] = None,
     confidence_level: float = 0.80,
-    models_dir: str = "models"
+    models_dir: str = "models",
+    horizons: Optional[List[int]] = None
 ) -> Dict:
     """
     Convenience function to calculate price bounds for a token.
@@ -477,6 +726,7 @@ def calculate_prediction_bounds(
         headlines: Optional news headlines
         confidence_level: Confidence interval
         models_dir: Directory containing models
+        horizons: Optional list of horizons in days
     
     Returns:
         Bounds dictionary
@@ -487,14 +737,16 @@ def calculate_prediction_bounds(
         current_price=current_price,
         historical_data=historical_data,
         headlines=headlines,
-        confidence_level=confidence_level
+        confidence_level=confidence_level,
+        horizons=horizons
     )
 
 
 def calculate_multi_token_bounds(
     tokens: List[str],
     confidence_level: float = 0.80,
-    models_dir: str = "models"
+    models_dir: str = "models",
+    horizons: Optional[List[int]] = None
 ) -> Dict[str, Dict]:
     """
     Calculate bounds for multiple tokens.
@@ -503,6 +755,7 @@ def calculate_multi_token_bounds(
         tokens: List of token symbols
         confidence_level: Confidence interval
         models_dir: Directory containing models
+        horizons: Optional list of horizons in days
     
     Returns:
         Dictionary mapping token symbols to their bounds
@@ -514,7 +767,8 @@ def calculate_multi_token_bounds(
         try:
             results[token.lower()] = calculator.calculate_bounds(
                 token=token,
-                confidence_level=confidence_level
+                confidence_level=confidence_level,
+                horizons=horizons
             )
         except Exception as e:
             print(f"Error calculating bounds for {token}: {e}")
@@ -0,0 +1,364 @@
+"""
+Concentrated Liquidity Calculator
+=================================
+Impermanent loss and position value for Whirlpool (concentrated liquidity)
+positions bounded by a lower/upper price.
+
+All calculations are vectorized over many candidate ranges and price
+scenarios at once: ranges are rows, scenarios are columns.
+"""
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class ConcentratedLiquidityCalculator:
+    """
+    Calculates IL, token composition and out-of-range behaviour for
+    concentrated liquidity positions.
+    
+    Prices are pool prices: token A priced in units of token B.
+    
+    Position amounts per unit of liquidity L, with sc = clip(sqrt(P), sqrt(Pa), sqrt(Pb)):
+        x (token A) = L * (1/sc - 1/sqrt(Pb))
+        y (token B) = L * (sc - sqrt(Pa))
+    
+    IL = value_of_position / value_of_holding_initial_tokens - 1
+    """
+    
+    # Whirlpool tick base: price = 1.0001^tick
+    TICK_BASE = 1.0001
+    
+    # Whirlpool tick limits
+    MIN_TICK = -443636
+    MAX_TICK = 443636
+    
+    @classmethod
+    def tick_to_price(cls, tick, decimals_a: int = 0, decimals_b: int = 0) -> np.ndarray:
+        """
+        Convert Whirlpool ticks to pool prices (token A in token B).
+        
+        Args:
+            tick: Tick index or array of tick indices
+            decimals_a: Mint decimals of token A
+            decimals_b: Mint decimals of token B
+        
+        Returns:
+            Prices adjusted for mint decimals
+        """
+        tick = np.asarray(tick, dtype=np.float64)
+        return np.power(cls.TICK_BASE, tick) * 10.0 ** (decimals_a - decimals_b)
+    
+    @classmethod
+    def price_to_tick(cls, price, decimals_a: int = 0, decimals_b: int = 0) -> np.ndarray:
+        """
+        Convert pool prices to the nearest lower Whirlpool tick.
+        
+        Args:
+            price: Price or array of prices (token A in token B)
+            decimals_a: Mint decimals of token A
+            decimals_b: Mint decimals of token B
+        
+        Returns:
+            Tick indices (int64)
+        """
+        price = np.asarray(price, dtype=np.float64) / 10.0 ** (decimals_a - decimals_b)
+        ticks = np.floor(np.log(price) / np.log(cls.TICK_BASE)).astype(np.int64)
+        return np.clip(ticks, cls.MIN_TICK, cls.MAX_TICK)
+    
+    @staticmethod
+    def range_from_bounds(token_a_bounds: Dict, token_b_bounds: Dict) -> Tuple[float, float, float]:
+        """
+        Derive a pool price range from per-token bounds.
+        
+        The range spans the widest pair ratio inside the prediction box.
+        
+        Args:
+            token_a_bounds: Bounds dict with current_price, lower_bound, upper_bound
+            token_b_bounds: Bounds dict with current_price, lower_bound, upper_bound
+        
+        Returns:
+            Tuple of (current_price, lower_price, upper_price) in token B units
+        """
+        current_price = token_a_bounds['current_price'] / token_b_bounds['current_price']
+        lower_price = token_a_bounds['lower_bound'] / token_b_bounds['upper_bound']
+        upper_price = token_a_bounds['upper_bound'] / token_b_bounds['lower_bound']
+        return current_price, lower_price, upper_price
+    
+    @staticmethod
+    def _unit_amounts(
+        sqrt_price: np.ndarray,
+        sqrt_lower: np.ndarray,
+        sqrt_upper: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Token amounts per unit of liquidity (broadcasts over all inputs)."""
+        sqrt_clipped = np.clip(sqrt_price, sqrt_lower, sqrt_upper)
+        amount_a = 1.0 / sqrt_clipped - 1.0 / sqrt_upper
+        amount_b = sqrt_clipped - sqrt_lower
+        return amount_a, amount_b
+    
+    def calculate_position(
+        self,
+        current_price: float,
+        lower_prices,
+        upper_prices,
+        future_prices
+    ) -> Dict:
+        """
+        Calculate concentrated IL and position state for ranges x scenarios.
+        
+        Positions are normalized to a value of 1 (in token B) at entry.
+        
+        Args:
+            current_price: Current pool price (token A in token B)
+            lower_prices: Array of range lower prices, shape (R,)
+            upper_prices: Array of range upper prices, shape (R,)
+            future_prices: Array of future pool prices, shape (S,)
+        
+        Returns:
+            Dictionary of arrays:
+            - il_pct (R, S): IL vs holding the entry tokens, percent
+            - position_value (R, S): Position value per unit of entry value
+            - hold_value (R, S): Value of holding the entry tokens
+            - token_a_share (R, S): Fraction of position value held in token A
+            - range_state (R, S): -1 below range, 0 in range, 1 above range
+            - capital_efficiency (R,): Liquidity vs a full-range position of equal value
+            - entry_token_a_share (R,): Fraction of entry value deposited as token A
+            - full_range_il_pct (S,): Constant-product IL for the same scenarios
+        """
+        lower_prices = np.asarray(lower_prices, dtype=np.float64).ravel()
+        upper_prices = np.asarray(upper_prices, dtype=np.float64).ravel()
+        future_prices = np.asarray(future_prices, dtype=np.float64).ravel()
+        
+        if lower_prices.shape != upper_prices.shape:
+            raise ValueError("lower_prices and upper_prices must have the same length")
+        if np.any(lower_prices <= 0) or np.any(upper_prices <= lower_prices):
+            raise ValueError("Ranges must satisfy 0 < lower < upper")
+        if current_price <= 0 or np.any(future_prices <= 0):
+            raise ValueError("Prices must be positive")
+        
+        sqrt_lower = np.sqrt(lower_prices)[:, None]
+        sqrt_upper = np.sqrt(upper_prices)[:, None]
+        sqrt_current = np.sqrt(current_price)
+        sqrt_future = np.sqrt(future_prices)[None, :]
+        
+        # Entry composition per unit liquidity: shape (R, 1)
+        entry_a, entry_b = self._unit_amounts(sqrt_current, sqrt_lower, sqrt_upper)
+        entry_value = entry_a * current_price + entry_b
+        
+        # Normalize liquidity so each position is worth 1 at entry
+        liquidity = 1.0 / entry_value
+        hold_a = entry_a * liquidity
+        hold_b = entry_b * liquidity
+        
+        # Future composition: shape (R, S)
+        future_a, future_b = self._unit_amounts(sqrt_future, sqrt_lower, sqrt_upper)
+        value_a = future_a * liquidity * future_prices[None, :]
+        position_value = value_a + future_b * liquidity
+        hold_value = hold_a * future_prices[None, :] + hold_b
+        
+        il_pct = (position_value / hold_value - 1) * 100
+        token_a_share = value_a / position_value
+        
+        range_state = np.zeros(il_pct.shape, dtype=np.int8)
+        range_state[sqrt_future <= sqrt_lower] = -1
+        range_state[sqrt_future >= sqrt_upper] = 1
+        
+        # Full-range position of value 1 has liquidity 1 / (2 * sqrt(P0))
+        capital_efficiency = (liquidity * 2 * sqrt_current).ravel()
+        
+        ratio_change = future_prices / current_price
+        full_range_il_pct = (2 * np.sqrt(ratio_change) / (1 + ratio_change) - 1) * 100
+        
+        return {
+            'current_price': current_price,
+            'lower_prices': lower_prices,
+            'upper_prices': upper_prices,
+            'future_prices': future_prices,
+            'il_pct': il_pct,
+            'position_value': position_value,
+            'hold_value': hold_value,
+            'token_a_share': token_a_share,
+            'range_state': range_state,
+            'capital_efficiency': capital_efficiency,
+            'entry_token_a_share': (hold_a * current_price).ravel(),
+            'full_range_il_pct': full_range_il_pct
+        }
+    
+    def summarize_ranges(self, position: Dict) -> Dict:
+        """
+        Summarize a position grid per range across all scenarios.
+        
+        Args:
+            position: Result of calculate_position
+        
+        Returns:
+            Dictionary of per-range arrays (shape (R,))
+        """
+        il_pct = position['il_pct']
+        range_state = position['range_state']
+        
+        return {
+            'worst_il_pct': il_pct.min(axis=1),
+            'mean_il_pct': il_pct.mean(axis=1),
+            'out_of_range_fraction': (range_state != 0).mean(axis=1),
+            'below_range_fraction': (range_state < 0).mean(axis=1),
+            'above_range_fraction': (range_state > 0).mean(axis=1),
+            'capital_efficiency': position['capital_efficiency']
+        }
+    
+    def calculate_position_for_ticks(
+        self,
+        current_price: float,
+        tick_lowers,
+        tick_uppers,
+        future_prices,
+        decimals_a: int = 0,
+        decimals_b: int = 0
+    ) -> Dict:
+        """
+        Calculate concentrated IL for ranges given as Whirlpool ticks.
+        
+        Args:
+            current_price: Current pool price (token A in token B)
+            tick_lowers: Array of lower ticks
+            tick_uppers: Array of upper ticks
+            future_prices: Array of future pool prices
+            decimals_a: Mint decimals of token A
+            decimals_b: Mint decimals of token B
+        
+        Returns:
+            Position dictionary (see calculate_position) with the ticks attached
+        """
+        position = self.calculate_position(
+            current_price,
+            self.tick_to_price(tick_lowers, decimals_a, decimals_b),
+            self.tick_to_price(tick_uppers, decimals_a, decimals_b),
+            future_prices
+        )
+        position['tick_lowers'] = np.asarray(tick_lowers, dtype=np.int64).ravel()
+        position['tick_uppers'] = np.asarray(tick_uppers, dtype=np.int64).ravel()
+        return position
+    
+    def calculate_il_for_bounds(
+        self,
+        token_a_bounds: Dict,
+        token_b_bounds: Dict,
+        lower_price: Optional[float] = None,
+        upper_price: Optional[float] = None,
+        grid_size: int = 101,
+        margin: float = 0.2
+    ) -> Dict:
+        """
+        Evaluate a concentrated position over scenarios spanning the bounds.
+        
+        Args:
+            token_a_bounds: Bounds for token A (from BoundsCalculator)
+            token_b_bounds: Bounds for token B (from BoundsCalculator)
+            lower_price: Optional range lower price (defaults to the bounds range)
+            upper_price: Optional range upper price (defaults to the bounds range)
+            grid_size: Number of pool price scenarios
+            margin: Extra scenario span beyond the bounds, to show out-of-range behaviour
+        
+        Returns:
+            Position analysis for the single range with IL at the range edges
+        """
+        current_price, bounds_lower, bounds_upper = self.range_from_bounds(
+            token_a_bounds, token_b_bounds
+        )
+        lower_price = lower_price if lower_price is not None else bounds_lower
+        upper_price = upper_price if upper_price is not None else bounds_upper
+        
+        future_prices = np.linspace(
+            bounds_lower * (1 - margin), bounds_upper * (1 + margin), grid_size
+        )
+        position = self.calculate_position(
+            current_price, [lower_price], [upper_price], future_prices
+        )
+        
+        # IL exactly at the range edges (worst in-range outcomes)
+        edges = self.calculate_position(
+            current_price, [lower_price], [upper_price], [lower_price, upper_price]
+        )
+        
+        il_pct = position['il_pct'][0]
+        in_range = position['range_state'][0] == 0
+        
+        return {
+            'current_price': current_price,
+            'lower_price': lower_price,
+            'upper_price': upper_price,
+            'capital_efficiency': round(float(position['capital_efficiency'][0]), 2),
+            'entry_token_a_share': round(float(position['entry_token_a_share'][0]), 4),
+            'il_at_lower_pct': round(float(edges['il_pct'][0, 0]), 4),
+            'il_at_upper_pct': round(float(edges['il_pct'][0, 1]), 4),
+            'worst_in_range_il_pct': round(float(il_pct[in_range].min()), 4) if in_range.any() else None,
+            'worst_il_pct': round(float(il_pct.min()), 4),
+            'scenario_prices': position['future_prices'],
+            'scenario_il_pct': il_pct,
+            'scenario_full_range_il_pct': position['full_range_il_pct'],
+            'scenario_token_a_share': position['token_a_share'][0],
+            'scenario_range_state': position['range_state'][0]
+        }
+
+
+def calculate_concentrated_il(
+    current_price: float,
+    lower_prices,
+    upper_prices,
+    future_prices
+) -> Dict:
+    """
+    Convenience function to calculate concentrated IL for ranges x scenarios.
+    
+    Args:
+        current_price: Current pool price (token A in token B)
+        lower_prices: Array of range lower prices
+        upper_prices: Array of range upper prices
+        future_prices: Array of future pool prices
+    
+    Returns:
+        Position dictionary of (ranges x scenarios) arrays
+    """
+    calculator = ConcentratedLiquidityCalculator()
+    return calculator.calculate_position(current_price, lower_prices, upper_prices, future_prices)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  CONCENTRATED LIQUIDITY CALCULATOR TEST")
+    print("=" * 60)
+    
+    sol_bounds = {
+        'current_price': 122.0,
+        'lower_bound': 118.0,
+        'upper_bound': 128.0
+    }
+    
+    usdc_bounds = {
+        'current_price': 1.0,
+        'lower_bound': 0.995,
+        'upper_bound': 1.005
+    }
+    
+    calculator = ConcentratedLiquidityCalculator()
+    
+    print("\n[SOL/USDC Position from Bounds]")
+    result = calculator.calculate_il_for_bounds(sol_bounds, usdc_bounds)
+    print(f"  Range: ${result['lower_price']:.2f} - ${result['upper_price']:.2f}")
+    print(f"  Capital Efficiency: {result['capital_efficiency']:.1f}x full range")
+    print(f"  IL at Lower Edge: {result['il_at_lower_pct']:.2f}%")
+    print(f"  IL at Upper Edge: {result['il_at_upper_pct']:.2f}%")
+    
+    print("\n[Bulk Evaluation: 2,000 ranges x 500 scenarios]")
+    widths = np.linspace(0.01, 0.5, 2000)
+    position = calculator.calculate_position(
+        122.0, 122.0 * (1 - widths), 122.0 * (1 + widths), np.linspace(80, 160, 500)
+    )
+    summary = calculator.summarize_ranges(position)
+    for i in [0, 999, 1999]:
+        print(f"  ±{widths[i] * 100:5.1f}%: efficiency {summary['capital_efficiency'][i]:6.1f}x, "
+              f"mean IL {summary['mean_il_pct'][i]:6.2f}%, out of range {summary['out_of_range_fraction'][i] * 100:5.1f}%")
+    
+    print("\n[Ticks]")
+    ticks = calculator.price_to_tick([118.0, 128.0], decimals_a=9, decimals_b=6)
+    print(f"  Ticks for $118 / $128 (SOL 9dp, USDC 6dp): {ticks.tolist()}")
@@ -4,9 +4,187 @@ Correlation Analyzer
 Measures correlation between tokens to assess divergence risk.
 High correlation = lower IL risk (tokens move together).
 """
+import threading
 import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Hashable, Optional
+
+if TYPE_CHECKING:
+    from .returns_panel import ReturnsPanel
+
+
+def _frame_dates(df: pd.DataFrame) -> np.ndarray:
+    """datetime64 dates of a price DataFrame (DatetimeIndex or 'date' / 'timestamp' column)."""
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.values
+    date_col = 'date' if 'date' in df.columns else 'timestamp'
+    dates = df[date_col]
+    return dates.values if pd.api.types.is_datetime64_dtype(dates) else pd.to_datetime(dates).values
+
+
+def _rows_since(df: pd.DataFrame, date) -> pd.DataFrame:
+    """
+    Rows of a date-sorted price DataFrame from the calendar day of `date` on.
+    
+    Unsorted frames are returned whole.
+    """
+    days = _frame_dates(df).astype('datetime64[D]')
+    if len(days) > 1 and (days[1:] < days[:-1]).any():
+        return df
+    return df.iloc[np.searchsorted(days, np.datetime64(pd.Timestamp(date), 'D')):]
+
+
+def daily_price_series(df: pd.DataFrame) -> pd.Series:
+    """
+    Price series indexed by calendar day (last observation per day).
+    
+    Args:
+        df: DataFrame with 'price' or 'close' column and a DatetimeIndex
+            or a 'date' / 'timestamp' column
+    
+    Returns:
+        float64 Series with a normalized, sorted, unique DatetimeIndex
+    """
+    price_col = 'price' if 'price' in df.columns else 'close'
+    days = _frame_dates(df).astype('datetime64[D]')
+    prices = df[price_col].to_numpy(dtype=np.float64)
+    
+    if len(days) > 1 and (days[1:] < days[:-1]).any():
+        order = np.argsort(days, kind='stable')
+        days, prices = days[order], prices[order]
+    
+    # Last observation of each day
+    keep = np.append(days[1:] != days[:-1], True) if len(days) else np.zeros(0, dtype=bool)
+    return pd.Series(prices[keep], index=pd.DatetimeIndex(days[keep].astype('datetime64[ns]')))
+
+
+class RollingCorrelationTracker:
+    """
+    Online rolling covariance / correlation for one token pair.
+    
+    Keeps sliding sums over the last `window` return pairs, so each new
+    observation costs O(1). The most recent rolling correlations back the
+    stability score, so old regimes drop out as new days arrive.
+    """
+    
+    # Re-sum the window from scratch every N updates to bound float drift
+    RESUM_INTERVAL = 500
+    
+    # Rolling correlations kept for the stability score (a 30-day history
+    # with a 14-return window yields 16, as in the batch calculation)
+    STABILITY_WINDOW = 16
+    
+    def __init__(self, window: int = 14, stability_window: Optional[int] = None):
+        """
+        Initialize the tracker.
+        
+        Args:
+            window: Rolling window size in returns
+            stability_window: Number of recent rolling correlations used
+                for the stability statistics (defaults to STABILITY_WINDOW)
+        """
+        if stability_window is None:
+            stability_window = self.STABILITY_WINDOW
+        if stability_window < 2:
+            raise ValueError("stability_window must be at least 2")
+        
+        self.window = window
+        self.stability_window = stability_window
+        self.last_date = None
+        self._a = deque()
+        self._b = deque()
+        self._sum_a = self._sum_b = 0.0
+        self._sum_aa = self._sum_bb = self._sum_ab = 0.0
+        self._updates = 0
+        
+        # Most recent rolling correlations
+        self._correlations = deque(maxlen=stability_window)
+    
+    def _resum(self):
+        """Recompute window sums exactly from the stored returns."""
+        a = np.fromiter(self._a, dtype=np.float64)
+        b = np.fromiter(self._b, dtype=np.float64)
+        self._sum_a, self._sum_b = float(a.sum()), float(b.sum())
+        self._sum_aa, self._sum_bb = float(a @ a), float(b @ b)
+        self._sum_ab = float(a @ b)
+    
+    def update(self, return_a: float, return_b: float, date=None) -> Optional[float]:
+        """
+        Add one pair of returns.
+        
+        Args:
+            return_a: Token A return
+            return_b: Token B return
+            date: Optional observation date (remembered as last_date)
+        
+        Returns:
+            Rolling correlation once the window is full, else None
+        """
+        self._a.append(return_a)
+        self._b.append(return_b)
+        self._sum_a += return_a
+        self._sum_b += return_b
+        self._sum_aa += return_a * return_a
+        self._sum_bb += return_b * return_b
+        self._sum_ab += return_a * return_b
+        
+        if len(self._a) > self.window:
+            old_a = self._a.popleft()
+            old_b = self._b.popleft()
+            self._sum_a -= old_a
+            self._sum_b -= old_b
+            self._sum_aa -= old_a * old_a
+            self._sum_bb -= old_b * old_b
+            self._sum_ab -= old_a * old_b
+        
+        self._updates += 1
+        if self._updates % self.RESUM_INTERVAL == 0:
+            self._resum()
+        
+        if date is not None:
+            self.last_date = date
+        
+        if len(self._a) < self.window:
+            return None
+        
+        correlation = self.correlation()
+        if np.isfinite(correlation):
+            self._correlations.append(correlation)
+        
+        return correlation
+    
+    def covariance(self) -> float:
+        """Sample covariance over the current window."""
+        n = len(self._a)
+        if n < 2:
+            return float('nan')
+        return (self._sum_ab - self._sum_a * self._sum_b / n) / (n - 1)
+    
+    def variances(self) -> tuple:
+        """Sample variances of token A and token B over the current window."""
+        n = len(self._a)
+        if n < 2:
+            return float('nan'), float('nan')
+        var_a = (self._sum_aa - self._sum_a ** 2 / n) / (n - 1)
+        var_b = (self._sum_bb - self._sum_b ** 2 / n) / (n - 1)
+        return max(var_a, 0.0), max(var_b, 0.0)
+    
+    def correlation(self) -> float:
+        """Correlation over the current window (NaN if a variance is zero)."""
+        var_a, var_b = self.variances()
+        if not var_a > 0 or not var_b > 0:
+            return float('nan')
+        return float(np.clip(self.covariance() / np.sqrt(var_a * var_b), -1.0, 1.0))
+    
+    def correlation_stats(self) -> tuple:
+        """Count, mean and sample std of the recent rolling correlations."""
+        count = len(self._correlations)
+        if count == 0:
+            return 0, 0.0, float('nan')
+        recent = np.fromiter(self._correlations, dtype=np.float64)
+        std = float(recent.std(ddof=1)) if count > 1 else float('nan')
+        return count, float(recent.mean()), std
 
 
 class CorrelationAnalyzer:
@@ -24,6 +202,11 @@ class CorrelationAnalyzer:
         'medium': 0.4
     }
     
+    def __init__(self):
+        """Initialize with no online trackers."""
+        self.trackers: Dict[Hashable, RollingCorrelationTracker] = {}
+        self._tracker_lock = threading.Lock()
+    
     def calculate_correlation(
         self,
         token_a_data: pd.DataFrame,
@@ -55,16 +238,75 @@ class CorrelationAnalyzer:
         returns_b = returns_b.iloc[-min_len:]
         
         if len(returns_a) < 5 or len(returns_b) < 5:
-            return {
-                'correlation': 0.0,
-                'divergence_risk_score': 100.0,
-                'interpretation': 'HIGH_RISK',
-                'message': 'Insufficient data for correlation analysis'
-            }
+            return self.insufficient_data_result()
         
         # Calculate correlation
         correlation = returns_a.corr(returns_b)
         
+        # Additional metrics
+        beta = self._calculate_beta(returns_a, returns_b)
+        
+        return self.interpret_correlation(correlation, beta, min_len)
+    
+    def calculate_panel_correlation(
+        self,
+        panel: 'ReturnsPanel',
+        token_a: str,
+        token_b: str,
+        window: int = 30
+    ) -> Dict:
+        """
+        Correlation risk from the shared returns panel.
+        
+        Unlike calculate_correlation, returns are aligned by date, so a gap
+        or a shorter history in one token cannot shift the pairing.
+        
+        Args:
+            panel: Shared ReturnsPanel
+            token_a: First token symbol
+            token_b: Second token symbol
+            window: Number of most recent joint return observations
+        
+        Returns:
+            Correlation analysis result
+        """
+        _, returns_a, returns_b = panel.pair_returns(token_a, token_b, n=window)
+        
+        if len(returns_a) < 5:
+            return self.insufficient_data_result()
+        
+        covariance = np.cov(returns_a, returns_b)
+        variance_a, variance_b = covariance[0, 0], covariance[1, 1]
+        
+        if variance_a > 0 and variance_b > 0:
+            correlation = covariance[0, 1] / np.sqrt(variance_a * variance_b)
+        else:
+            correlation = np.nan
+        beta = covariance[0, 1] / variance_b if variance_b > 0 else 1.0
+        
+        return self.interpret_correlation(correlation, beta, len(returns_a))
+    
+    def insufficient_data_result(self) -> Dict:
+        """Result returned when there are too few returns to correlate."""
+        return {
+            'correlation': 0.0,
+            'divergence_risk_score': 100.0,
+            'interpretation': 'HIGH_RISK',
+            'message': 'Insufficient data for correlation analysis'
+        }
+    
+    def interpret_correlation(self, correlation: float, beta: float, period_days: int) -> Dict:
+        """
+        Build the correlation risk result from precomputed statistics.
+        
+        Args:
+            correlation: Return correlation (NaN is treated as 0)
+            beta: Sensitivity of token A returns to token B returns
+            period_days: Number of return observations used
+        
+        Returns:
+            Correlation analysis result
+        """
         # Handle NaN
         if np.isnan(correlation):
             correlation = 0.0
@@ -84,17 +326,14 @@ class CorrelationAnalyzer:
             interpretation = 'HIGH_RISK'
             message = 'Tokens are weakly correlated - high IL risk from divergence'
         
-        # Additional metrics
-        beta = self._calculate_beta(returns_a, returns_b)
-        
         return {
-            'correlation': round(correlation, 4),
-            'divergence_risk_score': round(divergence_score, 2),
+            'correlation': round(float(correlation), 4),
+            'divergence_risk_score': round(float(divergence_score), 2),
             'interpretation': interpretation,
             'message': message,
-            'beta': round(beta, 4),
+            'beta': round(float(beta), 4),
             'correlation_direction': 'positive' if correlation > 0 else 'negative',
-            'period_days': min_len
+            'period_days': int(period_days)
         }
     
     def _calculate_beta(self, returns_a: pd.Series, returns_b: pd.Series) -> float:
@@ -143,34 +382,152 @@ class CorrelationAnalyzer:
         
         return combined['a'].rolling(window).corr(combined['b'])
     
+    def _get_tracker(
+        self,
+        pair_key: Hashable,
+        window: int,
+        stability_window: Optional[int] = None
+    ) -> RollingCorrelationTracker:
+        """Tracker for a pair, recreated if its windows changed (caller holds the lock)."""
+        if stability_window is None:
+            stability_window = RollingCorrelationTracker.STABILITY_WINDOW
+        tracker = self.trackers.get(pair_key)
+        if tracker is None or tracker.window != window or tracker.stability_window != stability_window:
+            tracker = RollingCorrelationTracker(window, stability_window)
+            self.trackers[pair_key] = tracker
+        return tracker
+    
+    @staticmethod
+    def _feed_tracker(
+        tracker: RollingCorrelationTracker,
+        token_a_data: pd.DataFrame,
+        token_b_data: pd.DataFrame
+    ):
+        """
+        Feed date-aligned returns newer than the tracker's last date.
+        
+        Only rows from the last fed day on are read (that day is the base
+        price for the first new return). A new tracker is fed just the
+        returns that still affect its state.
+        """
+        since = tracker.last_date
+        if since is not None:
+            token_a_data = _rows_since(token_a_data, since)
+            token_b_data = _rows_since(token_b_data, since)
+        if token_a_data.empty or token_b_data.empty:
+            return
+        
+        prices_a = daily_price_series(token_a_data)
+        prices_b = daily_price_series(token_b_data)
+        if since is not None and max(prices_a.index[-1], prices_b.index[-1]) <= since:
+            return
+        
+        returns = pd.concat([prices_a, prices_b], axis=1).pct_change(fill_method=None).dropna()
+        if since is not None:
+            returns = returns[returns.index > since]
+        else:
+            returns = returns.iloc[-(tracker.window + tracker.stability_window - 1):]
+            
+        for date, (return_a, return_b) in zip(returns.index, returns.to_numpy()):
+            tracker.update(float(return_a), float(return_b), date)
+    
     def get_correlation_stability(
         self,
         token_a_data: pd.DataFrame,
         token_b_data: pd.DataFrame,
-        window: int = 14
+        window: int = 14,
+        pair_key: Optional[Hashable] = None,
+        token_a: Optional[str] = None,
+        token_b: Optional[str] = None,
+        stability_window: Optional[int] = None
     ) -> Dict:
         """
         Assess how stable the correlation has been over time.
         
         Unstable correlation = higher risk (relationship may change).
         
+        Statistics cover the most recent stability_window rolling
+        correlations of date-aligned returns. Each pair keeps an online
+        tracker that is fed only returns dated after its last update, so
+        repeated calls cost O(new returns) instead of the full history.
+        
+        Args:
+            token_a_data: Price data for token A
+            token_b_data: Price data for token B
+            window: Rolling window size
+            pair_key: Optional tracker key (defaults to (token_a, token_b))
+            token_a: Token A symbol
+            token_b: Token B symbol
+            stability_window: Number of recent rolling correlations used
+                (defaults to RollingCorrelationTracker.STABILITY_WINDOW)
+        
+        Returns:
+            Stability metrics
+        """
+        if pair_key is None and token_a is not None and token_b is not None:
+            pair_key = (token_a.lower(), token_b.lower())
+        
+        if pair_key is None:
+            # Unnamed pair: a throwaway tracker over just the returns it needs
+            tracker = RollingCorrelationTracker(window, stability_window)
+            self._feed_tracker(tracker, token_a_data, token_b_data)
+            count, mean_corr, std_corr = tracker.correlation_stats()
+        else:
+            with self._tracker_lock:
+                tracker = self._get_tracker(pair_key, window, stability_window)
+                self._feed_tracker(tracker, token_a_data, token_b_data)
+                count, mean_corr, std_corr = tracker.correlation_stats()
+        
+        return self._stability_result(count, mean_corr, std_corr)
+    
+    def get_panel_correlation_stability(
+        self,
+        panel: 'ReturnsPanel',
+        token_a: str,
+        token_b: str,
+        window: int = 14,
+        stability_window: Optional[int] = None
+    ) -> Dict:
+        """
+        Correlation stability from the shared returns panel.
+        
+        Uses an online tracker per pair that is fed only the panel returns
+        dated after its last update.
+        
+        Args:
+            panel: Shared ReturnsPanel
+            token_a: First token symbol
+            token_b: Second token symbol
+            window: Rolling window size
+            stability_window: Number of recent rolling correlations used
+        
         Returns:
             Stability metrics
         """
-        rolling_corr = self.calculate_rolling_correlation(
-            token_a_data, token_b_data, window
-        ).dropna()
+        dates, returns_a, returns_b = panel.pair_returns(token_a, token_b)
+        
+        with self._tracker_lock:
+            tracker = self._get_tracker(('panel', token_a.lower(), token_b.lower()), window, stability_window)
+            if tracker.last_date is not None:
+                new = dates > tracker.last_date
+                dates, returns_a, returns_b = dates[new], returns_a[new], returns_b[new]
+            
+            for date, return_a, return_b in zip(dates, returns_a, returns_b):
+                tracker.update(float(return_a), float(return_b), date)
+            
+            count, mean_corr, std_corr = tracker.correlation_stats()
         
-        if len(rolling_corr) < 5:
+        return self._stability_result(count, mean_corr, std_corr)
+    
+    def _stability_result(self, count: int, mean_corr: float, std_corr: float) -> Dict:
+        """Score and interpret rolling-correlation statistics."""
+        if count < 5:
             return {
                 'stability_score': 50.0,
                 'interpretation': 'UNKNOWN',
                 'message': 'Insufficient data for stability analysis'
             }
         
-        mean_corr = rolling_corr.mean()
-        std_corr = rolling_corr.std()
-        
         # Stability score: low std = high stability
         stability_score = max(0, 100 - std_corr * 200)
         
@@ -185,9 +542,9 @@ class CorrelationAnalyzer:
             message = 'Correlation is highly variable - relationship may change'
         
         return {
-            'stability_score': round(stability_score, 1),
-            'mean_correlation': round(mean_corr, 4),
-            'correlation_std': round(std_corr, 4),
+            'stability_score': round(float(stability_score), 1),
+            'mean_correlation': round(float(mean_corr), 4),
+            'correlation_std': round(float(std_corr), 4),
             'interpretation': interpretation,
             'message': message
         }
@@ -250,3 +607,11 @@ if __name__ == "__main__":
     print(f"  Stability Score: {stability['stability_score']:.1f}")
     print(f"  Mean Correlation: {stability['mean_correlation']:.4f}")
     print(f"  {stability['message']}")
+    
+    # Online tracker: later calls only feed returns newer than the last one seen;
+    # stability covers the recent correlations (same as a 30-day recompute)
+    analyzer.get_correlation_stability(sol_data.iloc[:45], jup_data.iloc[:45], token_a='sol', token_b='jup')
+    online = analyzer.get_correlation_stability(sol_data, jup_data, token_a='sol', token_b='jup')
+    recent = CorrelationAnalyzer().get_correlation_stability(sol_data.iloc[-30:], jup_data.iloc[-30:])
+    print("\n[Online Stability Tracker]")
+    print(f"  Stability Score: {online['stability_score']:.1f} (matches 30-day recompute: {online == recent})")
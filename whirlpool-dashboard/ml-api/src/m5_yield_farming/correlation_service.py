@@ -0,0 +1,269 @@
+"""
+Correlation Service
+===================
+Precomputed all-pairs correlation and beta matrices for the token universe.
+
+Reads the date-aligned returns window from the shared ReturnsPanel, computes
+the full N x N correlation and beta matrices with a handful of matrix
+products, and caches them until the panel is rebuilt with new data.
+Pair lookups are then O(1) array reads.
+"""
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from .correlation_analyzer import CorrelationAnalyzer
+from .returns_panel import ReturnsPanel
+
+
+class CorrelationService:
+    """
+    Cached correlation / beta matrices for all supported tokens.
+    
+    Statistics are pairwise-complete: each pair uses every day on which both
+    tokens have a return, so a gap in one token does not shorten the window
+    for the others.
+    
+    The window is the last `window` calendar days of the panel, not the last
+    `window` observations per token: a token with missing days is scored on
+    fewer returns (see 'period_days'), where the per-pair path would reach
+    further back to fill its window.
+    """
+    
+    # Number of most recent calendar days of returns used
+    DEFAULT_WINDOW = 30
+    
+    # Minimum overlapping returns for a pair to be scored
+    MIN_OBSERVATIONS = 5
+    
+    def __init__(self, panel: ReturnsPanel, window: int = DEFAULT_WINDOW):
+        """
+        Initialize the service.
+        
+        Args:
+            panel: Shared returns panel for the token universe
+            window: Number of most recent calendar days of returns used
+        """
+        self.panel = panel
+        self.window = window
+        self.analyzer = CorrelationAnalyzer()
+        
+        self._lock = threading.Lock()
+        self._state = None
+        self._panel_version = None
+    
+    @staticmethod
+    def compute_matrices(returns: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Pairwise-complete correlation, beta and overlap counts.
+        
+        Args:
+            returns: (days, tokens) float64 returns, NaN where missing
+        
+        Returns:
+            Dict of (tokens, tokens) arrays: 'correlation', 'beta'
+            (beta[i, j] = sensitivity of token i to token j) and 'observations'
+        """
+        valid = np.isfinite(returns)
+        x = np.where(valid, returns, 0.0)
+        m = valid.astype(np.float64)
+        
+        n = m.T @ m                 # overlapping days per pair
+        sum_x = x.T @ m             # sum_x[i, j] = sum of x_i where j is also valid
+        sum_xx = (x * x).T @ m
+        sum_xy = x.T @ x
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (sum_xy - sum_x * sum_x.T / n) / (n - 1)
+            variance = (sum_xx - sum_x ** 2 / n) / (n - 1)
+            correlation = covariance / np.sqrt(variance * variance.T)
+            beta = covariance / variance.T
+        
+        variance_b = variance.T
+        beta = np.where(np.isfinite(variance_b) & (variance_b > 0), beta, 1.0)
+        correlation = np.where(np.isfinite(correlation), np.clip(correlation, -1.0, 1.0), np.nan)
+        
+        return {
+            'correlation': correlation,
+            'beta': beta,
+            'observations': n.astype(np.int64)
+        }
+    
+    def _build(self) -> Dict:
+        """Correlation / beta matrices over the panel's most recent window."""
+        tokens, dates, returns = self.panel.window_matrix(self.window)
+        
+        return {
+            'tokens': tokens,
+            'index': {t: i for i, t in enumerate(tokens)},
+            'start_date': str(dates[0]) if len(dates) else None,
+            'end_date': str(dates[-1]) if len(dates) else None,
+            'built_at': time.time(),
+            **self.compute_matrices(returns)
+        }
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Refresh the panel and rebuild the matrices if it has new data.
+        
+        Args:
+            force: Reload the panel and rebuild even if nothing changed
+        
+        Returns:
+            True if the matrices were rebuilt
+        """
+        self.panel.refresh(force=force)
+        return self._ensure_current(force=force)
+    
+    def invalidate(self):
+        """Drop the cached matrices; the next lookup rebuilds them."""
+        with self._lock:
+            self._state = None
+            self._panel_version = None
+    
+    def _ensure_current(self, force: bool = False) -> bool:
+        """Rebuild when the panel version changed since the last build."""
+        self.panel.snapshot()
+        with self._lock:
+            if not force and self._state is not None and self._panel_version == self.panel.version:
+                return False
+            
+            # Swap in a fully built state so concurrent readers never see a partial one
+            version = self.panel.version
+            self._state = self._build()
+            self._panel_version = version
+            return True
+    
+    def _current_state(self) -> Dict:
+        """Cached state, rebuilt when the panel has new data."""
+        self._ensure_current()
+        return self._state
+    
+    def has_pair(self, token_a: str, token_b: str) -> bool:
+        """Whether both tokens are part of the cached universe."""
+        index = self._current_state()['index']
+        return token_a.lower() in index and token_b.lower() in index
+    
+    def get_correlation(self, token_a: str, token_b: str) -> Dict:
+        """
+        O(1) correlation risk lookup for a token pair.
+        
+        Args:
+            token_a: First token symbol
+            token_b: Second token symbol
+        
+        Returns:
+            Same structure as CorrelationAnalyzer.calculate_correlation
+        """
+        state = self._current_state()
+        i = state['index'].get(token_a.lower())
+        j = state['index'].get(token_b.lower())
+        
+        if i is None or j is None or state['observations'][i, j] < self.MIN_OBSERVATIONS:
+            return self.analyzer.insufficient_data_result()
+        
+        return self.analyzer.interpret_correlation(
+            state['correlation'][i, j],
+            state['beta'][i, j],
+            state['observations'][i, j]
+        )
+    
+    def get_pair_arrays(self, tokens_a: List[str], tokens_b: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Vectorized lookup for many pairs at once.
+        
+        Args:
+            tokens_a: First token of each pair
+            tokens_b: Second token of each pair
+        
+        Returns:
+            Dict of per-pair arrays: 'correlation' (0.0 where undefined or
+            below MIN_OBSERVATIONS, as in get_correlation), 'beta',
+            'observations' and 'covered' (both tokens in the universe)
+        """
+        state = self._current_state()
+        i = np.array([state['index'].get(t.lower(), -1) for t in tokens_a], dtype=np.int64)
+        j = np.array([state['index'].get(t.lower(), -1) for t in tokens_b], dtype=np.int64)
+        covered = (i >= 0) & (j >= 0)
+        if not covered.any():
+            return {
+                'correlation': np.zeros(len(covered)),
+                'beta': np.ones(len(covered)),
+                'observations': np.zeros(len(covered), dtype=np.int64),
+                'covered': covered
+            }
+        
+        i, j = np.where(covered, i, 0), np.where(covered, j, 0)
+        observations = np.where(covered, state['observations'][i, j], 0)
+        correlation = state['correlation'][i, j]
+        usable = covered & (observations >= self.MIN_OBSERVATIONS) & np.isfinite(correlation)
+        
+        return {
+            'correlation': np.where(usable, correlation, 0.0),
+            'beta': np.where(covered, state['beta'][i, j], 1.0),
+            'observations': observations,
+            'covered': covered
+        }
+    
+    def get_matrix(self) -> Dict:
+        """
+        Full correlation / beta matrices for the token universe.
+        
+        Returns:
+            Tokens, nested-list matrices (None where undefined) and metadata
+        """
+        state = self._current_state()
+        
+        def to_list(matrix: np.ndarray) -> List[List[Optional[float]]]:
+            return [
+                [round(float(v), 4) if np.isfinite(v) else None for v in row]
+                for row in matrix
+            ]
+        
+        return {
+            'tokens': [t.upper() for t in state['tokens']],
+            'correlation': to_list(state['correlation']),
+            'beta': to_list(state['beta']),
+            'observations': state['observations'].tolist(),
+            'window': self.window,
+            'start_date': state['start_date'],
+            'end_date': state['end_date']
+        }
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  CORRELATION SERVICE TEST")
+    print("=" * 60)
+    
+    np.random.seed(42)
+    dates = pd.date_range(start='2024-01-01', periods=60, freq='D')
+    
+    sol_returns = np.random.normal(0.01, 0.05, 60)
+    jup_returns = sol_returns * 0.8 + np.random.normal(0, 0.02, 60)
+    usdc_returns = np.random.normal(0, 0.001, 60)
+    
+    sample = {
+        'sol': pd.DataFrame({'date': dates, 'price': 100 * np.cumprod(1 + sol_returns)}),
+        'jup': pd.DataFrame({'date': dates, 'price': 0.5 * np.cumprod(1 + jup_returns)}),
+        # USDC history has a gap to exercise date alignment
+        'usdc': pd.DataFrame({'date': dates, 'price': np.cumprod(1 + usdc_returns)}).drop(index=[45, 46])
+    }
+    
+    panel = ReturnsPanel(lambda token, days: sample.get(token, pd.DataFrame()).tail(days),
+                         tokens=['sol', 'jup', 'usdc'])
+    service = CorrelationService(panel)
+    
+    matrix = service.get_matrix()
+    print(f"\n[Correlation Matrix] {matrix['start_date']} -> {matrix['end_date']}")
+    for token, row in zip(matrix['tokens'], matrix['correlation']):
+        print(f"  {token:>5}: " + "  ".join(f"{v:+.3f}" for v in row))
+    
+    result = service.get_correlation('sol', 'jup')
+    print("\n[SOL/JUP Lookup]")
+    print(f"  Correlation: {result['correlation']:.4f}")
+    print(f"  Beta: {result['beta']:.4f}")
+    print(f"  Interpretation: {result['interpretation']}")
+    print(f"  Rebuilt on unchanged data: {service.refresh()}")
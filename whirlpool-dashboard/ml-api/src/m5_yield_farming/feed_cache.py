@@ -0,0 +1,200 @@
+"""
+Feed Cache
+==========
+Conditional-GET disk cache for bulk HTTP feeds (e.g., the DeFiLlama pools feed).
+
+The last payload of a feed is stored on disk (gzip-compressed JSON, or a
+custom format such as Parquet) together with its ETag / Last-Modified
+validators. Refreshes send If-None-Match /
+If-Modified-Since so an unchanged feed costs a 304 instead of a download and
+parse, and the cached payload is available immediately at startup.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+class FeedCache:
+    """
+    On-disk copy of one feed plus its HTTP validators.
+    
+    Files are written to a temporary path and renamed into place, so a crash
+    mid-write never leaves a truncated payload behind.
+    """
+    
+    DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "../../cache")
+    
+    def __init__(
+        self,
+        name: str,
+        cache_dir: Optional[str] = None,
+        suffix: str = '.json.gz',
+        reader: Optional[Callable[[str], Any]] = None,
+        writer: Optional[Callable[[Any, str], None]] = None
+    ):
+        """
+        Initialize the cache (nothing is read until load()).
+        
+        Args:
+            name: Feed name, used for the file names
+            cache_dir: Directory for the cache files (defaults to ml-api/cache)
+            suffix: Payload file suffix
+            reader: Reads a payload from a path (defaults to gzip JSON)
+            writer: Writes (payload, path) (defaults to gzip JSON)
+        """
+        self.name = name
+        self.cache_dir = cache_dir or self.DEFAULT_CACHE_DIR
+        self.suffix = suffix
+        self.reader = reader or self._read_json
+        self.writer = writer or self._write_json
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+        self.checked_at = None
+        self.records = None
+        self._lock = threading.Lock()
+    
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.name}{self.suffix}")
+    
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.name}.meta.json")
+    
+    def load(self) -> Optional[Any]:
+        """
+        Read the cached payload and its validators from disk.
+        
+        Returns:
+            Decoded payload, or None if nothing usable is cached
+        """
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            payload = self.reader(self.data_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"  Warning: ignoring unreadable {self.name} cache: {e}")
+            self.clear()
+            return None
+        
+        self.etag = meta.get('etag')
+        self.last_modified = meta.get('last_modified')
+        self.fetched_at = meta.get('fetched_at')
+        self.checked_at = meta.get('checked_at', self.fetched_at)
+        self.records = meta.get('records')
+        return payload
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+    
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the payload was last confirmed current, or None if never."""
+        if self.checked_at is None:
+            return None
+        return time.time() - self.checked_at
+    
+    def store(self, payload: Any, headers: Mapping[str, str]):
+        """
+        Persist a freshly downloaded payload with the response validators.
+        
+        Args:
+            payload: JSON-serializable payload (already reduced to what is used)
+            headers: Response headers (ETag / Last-Modified are kept)
+        """
+        now = time.time()
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            
+            tmp_path = self.data_path + '.tmp'
+            self.writer(payload, tmp_path)
+            os.replace(tmp_path, self.data_path)
+            
+            self.etag = headers.get('ETag')
+            self.last_modified = headers.get('Last-Modified')
+            self.fetched_at = now
+            self.checked_at = now
+            self.records = len(payload) if hasattr(payload, '__len__') else None
+            self._write_meta()
+    
+    def mark_not_modified(self, headers: Optional[Mapping[str, str]] = None):
+        """
+        Record a 304 response: the cached payload is still current.
+        
+        Args:
+            headers: 304 response headers (a refreshed ETag is kept)
+        """
+        with self._lock:
+            if headers is not None:
+                self.etag = headers.get('ETag') or self.etag
+                self.last_modified = headers.get('Last-Modified') or self.last_modified
+            self.checked_at = time.time()
+            self._write_meta()
+    
+    def clear(self):
+        """Forget the validators and delete the cached files."""
+        with self._lock:
+            self.etag = None
+            self.last_modified = None
+            self.fetched_at = None
+            self.checked_at = None
+            self.records = None
+            for path in (self.meta_path, self.data_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def _write_json(payload: Any, path: str):
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+    
+    def _write_meta(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'name': self.name,
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'fetched_at': self.fetched_at,
+                'checked_at': self.checked_at,
+                'records': self.records
+            }, f)
+        os.replace(tmp_path, self.meta_path)
+
+
+if __name__ == "__main__":
+    import tempfile
+    
+    print("=" * 60)
+    print("  FEED CACHE TEST")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = FeedCache('pools', cache_dir)
+        print(f"\n[Cold start] payload: {cache.load()}, headers: {cache.conditional_headers()}")
+        
+        cache.store([{'pool': 'a', 'apy': 12.5}], {'ETag': 'W/"abc"', 'Last-Modified': 'Mon, 31 Mar 2025 16:40:47 GMT'})
+        
+        restarted = FeedCache('pools', cache_dir)
+        print(f"\n[Warm start] payload: {restarted.load()}")
+        print(f"  Conditional headers: {restarted.conditional_headers()}")
+        print(f"  Age: {restarted.age_seconds():.3f}s")
@@ -17,6 +17,9 @@ class ILCalculator:
     Where price_ratio = (new_price_A / old_price_A) / (new_price_B / old_price_B)
     """
     
+    # Quantiles reported for IL surfaces
+    DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+    
     @staticmethod
     def calculate_il_for_ratio(price_ratio: float) -> float:
         """
@@ -40,6 +43,100 @@ class ILCalculator:
         """Calculate IL as a percentage."""
         return ILCalculator.calculate_il_for_ratio(price_ratio) * 100
     
+    @staticmethod
+    def calculate_il_array(price_ratio) -> np.ndarray:
+        """
+        Vectorized IL for an array of price ratio changes.
+        
+        Args:
+            price_ratio: Array-like of ratio changes (any shape)
+        
+        Returns:
+            IL as decimals with the same shape (-1.0 where ratio <= 0)
+        """
+        ratio = np.asarray(price_ratio, dtype=np.float64)
+        positive = ratio > 0
+        safe_ratio = np.where(positive, ratio, 1.0)
+        il = 2 * np.sqrt(safe_ratio) / (1 + safe_ratio) - 1
+        return np.where(positive, il, -1.0)
+    
+    def calculate_il_surface(
+        self,
+        prices_a,
+        prices_b,
+        current_price_a: float,
+        current_price_b: float,
+        quantiles: Tuple[float, ...] = DEFAULT_QUANTILES
+    ) -> Dict:
+        """
+        Calculate the IL matrix over every (price_a, price_b) scenario.
+        
+        Uses broadcasting: rows are token A prices, columns are token B prices.
+        
+        Args:
+            prices_a: Array of future prices for token A
+            prices_b: Array of future prices for token B
+            current_price_a: Current price of token A
+            current_price_b: Current price of token B
+            quantiles: Quantiles of the IL distribution to report
+        
+        Returns:
+            Dictionary with the IL matrix (percent) and summary statistics
+        """
+        prices_a = np.asarray(prices_a, dtype=np.float64).ravel()
+        prices_b = np.asarray(prices_b, dtype=np.float64).ravel()
+        current_ratio = current_price_a / current_price_b
+        
+        # Ratio change for every scenario: shape (len(prices_a), len(prices_b))
+        ratio_change = (prices_a[:, None] / prices_b[None, :]) / current_ratio
+        il_matrix = self.calculate_il_array(ratio_change) * 100
+        
+        quantile_values = np.quantile(il_matrix, quantiles)
+        
+        return {
+            'prices_a': prices_a,
+            'prices_b': prices_b,
+            'ratio_change': ratio_change,
+            'il_matrix': il_matrix,
+            'min_il': float(il_matrix.min()),    # Most negative = worst loss
+            'max_il': float(il_matrix.max()),    # Closest to 0 = least loss
+            'mean_il': float(il_matrix.mean()),
+            'std_il': float(il_matrix.std()),
+            'quantiles': {
+                f"p{int(round(q * 100)):02d}": float(v)
+                for q, v in zip(quantiles, quantile_values)
+            },
+            'scenario_count': int(il_matrix.size)
+        }
+    
+    def calculate_il_grid(
+        self,
+        token_a_bounds: Dict,
+        token_b_bounds: Dict,
+        grid_size: int = 50,
+        quantiles: Tuple[float, ...] = DEFAULT_QUANTILES
+    ) -> Dict:
+        """
+        Calculate a dense IL surface spanning the prediction box.
+        
+        Args:
+            token_a_bounds: Bounds dict with current_price, lower_bound, upper_bound
+            token_b_bounds: Bounds dict with current_price, lower_bound, upper_bound
+            grid_size: Number of price points per token (grid_size^2 scenarios)
+            quantiles: Quantiles of the IL distribution to report
+        
+        Returns:
+            IL surface dictionary (see calculate_il_surface)
+        """
+        prices_a = np.linspace(token_a_bounds['lower_bound'], token_a_bounds['upper_bound'], grid_size)
+        prices_b = np.linspace(token_b_bounds['lower_bound'], token_b_bounds['upper_bound'], grid_size)
+        
+        return self.calculate_il_surface(
+            prices_a, prices_b,
+            token_a_bounds['current_price'], token_b_bounds['current_price'],
+            quantiles
+        )
+    
     def calculate_il_range(
         self,
         token_a_bounds: Dict,
@@ -66,33 +163,29 @@ class ILCalculator:
         p_b_current = token_b_bounds['current_price']
         current_ratio = p_a_current / p_b_current
         
-        # Price scenarios (4 corners of the prediction box)
-        scenarios = [
-            (token_a_bounds['lower_bound'], token_b_bounds['lower_bound']),
-            (token_a_bounds['lower_bound'], token_b_bounds['upper_bound']),
-            (token_a_bounds['upper_bound'], token_b_bounds['lower_bound']),
-            (token_a_bounds['upper_bound'], token_b_bounds['upper_bound']),
+        # 2x2 surface over the corners of the prediction box
+        surface = self.calculate_il_surface(
+            [token_a_bounds['lower_bound'], token_a_bounds['upper_bound']],
+            [token_b_bounds['lower_bound'], token_b_bounds['upper_bound']],
+            p_a_current, p_b_current
+        )
+        corners = [
+            (p_a_future, p_b_future)
+            for p_a_future in surface['prices_a'].tolist()
+            for p_b_future in surface['prices_b'].tolist()
         ]
         
-        il_values = []
-        scenario_details = []
-        
-        for p_a_future, p_b_future in scenarios:
-            future_ratio = p_a_future / p_b_future
-            
-            # Price ratio change (how much the ratio moved)
-            ratio_change = future_ratio / current_ratio
-            
-            # Calculate IL
-            il_pct = self.calculate_il_percentage(ratio_change)
-            il_values.append(il_pct)
-            
-            scenario_details.append({
+        scenario_details = [
+            {
                 'token_a_price': p_a_future,
                 'token_b_price': p_b_future,
-                'ratio_change': ratio_change,
-                'il_pct': il_pct
-            })
+                'ratio_change': float(ratio_change),
+                'il_pct': float(il_pct)
+            }
+            for (p_a_future, p_b_future), ratio_change, il_pct in zip(
+                corners, surface['ratio_change'].ravel(), surface['il_matrix'].ravel()
+            )
+        ]
         
         # Also calculate IL for predicted center scenario
         if 'predicted_price' in token_a_bounds and 'predicted_price' in token_b_bounds:
@@ -100,20 +193,20 @@ class ILCalculator:
             center_ratio_change = center_ratio / current_ratio
             center_il = self.calculate_il_percentage(center_ratio_change)
         else:
-            center_il = np.mean(il_values)
+            center_il = surface['mean_il']
         
-        return {
-            'min_il': min(il_values),           # Best case (least IL, closest to 0)
-            'max_il': max(il_values),           # This is actually closest to 0 when IL is negative
-            'worst_il': min(il_values),         # Most negative = worst loss
-            'best_il': max(il_values),          # Closest to 0 = least loss
-            'expected_il': center_il,           # IL at predicted center
-            'average_il': np.mean(il_values),   # Average across scenarios
-            'il_uncertainty': np.std(il_values),
+        result = {
+            'min_il': surface['min_il'],            # Best case (least IL, closest to 0)
+            'max_il': surface['max_il'],            # This is actually closest to 0 when IL is negative
+            'worst_il': surface['min_il'],          # Most negative = worst loss
+            'best_il': surface['max_il'],           # Closest to 0 = least loss
+            'expected_il': center_il,               # IL at predicted center
+            'average_il': surface['mean_il'],       # Average across scenarios
+            'il_uncertainty': surface['std_il'],
             'scenario_details': scenario_details,
             
             # Risk metrics
-            'max_il_risk_pct': abs(min(il_values)),  # Worst case as positive number
+            'max_il_risk_pct': abs(surface['min_il']),  # Worst case as positive number
             'token_a': {
                 'current': p_a_current,
                 'range': (token_a_bounds['lower_bound'], token_a_bounds['upper_bound'])
@@ -123,6 +216,13 @@ class ILCalculator:
                 'range': (token_b_bounds['lower_bound'], token_b_bounds['upper_bound'])
             }
         }
+        
+        # Carry the bounds horizon so downstream holding periods can match it
+        horizon_a = token_a_bounds.get('horizon_days')
+        if horizon_a is not None and horizon_a == token_b_bounds.get('horizon_days'):
+            result['horizon_days'] = horizon_a
+        
+        return result
     
     def calculate_il_for_price_change(
         self,
@@ -173,6 +273,26 @@ def calculate_il_range(token_a_bounds: Dict, token_b_bounds: Dict) -> Dict:
     return calculator.calculate_il_range(token_a_bounds, token_b_bounds)
 
 
+def calculate_il_surface(
+    token_a_bounds: Dict,
+    token_b_bounds: Dict,
+    grid_size: int = 50
+) -> Dict:
+    """
+    Convenience function to calculate a dense IL surface for a token pair.
+    
+    Args:
+        token_a_bounds: Bounds for token A (from BoundsCalculator)
+        token_b_bounds: Bounds for token B (from BoundsCalculator)
+        grid_size: Number of price points per token
+    
+    Returns:
+        IL surface dictionary
+    """
+    calculator = ILCalculator()
+    return calculator.calculate_il_grid(token_a_bounds, token_b_bounds, grid_size)
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("  IMPERMANENT LOSS CALCULATOR TEST")
@@ -207,3 +327,9 @@ if __name__ == "__main__":
     print("\n[Scenario Details]")
     for i, scenario in enumerate(il_range['scenario_details'], 1):
         print(f"  Scenario {i}: A=${scenario['token_a_price']:.2f}, B=${scenario['token_b_price']:.4f} → IL={scenario['il_pct']:.2f}%")
+    
+    print("\n[IL Surface 200x200]")
+    surface = calculate_il_surface(sol_bounds, jup_bounds, grid_size=200)
+    print(f"  Scenarios: {surface['scenario_count']}")
+    print(f"  Worst IL: {surface['min_il']:.2f}%  Mean IL: {surface['mean_il']:.2f}%")
+    print(f"  Quantiles: {', '.join(f'{k}={v:.2f}%' for k, v in surface['quantiles'].items())}")
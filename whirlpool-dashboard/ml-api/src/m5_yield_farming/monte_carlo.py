@@ -0,0 +1,325 @@
+"""
+Monte Carlo IL Simulator
+========================
+Simulates correlated price paths for a token pair and returns the full
+impermanent loss distribution (quantiles, VaR, CVaR).
+
+Paths are correlated geometric Brownian motions generated as
+(paths x steps) NumPy arrays in fixed-size chunks, so memory stays bounded
+and CPU cost is predictable for a given path count. When only the terminal
+prices matter (full-range IL), the summed increments are drawn directly, so
+each chunk needs O(paths) memory instead of O(paths x steps).
+"""
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+from .il_calculator import ILCalculator
+from .concentrated_liquidity import ConcentratedLiquidityCalculator
+
+
+class MonteCarloILSimulator:
+    """
+    Monte Carlo engine for pair IL under correlated GBM.
+    
+    Per-token volatility comes from BoundsCalculator results
+    (recent_volatility_pct over horizon_days) and the correlation from
+    CorrelationAnalyzer. The drift reproduces each token's predicted_price
+    as the expected price at the horizon.
+    """
+    
+    # Default number of simulated paths
+    DEFAULT_PATHS = 10000
+    
+    # Paths generated per chunk (bounds the size of the (paths x steps) arrays)
+    DEFAULT_CHUNK_SIZE = 5000
+    
+    # Time steps per simulated day
+    STEPS_PER_DAY = 4
+    
+    # Quantiles reported for the IL distribution
+    QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95)
+    
+    # Confidence level for VaR / CVaR
+    TAIL_LEVEL = 0.95
+    
+    def __init__(self, seed: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the simulator.
+        
+        Args:
+            seed: Optional RNG seed for reproducible simulations
+            chunk_size: Paths generated per chunk
+        """
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.il_calculator = ILCalculator()
+        self.cl_calculator = ConcentratedLiquidityCalculator()
+    
+    @staticmethod
+    def _token_parameters(bounds: Dict) -> Tuple[float, float]:
+        """Daily volatility and daily expected log drift for a token."""
+        horizon_days = bounds.get('horizon_days', 7)
+        daily_vol = bounds.get('recent_volatility_pct', 0.0) / 100 / np.sqrt(horizon_days)
+        
+        current = bounds['current_price']
+        predicted = bounds.get('predicted_price', current)
+        daily_drift = np.log(predicted / current) / horizon_days if current > 0 and predicted > 0 else 0.0
+        
+        return float(daily_vol), float(daily_drift)
+    
+    def simulate_log_paths(
+        self,
+        daily_vols: Tuple[float, float],
+        daily_drifts: Tuple[float, float],
+        correlation: float,
+        horizon_days: int,
+        n_paths: int,
+        rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Simulate one chunk of correlated GBM log-price paths.
+        
+        Args:
+            daily_vols: Daily volatility of token A and token B
+            daily_drifts: Daily expected log price change of token A and token B
+            correlation: Return correlation between the tokens
+            horizon_days: Simulation horizon in days
+            n_paths: Number of paths in this chunk
+            rng: NumPy random generator
+        
+        Returns:
+            Tuple of (log_a, log_b), each of shape (n_paths, steps), relative to today
+        """
+        steps = max(1, int(round(horizon_days * self.STEPS_PER_DAY)))
+        dt = horizon_days / steps
+        rho = float(np.clip(correlation, -1.0, 1.0))
+        
+        shocks = rng.standard_normal((2, n_paths, steps))
+        shock_a = shocks[0]
+        shock_b = rho * shocks[0] + np.sqrt(1 - rho ** 2) * shocks[1]
+        
+        log_paths = []
+        for shock, vol, drift in zip((shock_a, shock_b), daily_vols, daily_drifts):
+            # Ito correction keeps E[price_T] = predicted price
+            step_drift = (drift - 0.5 * vol ** 2) * dt
+            increments = step_drift + vol * np.sqrt(dt) * shock
+            log_paths.append(np.cumsum(increments, axis=1))
+        
+        return log_paths[0], log_paths[1]
+    
+    def simulate_terminal_log_prices(
+        self,
+        daily_vols: Tuple[float, float],
+        daily_drifts: Tuple[float, float],
+        correlation: float,
+        horizon_days: int,
+        n_paths: int,
+        rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Terminal log prices of one chunk of correlated GBM paths.
+        
+        Same distribution as the last column of simulate_log_paths: the sum of
+        the step increments is drawn directly (the sum of `steps` standard
+        normal shocks is normal with variance `steps`).
+        
+        Args:
+            daily_vols: Daily volatility of token A and token B
+            daily_drifts: Daily expected log price change of token A and token B
+            correlation: Return correlation between the tokens
+            horizon_days: Simulation horizon in days
+            n_paths: Number of paths in this chunk
+            rng: NumPy random generator
+        
+        Returns:
+            Tuple of (log_a, log_b), each of shape (n_paths,), relative to today
+        """
+        steps = max(1, int(round(horizon_days * self.STEPS_PER_DAY)))
+        dt = horizon_days / steps
+        rho = float(np.clip(correlation, -1.0, 1.0))
+        
+        shocks = rng.standard_normal((2, n_paths)) * np.sqrt(steps)
+        shock_a = shocks[0]
+        shock_b = rho * shocks[0] + np.sqrt(1 - rho ** 2) * shocks[1]
+        
+        terminal = []
+        for shock, vol, drift in zip((shock_a, shock_b), daily_vols, daily_drifts):
+            # Ito correction keeps E[price_T] = predicted price
+            step_drift = (drift - 0.5 * vol ** 2) * dt
+            terminal.append(steps * step_drift + vol * np.sqrt(dt) * shock)
+        
+        return terminal[0], terminal[1]
+    
+    def simulate(
+        self,
+        token_a_bounds: Dict,
+        token_b_bounds: Dict,
+        correlation: Union[float, Dict] = 0.0,
+        n_paths: int = DEFAULT_PATHS,
+        lower_price: Optional[float] = None,
+        upper_price: Optional[float] = None
+    ) -> Dict:
+        """
+        Simulate the IL distribution for a token pair.
+        
+        Args:
+            token_a_bounds: Bounds for token A (from BoundsCalculator)
+            token_b_bounds: Bounds for token B (from BoundsCalculator)
+            correlation: Correlation value or CorrelationAnalyzer result
+            n_paths: Number of simulated paths
+            lower_price: Optional concentrated range lower pool price (token A in token B)
+            upper_price: Optional concentrated range upper pool price
+        
+        Returns:
+            IL distribution with quantiles, VaR and CVaR (percent); when a range is
+            given, also concentrated IL and time-in-range statistics
+        """
+        if isinstance(correlation, dict):
+            correlation = correlation.get('correlation', 0.0)
+        
+        horizon_days = token_a_bounds.get('horizon_days', 7)
+        vol_a, drift_a = self._token_parameters(token_a_bounds)
+        vol_b, drift_b = self._token_parameters(token_b_bounds)
+        
+        current_price = token_a_bounds['current_price'] / token_b_bounds['current_price']
+        has_range = lower_price is not None and upper_price is not None
+        
+        rng = np.random.default_rng(self.seed)
+        terminal_il = np.empty(n_paths)
+        concentrated_il = np.empty(n_paths) if has_range else None
+        time_in_range = np.empty(n_paths) if has_range else None
+        ended_out_of_range = np.empty(n_paths, dtype=bool) if has_range else None
+        
+        for start in range(0, n_paths, self.chunk_size):
+            size = min(self.chunk_size, n_paths - start)
+            
+            # Full-range IL only depends on the terminal price ratio
+            if not has_range:
+                log_a, log_b = self.simulate_terminal_log_prices(
+                    (vol_a, vol_b), (drift_a, drift_b), correlation, horizon_days, size, rng
+                )
+                terminal_il[start:start + size] = self.il_calculator.calculate_il_array(
+                    np.exp(log_a - log_b)
+                ) * 100
+                continue
+            
+            log_a, log_b = self.simulate_log_paths(
+                (vol_a, vol_b), (drift_a, drift_b), correlation, horizon_days, size, rng
+            )
+            log_ratio = log_a - log_b
+            terminal_il[start:start + size] = self.il_calculator.calculate_il_array(
+                np.exp(log_ratio[:, -1])
+            ) * 100
+            
+            # Time in range needs the whole path
+            pool_prices = current_price * np.exp(log_ratio)
+            in_range = (pool_prices > lower_price) & (pool_prices < upper_price)
+            time_in_range[start:start + size] = in_range.mean(axis=1)
+            ended_out_of_range[start:start + size] = ~in_range[:, -1]
+            concentrated_il[start:start + size] = self.cl_calculator.calculate_position(
+                current_price, [lower_price], [upper_price], pool_prices[:, -1]
+            )['il_pct'][0]
+        
+        result = {
+            'full_range': self.summarize_distribution(terminal_il),
+            'n_paths': n_paths,
+            'steps': max(1, int(round(horizon_days * self.STEPS_PER_DAY))),
+            'horizon_days': horizon_days,
+            'seed': self.seed,
+            'inputs': {
+                'daily_volatility_a_pct': round(vol_a * 100, 4),
+                'daily_volatility_b_pct': round(vol_b * 100, 4),
+                'correlation': round(float(correlation), 4)
+            }
+        }
+        
+        if has_range:
+            result['concentrated'] = self.summarize_distribution(concentrated_il)
+            result['concentrated']['lower_price'] = lower_price
+            result['concentrated']['upper_price'] = upper_price
+            result['concentrated']['mean_time_in_range_pct'] = round(float(time_in_range.mean() * 100), 2)
+            result['concentrated']['ended_out_of_range_pct'] = round(float(ended_out_of_range.mean() * 100), 2)
+        
+        return result
+    
+    def summarize_distribution(self, il_pct: np.ndarray) -> Dict:
+        """
+        Summarize an IL sample (percent, negative = loss).
+        
+        Args:
+            il_pct: Array of simulated IL values
+        
+        Returns:
+            Mean, std, quantiles, VaR and CVaR at TAIL_LEVEL
+        """
+        quantile_values = np.quantile(il_pct, self.QUANTILES)
+        var = np.quantile(il_pct, 1 - self.TAIL_LEVEL)
+        tail = il_pct[il_pct <= var]
+        
+        return {
+            'expected_il': round(float(il_pct.mean()), 4),
+            'il_std': round(float(il_pct.std()), 4),
+            'worst_il': round(float(il_pct.min()), 4),
+            'quantiles': {
+                f"p{int(round(q * 100)):02d}": round(float(v), 4)
+                for q, v in zip(self.QUANTILES, quantile_values)
+            },
+            'var_95': round(float(var), 4),
+            'cvar_95': round(float(tail.mean()) if len(tail) else float(var), 4),
+            'prob_loss_over_1pct': round(float(np.mean(il_pct < -1.0)), 4),
+            'prob_loss_over_5pct': round(float(np.mean(il_pct < -5.0)), 4)
+        }
+
+
+def simulate_il_distribution(
+    token_a_bounds: Dict,
+    token_b_bounds: Dict,
+    correlation: Union[float, Dict] = 0.0,
+    n_paths: int = MonteCarloILSimulator.DEFAULT_PATHS,
+    seed: Optional[int] = None
+) -> Dict:
+    """
+    Convenience function to simulate the IL distribution for a token pair.
+    
+    Args:
+        token_a_bounds: Bounds for token A (from BoundsCalculator)
+        token_b_bounds: Bounds for token B (from BoundsCalculator)
+        correlation: Correlation value or CorrelationAnalyzer result
+        n_paths: Number of simulated paths
+        seed: Optional RNG seed
+    
+    Returns:
+        IL distribution dictionary
+    """
+    simulator = MonteCarloILSimulator(seed=seed)
+    return simulator.simulate(token_a_bounds, token_b_bounds, correlation, n_paths)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  MONTE CARLO IL SIMULATOR TEST")
+    print("=" * 60)
+    
+    sol_bounds = {
+        'current_price': 122.0,
+        'predicted_price': 124.0,
+        'recent_volatility_pct': 8.0,
+        'horizon_days': 7
+    }
+    
+    jup_bounds = {
+        'current_price': 0.85,
+        'predicted_price': 0.88,
+        'recent_volatility_pct': 12.0,
+        'horizon_days': 7
+    }
+    
+    print("\n[SOL/JUP, correlation 0.6, 20,000 paths]")
+    result = simulate_il_distribution(sol_bounds, jup_bounds, correlation=0.6, n_paths=20000, seed=42)
+    dist = result['full_range']
+    
+    print(f"  Expected IL: {dist['expected_il']:.3f}%")
+    print(f"  Median IL: {dist['quantiles']['p50']:.3f}%")
+    print(f"  VaR 95%: {dist['var_95']:.3f}%")
+    print(f"  CVaR 95%: {dist['cvar_95']:.3f}%")
+    print(f"  P(IL worse than -1%): {dist['prob_loss_over_1pct'] * 100:.1f}%")
@@ -2,11 +2,29 @@
 Pool Fetcher
 ============
 Fetches real-time pool APYs from DeFiLlama for Solana yield farming pools.
+
+The pools feed is parsed incrementally from the response stream, so only the
+Solana records (and only the fields used) are ever held in memory.
+
+Pair lookups go through an inverted index from normalized token symbol to
+pool positions, rebuilt once per refresh.
+
+Solana pools are held as a columnar PoolSnapshot, persisted as Parquet in a
+conditional-GET disk cache: it is loaded at startup and refreshes skip the
+download when the feed's ETag is unchanged.
 """
+import base64
+import codecs
+import json
+import time
+import numpy as np
 import requests
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import re
 
+from .feed_cache import FeedCache
+from .pool_snapshot import PoolSnapshot
+
 
 class PoolFetcher:
     """
@@ -28,41 +46,271 @@ class PoolFetcher:
     # Solana chain identifier
     SOLANA_CHAIN = "Solana"
     
-    def __init__(self):
+    # Bytes read from the response stream at a time
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
+    # Disk copies confirmed current within this many seconds are used without a refresh
+    DISK_CACHE_MAX_AGE = 3600
+    
+    _DATA_ARRAY = re.compile(r'"data"\s*:\s*\[')
+    
+    # Separators between the tokens of a pool symbol (e.g., "SOL-USDC")
+    _SYMBOL_SEPARATORS = re.compile(r'[-/_\s]+')
+    
+    # Symbol variant -> canonical token (e.g., 'WSOL' -> 'sol')
+    _SYMBOL_ALIASES = {
+        variant.upper(): token
+        for token, variants in TOKEN_SYMBOLS.items()
+        for variant in variants
+    }
+    
+    def __init__(self, cache_dir: Optional[str] = None, use_disk_cache: bool = True):
+        """
+        Initialize the fetcher, loading the disk cache if it is recent.
+        
+        Args:
+            cache_dir: Directory for the pools feed cache (defaults to ml-api/cache)
+            use_disk_cache: Keep the pools feed in a conditional-GET disk cache
+        """
         self.pools_cache = None
+        self._index = None
+        
+        # Lookups fetch the feed on first use unless a PoolService refreshes it
+        self.fetch_on_demand = True
+        
+        # Epoch seconds at which the pools were last confirmed current
+        self.refreshed_at = None
+        self.last_error = None
+        
+        self.feed_cache = FeedCache(
+            'defillama_solana_pools', cache_dir,
+            suffix='.parquet', reader=PoolSnapshot.load, writer=PoolSnapshot.save
+        ) if use_disk_cache else None
+        
+        self.load_disk_cache(max_age=self.DISK_CACHE_MAX_AGE)
+    
+    def load_disk_cache(self, max_age: Optional[float] = None) -> Optional[PoolSnapshot]:
+        """
+        Publish the disk copy of the pools, if there is one.
+        
+        Args:
+            max_age: Ignore copies not confirmed current within this many seconds
+        
+        Returns:
+            The loaded snapshot, or None
+        """
+        if self.feed_cache is None:
+            return None
+        
+        pools = self.feed_cache.load()
+        age = self.feed_cache.age_seconds()
+        if pools is None or age is None or (max_age is not None and age >= max_age):
+            return None
+        
+        print(f"  Loaded {len(pools)} Solana pools from disk cache ({age:.0f}s old)")
+        self._publish(pools, self.feed_cache.checked_at)
+        return pools
     
-    def fetch_all_pools(self) -> List[Dict]:
-        """Fetch all pools from DeFiLlama."""
+    def _publish(self, pools: PoolSnapshot, refreshed_at: Optional[float]):
+        """Swap in a snapshot together with its symbol index."""
+        index = self._index
+        if index is None or index['source'] is not pools:
+            # Build before publishing so readers never see a snapshot without its index
+            index = self._build_index(pools)
+        self._index = index
+        self.pools_cache = pools
+        self.refreshed_at = refreshed_at
+    
+    @staticmethod
+    def iter_pool_records(chunks: Iterable[bytes]) -> Iterator[Dict]:
+        """
+        Incrementally decode the records of a DeFiLlama `{"data": [...]}` payload.
+        
+        Only the record being decoded (plus one chunk) is buffered, so memory
+        does not grow with the size of the document.
+        
+        Args:
+            chunks: Raw response bytes in arbitrary-sized chunks
+        
+        Returns:
+            Iterator over the decoded pool records
+        """
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        chunks = iter(chunks)
+        buffer = ''
+        pos = 0
+        exhausted = False
+        
+        def read_more() -> bool:
+            nonlocal buffer, pos, exhausted
+            for chunk in chunks:
+                if chunk:
+                    # Drop everything already consumed before appending
+                    buffer = buffer[pos:] + utf8.decode(chunk)
+                    pos = 0
+                    return True
+            buffer = buffer[pos:] + utf8.decode(b'', final=True)
+            pos = 0
+            exhausted = True
+            return False
+        
+        # Skip to the opening bracket of the data array
+        while True:
+            match = PoolFetcher._DATA_ARRAY.search(buffer)
+            if match:
+                pos = match.end()
+                break
+            if exhausted:
+                raise ValueError("Pools payload has no 'data' array")
+            # Keep a short tail in case the key straddles two chunks
+            pos = max(len(buffer) - 32, 0)
+            read_more()
+        
+        while True:
+            # Skip separators between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                if not read_more() and not buffer:
+                    raise ValueError("Pools payload ended inside the data array")
+                continue
+            if buffer[pos] == ']':
+                return
+            
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Record is split across chunks
+                if exhausted:
+                    raise
+                read_more()
+                continue
+            
+            pos = end
+            yield record
+    
+    def fetch_all_pools(self) -> PoolSnapshot:
+        """
+        Fetch all Solana pools from DeFiLlama.
+        
+        The feed is parsed while it downloads; non-Solana records are
+        discarded as they arrive and the rest go straight into a columnar
+        PoolSnapshot (empty if nothing could be fetched). With the disk
+        cache, the request is conditional and a 304 reuses the cached pools;
+        if the request fails, the cached pools are returned instead.
+        """
         try:
             print("  Fetching pools from DeFiLlama...")
-            response = requests.get(self.DEFILLAMA_YIELDS_URL, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                pools = data.get('data', [])
+            headers = self.feed_cache.conditional_headers() if self.feed_cache else {}
+            with requests.get(self.DEFILLAMA_YIELDS_URL, timeout=30, stream=True, headers=headers) as response:
+                if response.status_code == 304 and self.feed_cache is not None:
+                    pools = self.pools_cache if self.pools_cache is not None else self.feed_cache.load()
+                    if pools is None:
+                        # Validators without a usable payload: fetch unconditionally
+                        self.feed_cache.clear()
+                        return self.fetch_all_pools()
+                    
+                    self.feed_cache.mark_not_modified(response.headers)
+                    print(f"  Pools not modified, using {len(pools)} cached Solana pools")
+                    self._publish(pools, time.time())
+                    self.last_error = None
+                    return pools
                 
-                # Filter Solana pools only
-                solana_pools = [
-                    p for p in pools 
-                    if p.get('chain', '').lower() == 'solana'
-                ]
+                if response.status_code != 200:
+                    print(f"  Error fetching pools: {response.status_code}")
+                    self.last_error = f"HTTP {response.status_code}"
+                    return self._cached_pools_fallback()
+            
+                solana_chain = self.SOLANA_CHAIN.lower()
+                solana_pools = PoolSnapshot.from_records(
+                    p for p in self.iter_pool_records(response.iter_content(self.STREAM_CHUNK_SIZE))
+                    if isinstance(p, dict) and (p.get('chain') or '').lower() == solana_chain
+                )
                 
-                print(f"  Found {len(solana_pools)} Solana pools")
-                self.pools_cache = solana_pools
-                return solana_pools
-            else:
-                print(f"  Error fetching pools: {response.status_code}")
-                return []
+            print(f"  Found {len(solana_pools)} Solana pools")
+            self._publish(solana_pools, time.time())
+            self.last_error = None
+            if self.feed_cache is not None:
+                self.feed_cache.store(solana_pools, response.headers)
+            return solana_pools
                 
         except Exception as e:
             print(f"  Error: {e}")
-            return []
+            self.last_error = str(e)
+            return self._cached_pools_fallback()
+    
+    def _cached_pools_fallback(self) -> PoolSnapshot:
+        """Pools to serve when a refresh fails: the in-memory snapshot, else the disk copy."""
+        if self.pools_cache is None:
+            self.load_disk_cache()
+        return self.pools_cache if self.pools_cache is not None else PoolSnapshot.empty()
+    
+    @classmethod
+    def normalize_symbol(cls, symbol: str) -> str:
+        """Canonical index key for a token symbol or variant."""
+        upper = symbol.strip().upper()
+        return cls._SYMBOL_ALIASES.get(upper, upper.lower())
+    
+    def _build_index(self, pools: PoolSnapshot) -> Dict:
+        """
+        Inverted symbol index over a pools snapshot.
+        
+        Snapshot rows are ranked by APY (descending, as returned by the
+        lookups), and each normalized token maps to the sorted row positions
+        of the pools whose symbol contains it, so filtered matches come out
+        already ranked.
+        """
+        postings = {}
+        for position, symbol in enumerate(pools.column('symbol')):
+            parts = self._SYMBOL_SEPARATORS.split(symbol or '')
+            for key in {self.normalize_symbol(part) for part in parts if part}:
+                postings.setdefault(key, []).append(position)
+        
+        return {
+            'source': pools,
+            'postings': {key: np.array(positions, dtype=np.int64) for key, positions in postings.items()}
+        }
+    
+    def _current_index(self) -> Optional[Dict]:
+        """
+        Symbol index for the current pools cache.
+        
+        The published index carries its own snapshot ('source'), so readers
+        take both from one read and never mix a snapshot with another's
+        index. Only _publish assigns the index.
+        """
+        if self.pools_cache is None and self.fetch_on_demand:
+            self.fetch_all_pools()
+        
+        index = self._index
+        if index is None:
+            pools = self.pools_cache
+            return self._build_index(pools) if pools else None
+        return index if index['source'] else None
+    
+    def _token_positions(self, index: Dict, token: str) -> np.ndarray:
+        """Sorted positions of the pools containing a token (any known variant)."""
+        keys = {self.normalize_symbol(s) for s in self.TOKEN_SYMBOLS.get(token.lower(), [token])}
+        positions = [index['postings'][key] for key in keys if key in index['postings']]
+        if not positions:
+            return np.empty(0, dtype=np.int64)
+        return positions[0] if len(positions) == 1 else np.unique(np.concatenate(positions))
+    
+    @staticmethod
+    def _filter_positions(index: Dict, positions: np.ndarray, min_tvl: float) -> np.ndarray:
+        """Positions with TVL >= min_tvl and a positive APY, still APY-ranked."""
+        pools = index['source']
+        with np.errstate(invalid='ignore'):
+            keep = (pools.tvl_usd[positions] >= min_tvl) & (pools.apy[positions] > 0)
+        return positions[keep]
     
     def find_pools_for_pair(
         self,
         token_a: str,
         token_b: str,
-        min_tvl: float = 10000
+        min_tvl: float = 10000,
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
         Find pools containing both tokens.
@@ -71,62 +319,48 @@ class PoolFetcher:
             token_a: First token symbol
             token_b: Second token symbol
             min_tvl: Minimum TVL filter (default $10k)
+            limit: Return at most this many pools (default all)
         
         Returns:
             List of matching pools sorted by APY
         """
-        if self.pools_cache is None:
-            self.fetch_all_pools()
-        
-        if not self.pools_cache:
+        index = self._current_index()
+        if index is None:
             return []
         
-        token_a = token_a.lower()
-        token_b = token_b.lower()
-        
-        # Get possible symbol variations
-        symbols_a = self.TOKEN_SYMBOLS.get(token_a, [token_a.upper()])
-        symbols_b = self.TOKEN_SYMBOLS.get(token_b, [token_b.upper()])
+        positions = self._filter_positions(index, self._pair_positions(index, token_a, token_b), min_tvl)
+        return self._format_pools(index['source'], positions if limit is None else positions[:limit])
+    
+    def _pair_positions(self, index: Dict, token_a: str, token_b: str) -> np.ndarray:
+        """Sorted positions of the pools whose symbol contains both tokens."""
+        return np.intersect1d(
+            self._token_positions(index, token_a),
+            self._token_positions(index, token_b),
+            assume_unique=True
+        )
         
-        matching_pools = []
+    def _format_pools(self, snapshot: PoolSnapshot, positions: np.ndarray) -> List[Dict]:
+        """Pool dicts (as returned by the lookups) for the given snapshot rows."""
+        pools = snapshot.select(positions)
         
-        for pool in self.pools_cache:
-            symbol = pool.get('symbol', '')
-            tvl = pool.get('tvlUsd', 0)
-            apy = pool.get('apy', 0)
-            
-            # Skip low TVL pools
-            if tvl < min_tvl:
-                continue
-            
-            # Skip if no APY data
-            if apy is None or apy <= 0:
-                continue
-            
-            # Check if pool contains both tokens
-            symbol_upper = symbol.upper()
-            
-            has_a = any(s.upper() in symbol_upper for s in symbols_a)
-            has_b = any(s.upper() in symbol_upper for s in symbols_b)
-            
-            if has_a and has_b:
-                matching_pools.append({
-                    'pool_id': pool.get('pool', ''),
-                    'symbol': symbol,
-                    'project': pool.get('project', 'Unknown'),
-                    'chain': pool.get('chain', ''),
-                    'apy': round(apy, 2),
-                    'apy_base': round(pool.get('apyBase', 0) or 0, 2),
-                    'apy_reward': round(pool.get('apyReward', 0) or 0, 2),
-                    'tvl_usd': round(tvl, 0),
-                    'il_risk': pool.get('ilRisk', 'unknown'),
-                    'exposure': pool.get('exposure', 'unknown')
-                })
-        
-        # Sort by APY descending
-        matching_pools.sort(key=lambda x: x['apy'], reverse=True)
-        
-        return matching_pools
+        return [
+            {
+                'pool_id': pool_id or '',
+                'symbol': symbol or '',
+                'project': project or 'Unknown',
+                'chain': self.SOLANA_CHAIN,
+                'apy': round(apy, 2),
+                'apy_base': round(apy_base or 0, 2),
+                'apy_reward': round(apy_reward or 0, 2),
+                'tvl_usd': round(tvl, 0),
+                'il_risk': il_risk or 'unknown',
+                'exposure': exposure or 'unknown'
+            }
+            for pool_id, symbol, project, apy, apy_base, apy_reward, tvl, il_risk, exposure in zip(
+                pools['pool_id'], pools['symbol'], pools['project'], pools['apy'], pools['apy_base'],
+                pools['apy_reward'], pools['tvl_usd'], pools['il_risk'], pools['exposure']
+            )
+        ]
     
     def get_best_pool(
         self,
@@ -145,7 +379,7 @@ class PoolFetcher:
         Returns:
             Best pool or None
         """
-        pools = self.find_pools_for_pair(token_a, token_b, min_tvl)
+        pools = self.find_pools_for_pair(token_a, token_b, min_tvl, limit=1)
         
         if not pools:
             return None
@@ -171,6 +405,96 @@ class PoolFetcher:
         
         return None, None
     
+    @staticmethod
+    def encode_cursor(value: float, pool_id: str) -> str:
+        """Opaque pagination cursor for the last row of a page."""
+        return base64.urlsafe_b64encode(json.dumps([value, pool_id]).encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, str]:
+        """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+        try:
+            value, pool_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(value), str(pool_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    def query_pools(
+        self,
+        token: Optional[str] = None,
+        token_b: Optional[str] = None,
+        sort_by: str = 'apy',
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        min_tvl: float = 10000,
+        project: Optional[str] = None,
+        exposure: Optional[str] = None
+    ) -> Dict:
+        """
+        Ranked, paginated pool query.
+        
+        Only the requested page is sorted (top-K partial selection) and
+        materialized. Pages are keyset-paginated on (metric, pool_id), so a
+        cursor stays valid across snapshot refreshes.
+        
+        Args:
+            token: Only pools containing this token
+            token_b: With token, only pools containing both tokens
+            sort_by: Ranking metric: 'apy', 'tvl_usd' or 'risk_adjusted_apy'
+            limit: Page size
+            cursor: next_cursor of the previous page
+            min_tvl: Minimum TVL filter (default $10k)
+            project: Only pools of this project (e.g., 'orca-dex')
+            exposure: Only pools with this exposure ('single' / 'multi')
+        
+        Returns:
+            Dict with the page of pools (highest first), total matches and
+            next_cursor (None on the last page)
+        """
+        if sort_by not in PoolSnapshot.METRICS:
+            raise ValueError(f"Unknown sort metric '{sort_by}'. Use one of {list(PoolSnapshot.METRICS)}")
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        if token_b and not token:
+            raise ValueError("token_b requires token")
+        after = self.decode_cursor(cursor) if cursor else None
+        
+        index = self._current_index()
+        if index is None:
+            return {'pools': [], 'total': 0, 'sort_by': sort_by, 'next_cursor': None}
+        snapshot = index['source']
+        
+        if token and token_b:
+            positions = self._pair_positions(index, token, token_b)
+        elif token:
+            positions = self._token_positions(index, token)
+        else:
+            positions = np.arange(len(snapshot), dtype=np.int64)
+        
+        positions = self._filter_positions(index, positions, min_tvl)
+        if project:
+            positions = positions[snapshot.category_mask('project', project)[positions]]
+        if exposure:
+            positions = positions[snapshot.category_mask('exposure', exposure)[positions]]
+        total = len(positions)
+        
+        page, remaining = snapshot.top_k(positions, sort_by, limit, after=after)
+        pools = self._format_pools(snapshot, page)
+        for pool, adjusted in zip(pools, snapshot.risk_adjusted_apy[page].tolist()):
+            pool['risk_adjusted_apy'] = round(adjusted, 2)
+        
+        next_cursor = None
+        if remaining > len(page) and len(page):
+            last = page[-1]
+            next_cursor = self.encode_cursor(float(getattr(snapshot, sort_by)[last]), pools[-1]['pool_id'])
+        
+        return {
+            'pools': pools,
+            'total': total,
+            'sort_by': sort_by,
+            'next_cursor': next_cursor
+        }
+    
     def list_available_pairs(self, token: str, min_tvl: float = 10000) -> List[Dict]:
         """
         List all available pairs for a token.
@@ -181,45 +505,34 @@ class PoolFetcher:
         Returns:
             List of pools containing this token
         """
-        if self.pools_cache is None:
-            self.fetch_all_pools()
-        
-        if not self.pools_cache:
+        index = self._current_index()
+        if index is None:
             return []
         
-        token = token.lower()
-        symbols = self.TOKEN_SYMBOLS.get(token, [token.upper()])
+        positions = self._filter_positions(index, self._token_positions(index, token), min_tvl)
         
-        matching = []
+        pools = index['source'].select(positions[:20])  # Top 20
         
-        for pool in self.pools_cache:
-            symbol = pool.get('symbol', '')
-            tvl = pool.get('tvlUsd', 0)
-            apy = pool.get('apy', 0)
-            
-            if tvl < min_tvl or not apy or apy <= 0:
-                continue
-            
-            symbol_upper = symbol.upper()
-            
-            if any(s.upper() in symbol_upper for s in symbols):
-                matching.append({
-                    'symbol': symbol,
-                    'project': pool.get('project', 'Unknown'),
-                    'apy': round(apy, 2),
-                    'tvl_usd': round(tvl, 0)
-                })
-        
-        matching.sort(key=lambda x: x['apy'], reverse=True)
-        return matching[:20]  # Top 20
+        return [
+            {
+                'symbol': symbol or '',
+                'project': project or 'Unknown',
+                'apy': round(apy, 2),
+                'tvl_usd': round(tvl, 0)
+            }
+            for symbol, project, apy, tvl in zip(pools['symbol'], pools['project'], pools['apy'], pools['tvl_usd'])
+        ]
 
 
 def fetch_pool_apy(token_a: str, token_b: str) -> Tuple[Optional[float], Optional[Dict]]:
     """
     Convenience function to fetch APY for a token pair.
+    
+    Reads the process-wide PoolService snapshot (never downloads on the
+    call path); returns (None, None) until the first snapshot is available.
     """
-    fetcher = PoolFetcher()
-    return fetcher.get_pool_apy(token_a, token_b)
+    from .pool_service import get_pool_service
+    return get_pool_service().get_pool_apy(token_a, token_b)
 
 
 if __name__ == "__main__":
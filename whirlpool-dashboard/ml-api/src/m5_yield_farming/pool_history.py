@@ -0,0 +1,350 @@
+"""
+Pool History
+============
+Daily APY / TVL time series per pool, built from live pool snapshots.
+
+Every pool refresh is folded into a (pools x days) matrix on a contiguous
+daily calendar: intraday refreshes are downsampled into one value per pool
+per day (mean APY, last TVL). Rolling features used by the LSTM
+(`tvl_change_7d`, `apy_cv`) are recomputed for all pools after each refresh,
+so lookups are O(1). The history is persisted as a long-format Parquet table.
+"""
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from .feed_cache import FeedCache
+from .pool_snapshot import PoolSnapshot
+
+
+class PoolHistoryStore:
+    """
+    Per-pool daily APY / TVL history with incrementally updated features.
+    
+    Features match the offline `_aligned.parquet` columns: `tvl_change_7d`
+    is the fractional TVL change over 7 days, `apy_cv` the coefficient of
+    variation (sample std / mean) of daily APY over the last 30 days.
+    """
+    
+    # Days of history kept
+    RETENTION_DAYS = 90
+    
+    # Lag of the TVL change feature
+    TVL_CHANGE_DAYS = 7
+    
+    # Window of the APY coefficient of variation
+    APY_CV_WINDOW = 30
+    
+    # Minimum daily APY observations before apy_cv is reported
+    MIN_APY_CV_DAYS = 7
+    
+    EPOCH = date(1970, 1, 1)
+    
+    DEFAULT_PATH = os.path.join(FeedCache.DEFAULT_CACHE_DIR, "pool_history.parquet")
+    
+    SCHEMA = pa.schema([
+        ('date', pa.date32()),
+        ('pool_id', pa.dictionary(pa.int32(), pa.string())),
+        ('tvl_usd', pa.float64()),
+        ('apy', pa.float64()),
+        ('samples', pa.int32())
+    ])
+    
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, retention_days: int = RETENTION_DAYS):
+        """
+        Initialize the store, loading the persisted history if present.
+        
+        Args:
+            path: Parquet file for the history (None keeps it in memory only)
+            retention_days: Days of history kept
+        """
+        if retention_days <= self.TVL_CHANGE_DAYS:
+            raise ValueError(f"retention_days must exceed {self.TVL_CHANGE_DAYS}")
+        
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._reset()
+        
+        if path is not None:
+            self.load()
+    
+    def _reset(self):
+        self.pool_ids = []
+        self._rows = {}
+        self.start_day = None
+        self.tvl = np.empty((0, 0))
+        self.apy = np.empty((0, 0))
+        self.samples = np.empty((0, 0), dtype=np.int32)
+        self._features = None
+    
+    @property
+    def num_days(self) -> int:
+        return self.tvl.shape[1]
+    
+    def _ensure_rows(self, pool_ids) -> np.ndarray:
+        """Matrix rows for pool ids, adding rows for unseen pools."""
+        rows = np.empty(len(pool_ids), dtype=np.int64)
+        added = 0
+        for k, pool_id in enumerate(pool_ids):
+            row = self._rows.get(pool_id)
+            if row is None:
+                row = self._rows[pool_id] = len(self.pool_ids)
+                self.pool_ids.append(pool_id)
+                added += 1
+            rows[k] = row
+        
+        if added:
+            days = self.num_days
+            self.tvl = np.vstack([self.tvl, np.full((added, days), np.nan)])
+            self.apy = np.vstack([self.apy, np.full((added, days), np.nan)])
+            self.samples = np.vstack([self.samples, np.zeros((added, days), dtype=np.int32)])
+        return rows
+    
+    def _ensure_day(self, day: date) -> int:
+        """Column for a day, extending the calendar and dropping expired days."""
+        if self.start_day is None:
+            self.start_day = day
+        
+        column = (day - self.start_day).days
+        if column < 0:
+            raise ValueError(f"Cannot record {day}: history starts at {self.start_day}")
+        
+        if column >= self.num_days:
+            extra = column + 1 - self.num_days
+            pools = len(self.pool_ids)
+            self.tvl = np.hstack([self.tvl, np.full((pools, extra), np.nan)])
+            self.apy = np.hstack([self.apy, np.full((pools, extra), np.nan)])
+            self.samples = np.hstack([self.samples, np.zeros((pools, extra), dtype=np.int32)])
+        
+        expired = self.num_days - self.retention_days
+        if expired > 0:
+            self.tvl = self.tvl[:, expired:]
+            self.apy = self.apy[:, expired:]
+            self.samples = self.samples[:, expired:]
+            self.start_day += timedelta(days=int(expired))
+            column -= expired
+            self._drop_empty_pools()
+        return column
+    
+    def _drop_empty_pools(self):
+        """Forget pools with no observation left in the retention window."""
+        keep = self.samples.sum(axis=1) > 0
+        if keep.all():
+            return
+        self.pool_ids = [pool_id for pool_id, kept in zip(self.pool_ids, keep) if kept]
+        self._rows = {pool_id: row for row, pool_id in enumerate(self.pool_ids)}
+        self.tvl, self.apy, self.samples = self.tvl[keep], self.apy[keep], self.samples[keep]
+    
+    def record(self, snapshot: PoolSnapshot, timestamp: Optional[float] = None):
+        """
+        Fold one pool snapshot into the daily history.
+        
+        Args:
+            snapshot: Pools snapshot from a refresh
+            timestamp: Snapshot time in epoch seconds (defaults to now)
+        """
+        if len(snapshot) == 0:
+            return
+        
+        day = datetime.fromtimestamp(time.time() if timestamp is None else timestamp).date()
+        pool_ids = snapshot.column('pool_id')
+        known = np.array([pool_id is not None for pool_id in pool_ids])
+        
+        with self._lock:
+            # Trim expired days (and pools) before resolving rows
+            column = self._ensure_day(day)
+            rows = self._ensure_rows([pool_id for pool_id in pool_ids if pool_id is not None])
+            
+            apy = snapshot.apy[known]
+            tvl = snapshot.tvl_usd[known]
+            
+            # Running mean of the day's APY samples
+            has_apy = np.isfinite(apy)
+            apy_rows = rows[has_apy]
+            n = self.samples[apy_rows, column]
+            previous = np.nan_to_num(self.apy[apy_rows, column])
+            self.apy[apy_rows, column] = (previous * n + apy[has_apy]) / (n + 1)
+            self.samples[apy_rows, column] = n + 1
+            
+            # Last TVL of the day
+            has_tvl = np.isfinite(tvl)
+            self.tvl[rows[has_tvl], column] = tvl[has_tvl]
+            
+            self._features = self._compute_features()
+        
+        if self.path is not None:
+            self.save()
+    
+    def _compute_features(self) -> Dict:
+        """Latest tvl_change_7d and apy_cv for every pool (NaN where not enough data)."""
+        pools = len(self.pool_ids)
+        tvl_change = np.full(pools, np.nan)
+        if self.num_days > self.TVL_CHANGE_DAYS:
+            current = self.tvl[:, -1]
+            past = self.tvl[:, -1 - self.TVL_CHANGE_DAYS]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tvl_change = np.where(past > 0, current / past - 1, np.nan)
+        
+        window = self.apy[:, -self.APY_CV_WINDOW:]
+        observed = np.isfinite(window).sum(axis=1)
+        apy_cv = np.full(pools, np.nan)
+        enough = observed >= self.MIN_APY_CV_DAYS
+        if enough.any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = np.nanmean(window[enough], axis=1)
+                std = np.nanstd(window[enough], axis=1, ddof=1)
+                apy_cv[enough] = np.where(mean > 0, std / mean, np.nan)
+        
+        return {
+            'rows': dict(self._rows),
+            'tvl_change_7d': tvl_change,
+            'apy_cv': apy_cv,
+            'days_observed': (self.samples > 0).sum(axis=1)
+        }
+    
+    def features(self, pool_id: str) -> Optional[Dict]:
+        """
+        Latest LSTM features for one pool.
+        
+        Args:
+            pool_id: DeFiLlama pool id
+        
+        Returns:
+            Dict with tvl_change_7d and apy_cv (None where there is not
+            enough history yet) and days observed, or None for unknown pools
+        """
+        state = self._features
+        if state is None:
+            return None
+        row = state['rows'].get(pool_id)
+        if row is None:
+            return None
+        
+        def value(name: str) -> Optional[float]:
+            v = state[name][row]
+            return float(v) if np.isfinite(v) else None
+        
+        return {
+            'tvl_change_7d': value('tvl_change_7d'),
+            'apy_cv': value('apy_cv'),
+            'days_observed': int(state['days_observed'][row])
+        }
+    
+    def series(self, pool_id: str) -> pd.DataFrame:
+        """Daily history of one pool (date, tvl_usd, apy)."""
+        with self._lock:
+            row = self._rows.get(pool_id)
+            if row is None:
+                return pd.DataFrame(columns=['date', 'tvl_usd', 'apy'])
+            dates = [self.start_day + timedelta(days=k) for k in range(self.num_days)]
+            df = pd.DataFrame({'date': dates, 'tvl_usd': self.tvl[row], 'apy': self.apy[row]})
+        return df[self.samples[row] > 0].reset_index(drop=True) if len(df) else df
+    
+    def status(self) -> Dict:
+        """Pools tracked and calendar covered."""
+        return {
+            'pools': len(self.pool_ids),
+            'days': self.num_days,
+            'start_date': str(self.start_day) if self.start_day else None,
+            'end_date': str(self.start_day + timedelta(days=self.num_days - 1)) if self.num_days else None
+        }
+    
+    def save(self):
+        """Write the observed cells as a long-format Parquet table."""
+        with self._lock:
+            pools, days = np.nonzero((self.samples > 0) | np.isfinite(self.tvl))
+            first_day = (self.start_day - self.EPOCH).days if self.start_day else 0
+            table = pa.table({
+                'date': pa.array((days + first_day).astype(np.int32)).cast(pa.date32()),
+                'pool_id': pa.DictionaryArray.from_arrays(
+                    pa.array(pools.astype(np.int32)), pa.array(self.pool_ids, type=pa.string())
+                ),
+                'tvl_usd': pa.array(self.tvl[pools, days], from_pandas=True),
+                'apy': pa.array(self.apy[pools, days], from_pandas=True),
+                'samples': pa.array(self.samples[pools, days], type=pa.int32())
+            })
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, self.path)
+    
+    def load(self) -> bool:
+        """
+        Load the persisted history.
+        
+        Returns:
+            True if a history file was loaded
+        """
+        try:
+            table = pq.read_table(self.path, schema=self.SCHEMA)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"  Warning: ignoring unreadable pool history: {e}")
+            return False
+        
+        with self._lock:
+            self._reset()
+            if table.num_rows:
+                ordinals = table.column('date').cast(pa.int32()).to_numpy()
+                self.start_day = self.EPOCH + timedelta(days=int(ordinals.min()))
+                self._ensure_day(self.EPOCH + timedelta(days=int(ordinals.max())))
+                
+                # Rows older than the retention window are dropped
+                columns = ordinals - (self.start_day - self.EPOCH).days
+                kept = columns >= 0
+                columns = columns[kept]
+                
+                # Resolve each distinct pool id once, then map the dictionary codes
+                pool_ids = table.column('pool_id').combine_chunks()
+                codes = pool_ids.indices.to_numpy()[kept]
+                used = np.unique(codes)
+                rows = np.full(len(pool_ids.dictionary), -1, dtype=np.int64)
+                rows[used] = self._ensure_rows(pool_ids.dictionary.take(pa.array(used)).to_pylist())
+                rows = rows[codes]
+                
+                self.tvl[rows, columns] = table.column('tvl_usd').to_numpy()[kept]
+                self.apy[rows, columns] = table.column('apy').to_numpy()[kept]
+                self.samples[rows, columns] = table.column('samples').to_numpy()[kept]
+                self._features = self._compute_features()
+        return True
+
+
+if __name__ == "__main__":
+    import tempfile
+    
+    print("=" * 60)
+    print("  POOL HISTORY TEST")
+    print("=" * 60)
+    
+    rng = np.random.default_rng(7)
+    start = time.time() - 40 * 86400
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PoolHistoryStore(os.path.join(tmp, 'pool_history.parquet'))
+        
+        # 40 days of 4 refreshes a day for two pools
+        for step in range(40 * 4):
+            day = step // 4
+            snapshot = PoolSnapshot.from_records([
+                {'pool': 'sol-usdc', 'symbol': 'SOL-USDC', 'apy': 30 + 10 * np.sin(day / 5) + rng.normal(0, 1),
+                 'tvlUsd': 1e6 * (1 + 0.01 * day)},
+                {'pool': 'jup-sol', 'symbol': 'JUP-SOL', 'apy': 60 + rng.normal(0, 15), 'tvlUsd': 4e5}
+            ])
+            store.record(snapshot, timestamp=start + step * 6 * 3600)
+        
+        print(f"\n[Store] {store.status()}")
+        for pool_id in ('sol-usdc', 'jup-sol'):
+            print(f"  {pool_id}: {store.features(pool_id)}")
+        
+        restored = PoolHistoryStore(store.path)
+        print(f"\n[Reloaded] {restored.status()}")
+        print(f"  sol-usdc: {restored.features('sol-usdc')}")
@@ -0,0 +1,269 @@
+"""
+Pool Service
+============
+Long-lived, process-wide pool data with a TTL background refresh.
+
+A single PoolFetcher is refreshed on a background thread; each refresh
+builds the new snapshot and its symbol index off the request path and swaps
+them in atomically. Lookups only read the current snapshot, never download,
+and report how old the data is. Each refresh is also folded into the daily
+pool history that serves live LSTM features.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .pool_fetcher import PoolFetcher
+from .pool_history import PoolHistoryStore
+
+
+class PoolService:
+    """
+    Pool lookups backed by a background-refreshed snapshot.
+    
+    Readers never block on a refresh: they keep using the previous snapshot
+    until the new one is published. Until the first snapshot exists (no disk
+    cache and the first refresh still running) lookups return nothing.
+    """
+    
+    # Seconds before a snapshot is refreshed (DeFiLlama updates about hourly)
+    DEFAULT_TTL = 900
+    
+    # Seconds between retries after a failed refresh
+    RETRY_INTERVAL = 60
+    
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        fetcher: Optional[PoolFetcher] = None,
+        retry_interval: float = RETRY_INTERVAL,
+        history: Optional[PoolHistoryStore] = None
+    ):
+        """
+        Initialize the service and publish the disk copy of the pools, if any.
+        
+        Args:
+            ttl: Seconds before the pools are refreshed
+            fetcher: PoolFetcher to refresh (a new one by default)
+            retry_interval: Seconds between retries after a failed refresh
+            history: Daily pool history fed by each refresh (a new one by default)
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.fetcher = fetcher or PoolFetcher()
+        self.fetcher.fetch_on_demand = False
+        self.history = history if history is not None else PoolHistoryStore()
+        
+        # A stale disk copy is still better than no data; its age is reported
+        if self.fetcher.pools_cache is None:
+            self.fetcher.load_disk_cache()
+        
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_attempt = None
+        self._refreshing = False
+    
+    def start(self):
+        """Start the background refresh thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pool-service-refresh', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.seconds_until_refresh()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            self.refresh()
+    
+    def seconds_until_refresh(self) -> float:
+        """Seconds until the next background refresh is due (0 if due now)."""
+        now = time.time()
+        due = now
+        
+        refreshed_at = self.fetcher.refreshed_at
+        if refreshed_at is not None:
+            due = refreshed_at + self.ttl
+        
+        # Back off after a failed attempt
+        if self._last_attempt is not None and (refreshed_at is None or self._last_attempt > refreshed_at):
+            due = max(due, self._last_attempt + self.retry_interval)
+        
+        return max(due - now, 0.0)
+    
+    def refresh(self) -> bool:
+        """
+        Refresh the pools now (conditional GET; a 304 only updates the age).
+        
+        Returns:
+            True if the pools were confirmed current
+        """
+        with self._refresh_lock:
+            self._refreshing = True
+            self._last_attempt = time.time()
+            try:
+                before = self.fetcher.refreshed_at
+                pools = self.fetcher.fetch_all_pools()
+                refreshed = self.fetcher.refreshed_at is not None and self.fetcher.refreshed_at != before
+            finally:
+                self._refreshing = False
+            
+            if refreshed:
+                try:
+                    self.history.record(pools, self.fetcher.refreshed_at)
+                except Exception as e:
+                    print(f"  Warning: pool history not updated: {e}")
+            return refreshed
+    
+    def wait_until_ready(self, timeout: float) -> bool:
+        """Block until a snapshot is available (for scripts, not request paths)."""
+        deadline = time.time() + timeout
+        while self.fetcher.pools_cache is None and time.time() < deadline:
+            time.sleep(0.05)
+        return self.fetcher.pools_cache is not None
+    
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the pools were last confirmed current, or None if no data."""
+        refreshed_at = self.fetcher.refreshed_at
+        return None if refreshed_at is None else time.time() - refreshed_at
+    
+    def status(self) -> Dict:
+        """Snapshot size, age and refresh state."""
+        age = self.age_seconds()
+        pools = self.fetcher.pools_cache
+        return {
+            'pools': len(pools) if pools is not None else 0,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'stale': age is None or age > self.ttl,
+            'ttl_seconds': self.ttl,
+            'refreshing': self._refreshing,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_error': self.fetcher.last_error,
+            'history': self.history.status()
+        }
+    
+    def _with_age(self, pool: Optional[Dict]) -> Optional[Dict]:
+        if pool is None:
+            return None
+        age = self.age_seconds()
+        return {
+            **pool,
+            'data_age_seconds': round(age, 1) if age is not None else None,
+            'stale': age is None or age > self.ttl
+        }
+    
+    def find_pools_for_pair(self, token_a: str, token_b: str, min_tvl: float = 10000) -> List[Dict]:
+        """Pools containing both tokens, sorted by APY (see PoolFetcher)."""
+        return self.fetcher.find_pools_for_pair(token_a, token_b, min_tvl)
+    
+    def list_available_pairs(self, token: str, min_tvl: float = 10000) -> List[Dict]:
+        """Top pools containing a token, sorted by APY (see PoolFetcher)."""
+        return self.fetcher.list_available_pairs(token, min_tvl)
+    
+    def query_pools(self, **query) -> Dict:
+        """Ranked, paginated pool query (see PoolFetcher.query_pools), with the data age."""
+        result = self.fetcher.query_pools(**query)
+        age = self.age_seconds()
+        result['data_age_seconds'] = round(age, 1) if age is not None else None
+        result['stale'] = age is None or age > self.ttl
+        return result
+    
+    def get_best_pool(self, token_a: str, token_b: str, min_tvl: float = 50000) -> Optional[Dict]:
+        """Highest-APY pool for a pair, with the data age."""
+        return self._with_age(self.fetcher.get_best_pool(token_a, token_b, min_tvl))
+    
+    def get_pool_apy(
+        self,
+        token_a: str,
+        token_b: str,
+        min_tvl: float = 50000
+    ) -> Tuple[Optional[float], Optional[Dict]]:
+        """
+        Get the APY for a token pair.
+        
+        Returns:
+            Tuple of (apy, pool_info with data age) or (None, None)
+        """
+        pool = self.get_best_pool(token_a, token_b, min_tvl)
+        if pool:
+            return pool['apy'], pool
+        return None, None
+
+    def token_features(self, token: str) -> Optional[Dict]:
+        """
+        Live LSTM pool features for a token, from its deepest pool's history.
+        
+        Args:
+            token: Token symbol (e.g., 'SOL')
+        
+        Returns:
+            Dict with tvl_change_7d, apy_cv (None until enough history),
+            days_observed, pool_id and symbol, or None if no pool is known
+        """
+        try:
+            result = self.fetcher.query_pools(token=token, sort_by='tvl_usd', limit=1, min_tvl=0)
+        except ValueError:
+            return None
+        if not result['pools']:
+            return None
+        
+        pool = result['pools'][0]
+        features = self.history.features(pool['pool_id'])
+        if features is None:
+            return None
+        return {**features, 'pool_id': pool['pool_id'], 'symbol': pool['symbol']}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_pool_service(ttl: Optional[float] = None) -> PoolService:
+    """
+    Process-wide PoolService, created and started on first use.
+    
+    Args:
+        ttl: Refresh TTL in seconds (only used when the service is created)
+    
+    Returns:
+        Running PoolService
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PoolService(ttl=ttl or PoolService.DEFAULT_TTL)
+            _service.start()
+        return _service
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  POOL SERVICE TEST")
+    print("=" * 60)
+    
+    service = get_pool_service()
+    print(f"\n[Status] {service.status()}")
+    
+    if service.wait_until_ready(timeout=60):
+        apy, pool = service.get_pool_apy('sol', 'usdc')
+        print(f"\n[SOL/USDC] APY: {apy}  ({pool['project'] if pool else 'no pool'})")
+        print(f"  Status: {service.status()}")
+    else:
+        print("  No pool data yet")
+    
+    service.stop()
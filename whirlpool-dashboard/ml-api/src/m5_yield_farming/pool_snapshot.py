@@ -0,0 +1,294 @@
+"""
+Pool Snapshot
+=============
+Columnar snapshot of the Solana pools feed.
+
+Pools are held as one typed Arrow table instead of thousands of dicts:
+numeric columns are exposed as numpy arrays for vectorized filtering, and
+string columns are only materialized for the rows a query returns. The
+snapshot is persisted as Parquet so a restart can load it directly.
+
+Ranked queries use partial selection (top-K) with keyset pagination, so a
+page costs O(matches) instead of a full sort.
+"""
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PoolSnapshot:
+    """
+    Immutable columnar table of pools, ranked by APY (descending).
+    
+    Row positions are stable for the lifetime of the snapshot, so indexes
+    built over one snapshot can address its rows directly.
+    """
+    
+    # Typed schema of the snapshot table
+    SCHEMA = pa.schema([
+        ('pool_id', pa.string()),
+        ('symbol', pa.string()),
+        ('project', pa.dictionary(pa.int32(), pa.string())),
+        ('apy', pa.float64()),
+        ('apy_base', pa.float64()),
+        ('apy_reward', pa.float64()),
+        ('tvl_usd', pa.float64()),
+        ('il_risk', pa.dictionary(pa.int32(), pa.string())),
+        ('exposure', pa.dictionary(pa.int32(), pa.string()))
+    ])
+    
+    # Snapshot column -> DeFiLlama record field
+    FEED_FIELDS = {
+        'pool_id': 'pool',
+        'symbol': 'symbol',
+        'project': 'project',
+        'apy': 'apy',
+        'apy_base': 'apyBase',
+        'apy_reward': 'apyReward',
+        'tvl_usd': 'tvlUsd',
+        'il_risk': 'ilRisk',
+        'exposure': 'exposure'
+    }
+    
+    NUMERIC_COLUMNS = ('apy', 'apy_base', 'apy_reward', 'tvl_usd')
+    
+    CATEGORY_COLUMNS = ('project', 'il_risk', 'exposure')
+    
+    # Metrics pools can be ranked by
+    METRICS = ('apy', 'tvl_usd', 'risk_adjusted_apy')
+    
+    # Risk-adjusted APY: reward emissions count at this weight (paid in
+    # volatile tokens and decaying) and pools flagged for IL are discounted
+    REWARD_APY_WEIGHT = 0.5
+    IL_RISK_DISCOUNT = 0.25
+    
+    def __init__(self, table: pa.Table):
+        """
+        Wrap a table that already follows SCHEMA and APY ranking.
+        
+        Args:
+            table: Pools table (use from_records / load to build one)
+        """
+        self.table = table
+        
+        # numpy arrays of the numeric columns (NaN where missing)
+        for column in self.NUMERIC_COLUMNS:
+            setattr(self, column, table.column(column).to_numpy())
+        
+        # Low-cardinality columns as integer codes (-1 where missing) + categories
+        self._categories = {}
+        for column in self.CATEGORY_COLUMNS:
+            encoded = table.column(column).combine_chunks()
+            if isinstance(encoded, pa.ChunkedArray):
+                # Empty table: no chunks to combine
+                encoded = pa.array([], type=self.SCHEMA.field(column).type)
+            codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+            self._categories[column] = (codes.astype(np.int32), encoded.dictionary.to_pylist() + [None])
+        
+        self.risk_adjusted_apy = self._risk_adjusted_apy()
+    
+    def _risk_adjusted_apy(self) -> np.ndarray:
+        """Base APY plus weighted reward APY, discounted where ilRisk is 'yes'."""
+        reward = np.nan_to_num(self.apy_reward)
+        base = np.where(np.isnan(self.apy_base), self.apy - reward, self.apy_base)
+        adjusted = base + self.REWARD_APY_WEIGHT * reward
+        return np.where(self.category_mask('il_risk', 'yes'), adjusted * (1 - self.IL_RISK_DISCOUNT), adjusted)
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'PoolSnapshot':
+        """
+        Build a snapshot from DeFiLlama pool records.
+        
+        Records are consumed one at a time straight into column lists, so
+        a streamed feed never materializes as a list of dicts.
+        
+        Args:
+            records: Pool records with DeFiLlama field names
+        
+        Returns:
+            PoolSnapshot ranked by APY (rounded to 2 dp, descending)
+        """
+        columns = {column: [] for column in cls.FEED_FIELDS}
+        for record in records:
+            for column, field in cls.FEED_FIELDS.items():
+                columns[column].append(record.get(field))
+        
+        arrays = {}
+        for column in cls.NUMERIC_COLUMNS:
+            arrays[column] = np.array(
+                [np.nan if v is None else v for v in columns[column]], dtype=np.float64
+            )
+        
+        # Stable sort on the rounded APY keeps feed order among ties
+        rounded_apy = np.round(np.nan_to_num(arrays['apy']), 2)
+        order = np.argsort(-rounded_apy, kind='stable')
+        
+        table = pa.table({
+            column: (
+                pa.array(arrays[column][order], from_pandas=True)
+                if column in arrays else
+                pa.array([columns[column][k] for k in order], type=pa.string())
+            )
+            for column in cls.FEED_FIELDS
+        })
+        return cls(table.cast(cls.SCHEMA))
+    
+    @classmethod
+    def empty(cls) -> 'PoolSnapshot':
+        """Snapshot with no pools."""
+        return cls(cls.SCHEMA.empty_table())
+    
+    @classmethod
+    def load(cls, path: str) -> 'PoolSnapshot':
+        """Read a snapshot written by save()."""
+        return cls(pq.read_table(path, schema=cls.SCHEMA))
+    
+    def save(self, path: str):
+        """Write the snapshot as Parquet."""
+        pq.write_table(self.table, path, compression='zstd')
+    
+    def __len__(self) -> int:
+        return self.table.num_rows
+    
+    def column(self, name: str) -> List[Optional[str]]:
+        """One column as a Python list (e.g., symbols for indexing)."""
+        return self.table.column(name).to_pylist()
+    
+    def category_mask(self, column: str, value: str) -> np.ndarray:
+        """Rows whose category column equals value (case-insensitive)."""
+        codes, categories = self._categories[column]
+        matches = [code for code, category in enumerate(categories[:-1]) if category.lower() == value.lower()]
+        return np.isin(codes, matches)
+    
+    def top_k(
+        self,
+        positions: np.ndarray,
+        metric: str,
+        k: int,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Highest-ranked rows among candidates, by metric then pool_id.
+        
+        Uses partial selection, so only the page itself is sorted.
+        
+        Args:
+            positions: Candidate row positions
+            metric: One of METRICS
+            k: Page size
+            after: Keyset cursor (metric value, pool_id) of the last row of
+                the previous page; only rows ranked after it are returned
+        
+        Returns:
+            Tuple of (page row positions in rank order, rows remaining from
+            the start of the page, including the page itself)
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Use one of {list(self.METRICS)}")
+        if k <= 0:
+            raise ValueError("k must be positive")
+        
+        positions = np.asarray(positions, dtype=np.int64)
+        values = getattr(self, metric)[positions]
+        
+        # Rows without the metric are not ranked
+        ranked = np.isfinite(values)
+        positions, values = positions[ranked], values[ranked]
+        
+        if after is not None:
+            last_value, last_id = after
+            keep = values < last_value
+            ties = np.flatnonzero(values == last_value)
+            if len(ties):
+                tie_ids = self.table.column('pool_id').take(pa.array(positions[ties])).to_pylist()
+                keep[ties[[(pool_id or '') > last_id for pool_id in tie_ids]]] = True
+            positions, values = positions[keep], values[keep]
+        
+        remaining = len(positions)
+        if remaining > k:
+            # Everything at or above the k-th largest value (ties at the boundary included)
+            kth = np.partition(values, remaining - k)[remaining - k]
+            top = values >= kth
+            positions, values = positions[top], values[top]
+        
+        pool_ids = self.table.column('pool_id').take(pa.array(positions)).to_pylist()
+        order = sorted(range(len(positions)), key=lambda i: (-values[i], pool_ids[i] or ''))[:k]
+        return positions[order], remaining
+    
+    def liquid_mask(self, min_tvl: float) -> np.ndarray:
+        """Rows with TVL >= min_tvl and a positive APY."""
+        with np.errstate(invalid='ignore'):
+            return (self.tvl_usd >= min_tvl) & (self.apy > 0)
+    
+    def select(self, positions: np.ndarray) -> Dict[str, List]:
+        """
+        Materialize selected rows column by column.
+        
+        Args:
+            positions: Row positions to return, in order
+        
+        Returns:
+            Dict of snapshot column -> list of Python values (None where missing)
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        indices = pa.array(positions)
+        columns = {
+            'pool_id': self.table.column('pool_id').take(indices).to_pylist(),
+            'symbol': self.table.column('symbol').take(indices).to_pylist()
+        }
+        for column, (codes, categories) in self._categories.items():
+            columns[column] = [categories[code] for code in codes[positions]]
+        for column in self.NUMERIC_COLUMNS:
+            values = getattr(self, column)[positions]
+            columns[column] = [None if v != v else v for v in values.tolist()]
+        return columns
+    
+    def rows(self, positions: np.ndarray) -> List[Dict]:
+        """
+        Materialize selected rows as dicts.
+        
+        Args:
+            positions: Row positions to return, in order
+        
+        Returns:
+            List of row dicts keyed by snapshot column (None where missing)
+        """
+        columns = self.select(positions)
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+    
+    @property
+    def nbytes(self) -> int:
+        """In-memory size of the table buffers."""
+        return self.table.nbytes
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    
+    print("=" * 60)
+    print("  POOL SNAPSHOT TEST")
+    print("=" * 60)
+    
+    records = [
+        {'pool': 'a1', 'symbol': 'SOL-USDC', 'project': 'orca-dex', 'apy': 24.5, 'apyBase': 20.1,
+         'apyReward': 4.4, 'tvlUsd': 2_500_000, 'ilRisk': 'yes', 'exposure': 'multi'},
+        {'pool': 'b2', 'symbol': 'JUP-SOL', 'project': 'raydium-amm', 'apy': 61.2, 'apyBase': 61.2,
+         'apyReward': None, 'tvlUsd': 80_000, 'ilRisk': 'yes', 'exposure': 'multi'},
+        {'pool': 'c3', 'symbol': 'USDC', 'project': 'kamino-lend', 'apy': None, 'apyBase': None,
+         'apyReward': None, 'tvlUsd': 9_000_000, 'ilRisk': 'no', 'exposure': 'single'}
+    ]
+    
+    snapshot = PoolSnapshot.from_records(records)
+    print(f"\n[Snapshot] {len(snapshot)} pools, {snapshot.nbytes} bytes")
+    
+    liquid = np.flatnonzero(snapshot.liquid_mask(100_000))
+    for row in snapshot.rows(liquid):
+        print(f"  {row['project']:12} {row['symbol']:10} APY: {row['apy']:6.2f}%  TVL: ${row['tvl_usd']:,.0f}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pools.parquet')
+        snapshot.save(path)
+        restored = PoolSnapshot.load(path)
+        print(f"\n[Parquet round trip] equal: {restored.table.equals(snapshot.table)}")
@@ -26,11 +26,29 @@ class ProfitabilityAnalyzer:
     # Default holding period
     DEFAULT_HOLDING_DAYS = 7
     
+    # Holding periods compared by calculate_optimal_holding_period
+    HOLDING_PERIODS = [1, 3, 7, 14, 30, 60, 90]
+    
+    # Assessment classes, indexed by the codes returned from calculate_profit_surface
+    ASSESSMENTS = ['UNPROFITABLE', 'MARGINAL', 'PROFITABLE', 'HIGHLY_PROFITABLE']
+    
+    def _resolve_holding_days(self, il_range: Dict, holding_days: Optional[int]) -> int:
+        """Use the explicit holding period, else the IL range horizon, else the default."""
+        if holding_days is not None:
+            return holding_days
+        return il_range.get('horizon_days', self.DEFAULT_HOLDING_DAYS)
+    
+    def _gas_cost_pct(self, gas_fees: Optional[Dict]) -> float:
+        """Entry + exit gas cost as a percentage."""
+        if gas_fees is None:
+            gas_fees = self.DEFAULT_GAS_FEES
+        return gas_fees.get('entry', 0.002) * 100 + gas_fees.get('exit', 0.002) * 100
+    
     def calculate_breakeven_apy(
         self,
         il_range: Dict,
         gas_fees: Optional[Dict] = None,
-        holding_days: int = 7
+        holding_days: Optional[int] = None
     ) -> Dict:
         """
         Calculate the APY needed to break even on a yield farming position.
@@ -39,6 +57,7 @@ class ProfitabilityAnalyzer:
             il_range: IL analysis from ILCalculator
             gas_fees: {'entry': float, 'exit': float} as decimals
             holding_days: Expected holding period in days
+                (defaults to the IL range horizon, else 7)
         
         Returns:
             Break-even APY analysis
@@ -46,6 +65,8 @@ class ProfitabilityAnalyzer:
         if gas_fees is None:
             gas_fees = self.DEFAULT_GAS_FEES
         
+        holding_days = self._resolve_holding_days(il_range, holding_days)
+        
         # Expected IL costs (as positive percentages)
         expected_il_loss_pct = abs(il_range.get('expected_il', 0))
         worst_case_il_pct = abs(il_range.get('worst_il', il_range.get('max_il', 0)))
@@ -97,7 +118,7 @@ class ProfitabilityAnalyzer:
         pool_apy: float,
         il_range: Dict,
         gas_fees: Optional[Dict] = None,
-        holding_days: int = 7
+        holding_days: Optional[int] = None
     ) -> Dict:
         """
         Calculate expected profit/loss for a yield farming position.
@@ -107,10 +128,12 @@ class ProfitabilityAnalyzer:
             il_range: IL analysis from ILCalculator
             gas_fees: Entry/exit fees
             holding_days: Expected holding period
+                (defaults to the IL range horizon, else 7)
         
         Returns:
             Profit analysis
         """
+        holding_days = self._resolve_holding_days(il_range, holding_days)
         breakeven = self.calculate_breakeven_apy(il_range, gas_fees, holding_days)
         
         # Calculate margin over break-even
@@ -181,53 +204,226 @@ class ProfitabilityAnalyzer:
         Longer holding = more yield but potentially more IL.
         Shorter holding = less IL but gas fees eat into returns.
         
+        Evaluates the standard HOLDING_PERIODS up to max_days with
+        solve_holding_period; use that directly for a dense day grid.
+        
         Returns:
             Optimal holding period analysis
         """
-        if gas_fees is None:
-            gas_fees = self.DEFAULT_GAS_FEES
+        periods = [days for days in self.HOLDING_PERIODS if days <= max_days]
+        solved = self.solve_holding_period(pool_apy, il_range, gas_fees, holding_days=periods)
         
-        best_profit_rate = float('-inf')
-        optimal_days = 7
-        results = []
+        # Per-period assessments, same thresholds as calculate_expected_profit
+        assessments = self.evaluate_profit(
+            pool_apy, np.asarray(periods), il_range.get('expected_il', 0), gas_fees
+        )['assessment']
         
-        for days in [1, 3, 7, 14, 30, 60, 90]:
-            if days > max_days:
-                break
-            
-            # Calculate profit for this holding period
-            profit = self.calculate_expected_profit(
-                pool_apy, il_range, gas_fees, days
-            )
-            
-            # Daily profit rate
-            if days > 0:
-                daily_profit_rate = profit['expected_period_profit_pct'] / days
-            else:
-                daily_profit_rate = 0
-            
-            results.append({
+        results = [
+            {
                 'holding_days': days,
-                'period_profit_pct': profit['expected_period_profit_pct'],
-                'daily_profit_rate': round(daily_profit_rate, 4),
-                'assessment': profit['assessment']
-            })
+                'period_profit_pct': round(profit, 2),
+                'daily_profit_rate': rate,
+                'assessment': self.ASSESSMENTS[code]
+            }
+            for days, profit, rate, code in zip(
+                solved['days'], solved['period_profit_pct'][0],
+                solved['daily_profit_rate'][0], assessments
+            )
+        ]
             
-            if daily_profit_rate > best_profit_rate and profit['expected_period_profit_pct'] > 0:
-                best_profit_rate = daily_profit_rate
-                optimal_days = days
-        
+        best_profit_rate = solved['best_daily_profit_rate'][0]
         return {
-            'optimal_holding_days': optimal_days,
-            'best_daily_profit_rate': round(best_profit_rate, 4),
+            'optimal_holding_days': solved['optimal_holding_days'][0],
+            'best_daily_profit_rate': best_profit_rate if best_profit_rate is not None else float('-inf'),
             'analysis_by_period': results
         }
 
+    def solve_holding_period(
+        self,
+        pool_apys,
+        il_range: Dict,
+        gas_fees: Optional[Dict] = None,
+        max_days: int = 365,
+        holding_days=None
+    ) -> Dict:
+        """
+        Optimal holding period for many pool APYs over a dense day grid.
+        
+        Uses the same cost model and rounding as calculate_expected_profit
+        (expected IL plus entry/exit gas per holding period, cost and period
+        profit to 2 dp, break-even APY to 1 dp), evaluated as one
+        (APYs x days) array instead of one dict cascade per point.
+        
+        The cost is fixed per holding period, so the daily profit rate
+        (APY / 365 - cost / days) only grows with the holding period: on the
+        dense grid the optimum is max_days whenever any period is profitable.
+        'min_profitable_days' is usually the more useful answer.
+        
+        Args:
+            pool_apys: Pool APY or sequence of pool APYs (percent)
+            il_range: IL analysis from ILCalculator
+            gas_fees: {'entry': float, 'exit': float} as decimals
+            max_days: Longest holding period evaluated (grid is 1..max_days)
+            holding_days: Explicit holding periods to evaluate instead of
+                the 1..max_days grid, all positive
+        
+        Returns:
+            Optimum per APY plus the full profit curves:
+            - 'days': day grid
+            - 'breakeven_apy': break-even APY for each holding period
+            - 'period_profit_pct' / 'daily_profit_rate': (APYs x days) curves
+            - 'optimal_holding_days', 'best_daily_profit_rate' and
+              'min_profitable_days' per APY (None where never profitable)
+        """
+        if holding_days is None:
+            if max_days < 1:
+                raise ValueError("max_days must be at least 1")
+            days = np.arange(1, max_days + 1)
+        else:
+            days = np.atleast_1d(np.asarray(holding_days, dtype=np.int64))
+            if days.size == 0 or np.any(days <= 0):
+                raise ValueError("holding_days must be non-empty and all positive")
+        
+        if gas_fees is None:
+            gas_fees = self.DEFAULT_GAS_FEES
+        
+        apys = np.atleast_1d(np.asarray(pool_apys, dtype=np.float64))
+        
+        gas_cost_pct = self._gas_cost_pct(gas_fees)
+        period_cost_pct = abs(il_range.get('expected_il', 0)) + gas_cost_pct
+        
+        # (APYs x days) profit, rounded to 2 dp as calculate_expected_profit
+        # reports it, and profit per day held
+        period_profit = np.round(apys[:, None] / 365 * days[None, :] - round(period_cost_pct, 2), 2)
+        daily_rate = period_profit / days[None, :]
+        
+        # Best daily rate among profitable holding periods (first day wins ties)
+        profitable = period_profit > 0
+        best = np.argmax(np.where(profitable, daily_rate, -np.inf), axis=1)
+        any_profitable = profitable.any(axis=1)
+        first_profitable = np.argmax(profitable, axis=1)
+        rows = np.arange(len(apys))
+        
+        return {
+            'pool_apys': apys.tolist(),
+            'days': days.tolist(),
+            'breakeven_apy': np.round(period_cost_pct * 365 / days, 1).tolist(),
+            'period_profit_pct': np.round(period_profit, 4).tolist(),
+            'daily_profit_rate': np.round(daily_rate, 4).tolist(),
+            'optimal_holding_days': np.where(
+                any_profitable, days[best], self.DEFAULT_HOLDING_DAYS
+            ).tolist(),
+            'best_daily_profit_rate': [
+                round(float(rate), 4) if ok else None
+                for rate, ok in zip(daily_rate[rows, best], any_profitable)
+            ],
+            'min_profitable_days': [
+                int(days[d]) if ok else None
+                for d, ok in zip(first_profitable, any_profitable)
+            ],
+            'period_cost_pct': round(period_cost_pct, 2)
+        }
+    
+    def calculate_profit_surface(
+        self,
+        pool_apys,
+        holding_days,
+        il_levels,
+        gas_fees: Optional[Dict] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Break-even APY, expected profit and assessment over a full grid.
+        
+        Evaluates calculate_breakeven_apy / calculate_expected_profit for every
+        (pool APY, holding period, IL level) combination in one broadcast pass.
+        
+        Args:
+            pool_apys: Pool APYs in percent, shape (A,)
+            holding_days: Holding periods in days, shape (D,), all positive
+            il_levels: Expected IL in percent (sign ignored), shape (I,)
+            gas_fees: {'entry': float, 'exit': float} as decimals
+        
+        Returns:
+            Dict of NumPy arrays, each of shape (A, D, I):
+            - 'breakeven_apy': Expected break-even APY
+            - 'apy_margin': Pool APY minus break-even APY
+            - 'expected_period_profit_pct': Yield minus costs over the period
+            - 'assessment': Class code indexing ASSESSMENTS
+            plus the input axes ('pool_apys', 'holding_days', 'il_levels')
+        """
+        apys = np.atleast_1d(np.asarray(pool_apys, dtype=np.float64))
+        days = np.atleast_1d(np.asarray(holding_days, dtype=np.float64))
+        il = np.abs(np.atleast_1d(np.asarray(il_levels, dtype=np.float64)))
+        
+        # Axes: apy -> 0, days -> 1, IL -> 2
+        profit = self.evaluate_profit(
+            apys[:, None, None], days[None, :, None], il[None, None, :], gas_fees
+        )
+        
+        shape = (len(apys), len(days), len(il))
+        return {
+            'pool_apys': apys,
+            'holding_days': days,
+            'il_levels': il,
+            'breakeven_apy': np.broadcast_to(profit['breakeven_apy'], shape),
+            'apy_margin': profit['apy_margin'],
+            'expected_period_profit_pct': profit['expected_period_profit_pct'],
+            'assessment': profit['assessment']
+        }
+    
+    def evaluate_profit(
+        self,
+        pool_apy,
+        holding_days,
+        expected_il,
+        gas_fees: Optional[Dict] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Elementwise break-even APY, profit and assessment for broadcastable arrays.
+        
+        Matches calculate_expected_profit point by point (including its rounding
+        of break-even APY and period costs).
+        
+        Args:
+            pool_apy: Pool APYs in percent
+            holding_days: Holding periods in days, all positive
+            expected_il: Expected IL in percent (sign ignored)
+            gas_fees: {'entry': float, 'exit': float} as decimals
+        
+        Returns:
+            Dict of broadcast arrays: 'breakeven_apy', 'apy_margin',
+            'expected_period_profit_pct' and 'assessment' (codes into ASSESSMENTS)
+        """
+        pool_apy = np.asarray(pool_apy, dtype=np.float64)
+        holding_days = np.asarray(holding_days, dtype=np.float64)
+        
+        if np.any(holding_days <= 0):
+            raise ValueError("holding_days must all be positive")
+        
+        period_cost_pct = np.abs(np.asarray(expected_il, dtype=np.float64)) + self._gas_cost_pct(gas_fees)
+        
+        breakeven = np.round(period_cost_pct * 365 / holding_days, 1)
+        apy_margin = pool_apy - breakeven
+        expected_profit = pool_apy / 365 * holding_days - np.round(period_cost_pct, 2)
+        
+        # Same thresholds as calculate_expected_profit
+        assessment = np.select(
+            [apy_margin > breakeven, apy_margin > 0, apy_margin > -0.5 * breakeven],
+            [3, 2, 1],
+            default=0
+        ).astype(np.int8)
+        
+        return {
+            'breakeven_apy': breakeven,
+            'apy_margin': apy_margin,
+            'expected_period_profit_pct': expected_profit,
+            'assessment': assessment
+        }
 
 def calculate_breakeven_apy(
     il_range: Dict,
     gas_fees: Optional[Dict] = None,
-    holding_days: int = 7
+    holding_days: Optional[int] = None
 ) -> Dict:
     """
     Convenience function to calculate break-even APY.
@@ -283,3 +479,24 @@ if __name__ == "__main__":
     
     print(f"  Optimal Period: {optimal['optimal_holding_days']} days")
     print(f"  Best Daily Rate: {optimal['best_daily_profit_rate']:.4f}%")
+
+    # Dense grid for several pools at once
+    print("\n[Holding Period Solver (1..365 days)]")
+    solved = analyzer.solve_holding_period([5.0, 20.0, 45.0, 120.0], il_range)
+    for apy, days, min_days, rate in zip(solved['pool_apys'], solved['optimal_holding_days'],
+                                         solved['min_profitable_days'], solved['best_daily_profit_rate']):
+        rate_text = f"{rate:.4f}%/day" if rate is not None else "never profitable"
+        print(f"  {apy:>6.1f}% APY: optimal {days}d, profitable after {min_days}d, {rate_text}")
+
+    # Full APY x holding period x IL surface in one call
+    print("\n[Profit Surface]")
+    surface = analyzer.calculate_profit_surface(
+        np.arange(5, 205, 5), [1, 7, 14, 30, 90], np.linspace(0, 10, 21)
+    )
+    print(f"  Grid shape: {surface['assessment'].shape}")
+    il_index = 4  # 2.0% IL
+    for d, days in enumerate(surface['holding_days']):
+        print(f"  {days:>3.0f}d @ {surface['il_levels'][il_index]:.1f}% IL: "
+              f"break-even {surface['breakeven_apy'][0, d, il_index]:.1f}% APY")
+    counts = np.bincount(surface['assessment'].ravel(), minlength=len(analyzer.ASSESSMENTS))
+    print("  " + ", ".join(f"{name}: {n}" for name, n in zip(analyzer.ASSESSMENTS, counts)))
@@ -0,0 +1,366 @@
+"""
+Range Optimizer
+===============
+Scans thousands of candidate Whirlpool (lower, upper) ranges around the
+current pool price and returns the Pareto-optimal ones.
+
+Each range is scored on expected fee capture, concentrated IL and
+out-of-range probability under the price distribution implied by the
+BoundsCalculator prediction box.
+"""
+import numpy as np
+import time
+from statistics import NormalDist
+from typing import Dict, Optional
+
+from .concentrated_liquidity import ConcentratedLiquidityCalculator
+
+
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Vectorized standard normal CDF (Abramowitz-Stegun 7.1.26, |error| < 1.5e-7)."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+class RangeOptimizer:
+    """
+    Vectorized search for optimal concentrated liquidity ranges.
+    
+    The pool price at the horizon is modelled as log-normal, with the drift
+    taken from the predicted prices and the volatility implied by the width
+    of each token's prediction bounds at its confidence level.
+    
+    Objectives (all evaluated as NumPy sweeps over every candidate):
+    - Expected fee capture (maximize): pool APY x capital efficiency x time in range
+    - Expected concentrated IL (minimize loss)
+    - Out-of-range probability at the horizon (minimize)
+    """
+    
+    # Candidate grid size per side (lower x upper candidates)
+    DEFAULT_GRID_SIZE = 60
+    
+    # Number of equal-probability price scenarios used for expected IL
+    DEFAULT_SCENARIOS = 400
+    
+    # Time points used to average the in-range probability over the horizon
+    TIME_STEPS = 16
+    
+    # Rows per chunk in the pairwise Pareto dominance check
+    PARETO_CHUNK = 512
+    
+    def __init__(self):
+        self.cl_calculator = ConcentratedLiquidityCalculator()
+        self._normal_quantiles = {}
+    
+    def _scenario_quantiles(self, n_scenarios: int) -> np.ndarray:
+        """Equal-probability standard normal quantiles (cached per size)."""
+        if n_scenarios not in self._normal_quantiles:
+            normal = NormalDist()
+            self._normal_quantiles[n_scenarios] = np.array([
+                normal.inv_cdf((i + 0.5) / n_scenarios) for i in range(n_scenarios)
+            ])
+        return self._normal_quantiles[n_scenarios]
+    
+    def implied_distribution(
+        self,
+        token_a_bounds: Dict,
+        token_b_bounds: Dict,
+        correlation: float = 0.0
+    ) -> Dict:
+        """
+        Log-normal pool price distribution implied by two tokens' bounds.
+        
+        Args:
+            token_a_bounds: Bounds for token A (from BoundsCalculator)
+            token_b_bounds: Bounds for token B (from BoundsCalculator)
+            correlation: Return correlation between the tokens
+        
+        Returns:
+            Dictionary with current pool price, log drift and log volatility over the horizon
+        """
+        def implied_sigma(bounds: Dict) -> float:
+            z_score = NormalDist().inv_cdf(0.5 + bounds.get('confidence_level', 0.80) / 2)
+            return np.log(bounds['upper_bound'] / bounds['lower_bound']) / (2 * z_score)
+        
+        sigma_a = implied_sigma(token_a_bounds)
+        sigma_b = implied_sigma(token_b_bounds)
+        sigma = np.sqrt(max(sigma_a ** 2 + sigma_b ** 2 - 2 * correlation * sigma_a * sigma_b, 1e-12))
+        
+        current_price = token_a_bounds['current_price'] / token_b_bounds['current_price']
+        predicted_price = (
+            token_a_bounds.get('predicted_price', token_a_bounds['current_price']) /
+            token_b_bounds.get('predicted_price', token_b_bounds['current_price'])
+        )
+        
+        return {
+            'current_price': current_price,
+            'log_drift': float(np.log(predicted_price / current_price)),
+            'log_volatility': float(sigma),
+            'horizon_days': token_a_bounds.get('horizon_days', 7)
+        }
+    
+    def generate_candidates(
+        self,
+        current_price: float,
+        log_volatility: float,
+        grid_size: int = DEFAULT_GRID_SIZE,
+        span_sigmas: float = 4.0
+    ) -> Dict:
+        """
+        Generate a (lower x upper) grid of candidate ranges around the current price.
+        
+        Args:
+            current_price: Current pool price
+            log_volatility: Horizon log volatility of the pool price
+            grid_size: Candidates per side (grid_size^2 ranges in total)
+            span_sigmas: Furthest candidate edge, in horizon volatilities
+        
+        Returns:
+            Dictionary with lower_prices and upper_prices arrays
+        """
+        max_offset = max(span_sigmas * log_volatility, 0.01)
+        offsets = np.geomspace(max_offset / 200, max_offset, grid_size)
+        
+        lower_grid, upper_grid = np.meshgrid(
+            current_price * np.exp(-offsets), current_price * np.exp(offsets), indexing='ij'
+        )
+        
+        return {
+            'lower_prices': lower_grid.ravel(),
+            'upper_prices': upper_grid.ravel()
+        }
+    
+    def _time_in_range(
+        self,
+        log_lower: np.ndarray,
+        log_upper: np.ndarray,
+        log_drift: float,
+        log_volatility: float
+    ) -> np.ndarray:
+        """Expected fraction of the horizon spent in range (averaged over time points)."""
+        fractions = (np.arange(self.TIME_STEPS) + 0.5) / self.TIME_STEPS
+        drift_t = log_drift * fractions[None, :]
+        sigma_t = log_volatility * np.sqrt(fractions)[None, :]
+        
+        in_range = (
+            _norm_cdf((log_upper[:, None] - drift_t) / sigma_t) -
+            _norm_cdf((log_lower[:, None] - drift_t) / sigma_t)
+        )
+        return in_range.mean(axis=1)
+    
+    def _pareto_mask(self, objectives: np.ndarray) -> np.ndarray:
+        """
+        Non-dominated mask for objectives to be maximized.
+        
+        Points are sorted by the first objective so each block is only compared
+        against points that can dominate it (first objective >= block minimum).
+        
+        Args:
+            objectives: Array of shape (N, K)
+        
+        Returns:
+            Boolean mask of shape (N,)
+        """
+        order = np.argsort(-objectives[:, 0], kind='stable')
+        ranked = objectives[order]
+        columns = [np.ascontiguousarray(ranked[:, k]) for k in range(ranked.shape[1])]
+        negated_first = -columns[0]
+        dominated = np.zeros(len(ranked), dtype=bool)
+        
+        for start in range(0, len(ranked), self.PARETO_CHUNK):
+            stop = min(start + self.PARETO_CHUNK, len(ranked))
+            # Only points whose first objective >= the block minimum can dominate it
+            limit = int(np.searchsorted(negated_first, negated_first[stop - 1], side='right'))
+            
+            at_least = np.ones((stop - start, limit), dtype=bool)
+            equal = np.ones((stop - start, limit), dtype=bool)
+            for column in columns:
+                others = column[None, :limit]
+                block = column[start:stop, None]
+                at_least &= others >= block
+                equal &= others == block
+            
+            dominated[start:stop] = (at_least & ~equal).any(axis=1)
+        
+        mask = np.empty(len(ranked), dtype=bool)
+        mask[order] = ~dominated
+        return mask
+    
+    def optimize(
+        self,
+        token_a_bounds: Dict,
+        token_b_bounds: Dict,
+        pool_apy: float,
+        correlation: float = 0.0,
+        grid_size: int = DEFAULT_GRID_SIZE,
+        n_scenarios: int = DEFAULT_SCENARIOS,
+        reference_efficiency: Optional[float] = None,
+        max_results: int = 20
+    ) -> Dict:
+        """
+        Find Pareto-optimal ranges for a token pair.
+        
+        Args:
+            token_a_bounds: Bounds for token A (from BoundsCalculator)
+            token_b_bounds: Bounds for token B (from BoundsCalculator)
+            pool_apy: Pool fee APY in percentage
+            correlation: Return correlation between the tokens (from CorrelationAnalyzer)
+            grid_size: Candidates per side (grid_size^2 ranges in total)
+            n_scenarios: Equal-probability price scenarios for expected IL
+            reference_efficiency: Capital efficiency at which pool_apy is earned
+                (1.0 = full range). Defaults to the efficiency of the range spanned
+                by the bounds, i.e. the pool APY is assumed to be earned by
+                liquidity concentrated in the predicted range.
+            max_results: Maximum number of Pareto ranges to return
+        
+        Returns:
+            Optimization result with the best range and the Pareto front
+        """
+        started = time.perf_counter()
+        
+        dist = self.implied_distribution(token_a_bounds, token_b_bounds, correlation)
+        current_price = dist['current_price']
+        log_drift = dist['log_drift']
+        log_volatility = dist['log_volatility']
+        horizon_days = dist['horizon_days']
+        
+        candidates = self.generate_candidates(current_price, log_volatility, grid_size)
+        lower_prices = candidates['lower_prices']
+        upper_prices = candidates['upper_prices']
+        
+        # Expected concentrated IL over equal-probability terminal prices
+        scenario_prices = current_price * np.exp(
+            log_drift + log_volatility * self._scenario_quantiles(n_scenarios)
+        )
+        position = self.cl_calculator.calculate_position(
+            current_price, lower_prices, upper_prices, scenario_prices
+        )
+        expected_il_pct = position['il_pct'].mean(axis=1)
+        efficiency = position['capital_efficiency']
+        
+        # Analytic in-range probabilities
+        log_lower = np.log(lower_prices / current_price)
+        log_upper = np.log(upper_prices / current_price)
+        out_of_range_prob = 1.0 - (
+            _norm_cdf((log_upper - log_drift) / log_volatility) -
+            _norm_cdf((log_lower - log_drift) / log_volatility)
+        )
+        time_in_range = self._time_in_range(log_lower, log_upper, log_drift, log_volatility)
+        
+        if reference_efficiency is None:
+            _, bounds_lower, bounds_upper = self.cl_calculator.range_from_bounds(
+                token_a_bounds, token_b_bounds
+            )
+            reference_efficiency = float(self.cl_calculator.calculate_position(
+                current_price, [bounds_lower], [bounds_upper], [current_price]
+            )['capital_efficiency'][0])
+        
+        # Fee capture over the horizon
+        horizon_fee_pct = pool_apy / 365 * horizon_days
+        expected_fee_pct = horizon_fee_pct * (efficiency / reference_efficiency) * time_in_range
+        expected_net_pct = expected_fee_pct + expected_il_pct
+        
+        objectives = np.column_stack([expected_fee_pct, expected_il_pct, -out_of_range_prob])
+        pareto_idx = np.flatnonzero(self._pareto_mask(objectives))
+        pareto_idx = pareto_idx[np.argsort(-expected_net_pct[pareto_idx])]
+        
+        def describe(i: int) -> Dict:
+            return {
+                'lower_price': round(float(lower_prices[i]), 6),
+                'upper_price': round(float(upper_prices[i]), 6),
+                'lower_pct': round(float((lower_prices[i] / current_price - 1) * 100), 2),
+                'upper_pct': round(float((upper_prices[i] / current_price - 1) * 100), 2),
+                'capital_efficiency': round(float(efficiency[i]), 2),
+                'expected_fee_pct': round(float(expected_fee_pct[i]), 4),
+                'expected_il_pct': round(float(expected_il_pct[i]), 4),
+                'expected_net_pct': round(float(expected_net_pct[i]), 4),
+                'time_in_range_pct': round(float(time_in_range[i] * 100), 1),
+                'out_of_range_prob': round(float(out_of_range_prob[i]), 4)
+            }
+        
+        best_idx = int(np.argmax(expected_net_pct))
+        
+        return {
+            'best_range': describe(best_idx),
+            'pareto_ranges': [describe(i) for i in pareto_idx[:max_results]],
+            'pareto_size': int(len(pareto_idx)),
+            'candidates_evaluated': int(len(lower_prices)),
+            'distribution': {
+                'current_price': round(current_price, 6),
+                'horizon_log_drift': round(log_drift, 6),
+                'horizon_log_volatility': round(log_volatility, 6)
+            },
+            'pool_apy': pool_apy,
+            'reference_efficiency': round(reference_efficiency, 2),
+            'horizon_days': horizon_days,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+
+def optimize_position_range(
+    token_a_bounds: Dict,
+    token_b_bounds: Dict,
+    pool_apy: float,
+    correlation: float = 0.0,
+    grid_size: int = RangeOptimizer.DEFAULT_GRID_SIZE
+) -> Dict:
+    """
+    Convenience function to find Pareto-optimal ranges for a token pair.
+    
+    Args:
+        token_a_bounds: Bounds for token A (from BoundsCalculator)
+        token_b_bounds: Bounds for token B (from BoundsCalculator)
+        pool_apy: Pool fee APY in percentage
+        correlation: Return correlation between the tokens
+        grid_size: Candidates per side
+    
+    Returns:
+        Range optimization result
+    """
+    optimizer = RangeOptimizer()
+    return optimizer.optimize(token_a_bounds, token_b_bounds, pool_apy, correlation, grid_size)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  RANGE OPTIMIZER TEST")
+    print("=" * 60)
+    
+    sol_bounds = {
+        'current_price': 122.0,
+        'predicted_price': 123.0,
+        'lower_bound': 112.0,
+        'upper_bound': 132.0,
+        'confidence_level': 0.80,
+        'horizon_days': 7
+    }
+    
+    usdc_bounds = {
+        'current_price': 1.0,
+        'predicted_price': 1.0,
+        'lower_bound': 0.995,
+        'upper_bound': 1.005,
+        'confidence_level': 0.80,
+        'horizon_days': 7
+    }
+    
+    print("\n[SOL/USDC @ 25% APY]")
+    result = optimize_position_range(sol_bounds, usdc_bounds, pool_apy=25.0)
+    
+    print(f"  Candidates: {result['candidates_evaluated']} in {result['elapsed_ms']:.0f} ms")
+    print(f"  Pareto Ranges: {result['pareto_size']}")
+    
+    best = result['best_range']
+    print(f"\n  Best Range: ${best['lower_price']:.2f} - ${best['upper_price']:.2f} "
+          f"({best['lower_pct']:+.1f}% / {best['upper_pct']:+.1f}%)")
+    print(f"  Expected Fees: {best['expected_fee_pct']:.3f}%  Expected IL: {best['expected_il_pct']:.3f}%")
+    print(f"  Out-of-Range Probability: {best['out_of_range_prob'] * 100:.1f}%")
+    
+    print("\n[Pareto Front (top 5 by net return)]")
+    for r in result['pareto_ranges'][:5]:
+        print(f"  {r['lower_pct']:+6.1f}% / {r['upper_pct']:+6.1f}%  "
+              f"net {r['expected_net_pct']:+.3f}%  out-of-range {r['out_of_range_prob'] * 100:4.1f}%")
@@ -0,0 +1,277 @@
+"""
+Realized Volatility
+===================
+High-frequency realized volatility from polled live quotes.
+
+Every quote fetched for a token is appended to a per-token tick buffer.
+Realized variance (sum of squared log returns) is maintained incrementally
+over rolling windows (1h, 4h, 24h by default) and scaled to a daily
+volatility, giving bounds an intraday view between daily history updates.
+QuotePoller keeps the buffers filled by polling quotes in the background,
+independently of request traffic.
+"""
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class _TickBuffer:
+    """Rolling squared log returns of one token for every window."""
+    
+    def __init__(self, windows: Dict[str, float]):
+        self.windows = windows
+        self.last_time = None
+        self.last_price = None
+        # Per window: deque of (start_time, end_time, squared_return) and its running sum
+        self.returns = {name: deque() for name in windows}
+        self.sums = {name: 0.0 for name in windows}
+    
+    def add(self, price: float, timestamp: float):
+        if self.last_time is not None and timestamp <= self.last_time:
+            return
+        
+        if self.last_price is not None:
+            squared = float(np.log(price / self.last_price)) ** 2
+            for name in self.windows:
+                self.returns[name].append((self.last_time, timestamp, squared))
+                self.sums[name] += squared
+        
+        self.last_time = timestamp
+        self.last_price = price
+        self.evict(timestamp)
+    
+    def evict(self, now: float):
+        for name, seconds in self.windows.items():
+            window = self.returns[name]
+            while window and window[0][0] < now - seconds:
+                self.sums[name] -= window.popleft()[2]
+            if not window:
+                # Reset to avoid carrying float residue into an empty window
+                self.sums[name] = 0.0
+
+
+class RealizedVolatility:
+    """
+    Incremental realized volatility over rolling windows of live quotes.
+    
+    Adding a quote costs O(1) amortized per window; reading a window is O(1).
+    A window is only reported once it holds MIN_RETURNS returns spanning at
+    least MIN_COVERAGE of its length.
+    """
+    
+    # Rolling windows in seconds
+    WINDOWS = {
+        '1h': 3600,
+        '4h': 4 * 3600,
+        '24h': 24 * 3600
+    }
+    
+    # Minimum returns in a window before it is reported
+    MIN_RETURNS = 6
+    
+    # Minimum fraction of the window covered by the returns
+    MIN_COVERAGE = 0.25
+    
+    def __init__(
+        self,
+        windows: Optional[Dict[str, float]] = None,
+        min_returns: int = MIN_RETURNS,
+        min_coverage: float = MIN_COVERAGE
+    ):
+        """
+        Initialize empty tick buffers.
+        
+        Args:
+            windows: Rolling windows as {label: seconds} (defaults to 1h / 4h / 24h)
+            min_returns: Minimum returns in a window before it is reported
+            min_coverage: Minimum fraction of the window spanned by the returns
+        """
+        self.windows = dict(windows or self.WINDOWS)
+        self.min_returns = min_returns
+        self.min_coverage = min_coverage
+        self._buffers: Dict[str, _TickBuffer] = {}
+        self._lock = threading.Lock()
+    
+    def add_quote(self, token: str, price: float, timestamp: Optional[float] = None):
+        """
+        Ingest one live quote.
+        
+        Args:
+            token: Token symbol
+            price: Quoted price (ignored if not positive)
+            timestamp: Quote time in epoch seconds (defaults to now); quotes
+                not newer than the previous one are ignored
+        """
+        if not price or price <= 0:
+            return
+        
+        token = token.lower()
+        with self._lock:
+            buffer = self._buffers.get(token)
+            if buffer is None:
+                buffer = self._buffers[token] = _TickBuffer(self.windows)
+            buffer.add(float(price), time.time() if timestamp is None else float(timestamp))
+    
+    def realized_variance(self, token: str, window: str, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Realized variance of one token over one window.
+        
+        Args:
+            token: Token symbol
+            window: Window label (e.g., '4h')
+            now: Evaluation time in epoch seconds (defaults to now)
+        
+        Returns:
+            Dict with variance, daily volatility, returns and covered seconds,
+            or None if the window does not have enough data yet
+        """
+        if window not in self.windows:
+            raise ValueError(f"Unknown realized volatility window '{window}'. Use one of {list(self.windows)}")
+        
+        with self._lock:
+            buffer = self._buffers.get(token.lower())
+            if buffer is None:
+                return None
+            buffer.evict(time.time() if now is None else now)
+            
+            returns = buffer.returns[window]
+            if len(returns) < self.min_returns:
+                return None
+            
+            span = returns[-1][1] - returns[0][0]
+            variance = max(buffer.sums[window], 0.0)
+        
+        if span < self.min_coverage * self.windows[window]:
+            return None
+        
+        return {
+            'variance': variance,
+            'daily_volatility': float(np.sqrt(variance * 86400 / span)),
+            'returns': len(returns),
+            'span_seconds': span
+        }
+    
+    def daily_volatility(self, token: str, window: Optional[str] = None) -> Optional[float]:
+        """
+        Realized volatility scaled to one day.
+        
+        Args:
+            token: Token symbol
+            window: Window label; if None, the longest window with enough data
+        
+        Returns:
+            Daily volatility as a decimal, or None if no window is ready
+        """
+        if window is not None:
+            realized = self.realized_variance(token, window)
+            return realized['daily_volatility'] if realized else None
+        
+        for label in sorted(self.windows, key=self.windows.get, reverse=True):
+            realized = self.realized_variance(token, label)
+            if realized:
+                return realized['daily_volatility']
+        return None
+    
+    def summary(self, token: str) -> Dict:
+        """Daily-scaled realized volatility (percent) per window; None where not ready."""
+        result = {}
+        for label in self.windows:
+            realized = self.realized_variance(token, label)
+            result[label] = {
+                'daily_volatility_pct': round(realized['daily_volatility'] * 100, 3),
+                'returns': realized['returns']
+            } if realized else None
+        return result
+
+
+
+class QuotePoller:
+    """
+    Polls live quotes on a background thread so realized volatility does
+    not depend on request traffic.
+    
+    The quote function is expected to feed RealizedVolatility itself (as
+    BoundsCalculator.fetch_quote does); failed quotes are simply skipped.
+    """
+    
+    # Seconds between polls (the 1h window needs MIN_RETURNS quotes over 15 min)
+    DEFAULT_INTERVAL = 60
+    
+    def __init__(
+        self,
+        fetch_quote: Callable[[str], Tuple[float, float]],
+        tokens: List[str],
+        interval: float = DEFAULT_INTERVAL
+    ):
+        """
+        Args:
+            fetch_quote: token -> (price, 24h change); records the quote
+            tokens: Tokens to poll
+            interval: Seconds between polls
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        
+        self.fetch_quote = fetch_quote
+        self.tokens = list(tokens)
+        self.interval = interval
+        self.polls = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start the polling thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='quote-poller', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def poll(self):
+        """Fetch one quote per token."""
+        for token in self.tokens:
+            if self._stop.is_set():
+                return
+            try:
+                self.fetch_quote(token)
+            except Exception as e:
+                print(f"  [!] Quote poll failed for {token}: {e}")
+        self.polls += 1
+    
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            self.poll()
+            self._stop.wait(max(self.interval - (time.time() - started), 0.0))
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  REALIZED VOLATILITY TEST")
+    print("=" * 60)
+    
+    # One quote a minute for 30 hours at 3% true daily volatility
+    rng = np.random.default_rng(42)
+    daily_vol = 0.03
+    step = 60
+    n_quotes = 30 * 60
+    log_prices = np.cumsum(rng.normal(0, daily_vol * np.sqrt(step / 86400), n_quotes))
+    
+    realized = RealizedVolatility()
+    start = time.time() - n_quotes * step
+    for k in range(n_quotes):
+        realized.add_quote('sol', 120 * np.exp(log_prices[k]), timestamp=start + k * step)
+    
+    print(f"\n[SOL] true daily volatility: {daily_vol * 100:.2f}%")
+    for label, window in realized.summary('sol').items():
+        print(f"  {label:>4}: {window['daily_volatility_pct']:.2f}% ({window['returns']} returns)")
@@ -0,0 +1,424 @@
+"""
+Returns Panel
+=============
+Shared, date-indexed returns for the whole token universe.
+
+Loads each token's history once, aligns it on a gap-aware daily calendar and
+stores prices, simple returns and log returns as (tokens x days) float64
+arrays with a validity mask. Correlation, volatility, bounds and safety
+calculations all read from the same panel instead of recomputing returns
+from their own DataFrame copies.
+
+The loaded history rows are kept next to the aligned arrays, so per-row
+sample volatility reads the same snapshot. Requests never read parquet:
+new data is detected from the source files' mtime / size and reloaded on
+a background thread while readers keep the current snapshot.
+"""
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .correlation_analyzer import daily_price_series
+
+
+class ReturnsPanel:
+    """
+    Gap-aware (tokens x days) returns panel with change detection.
+    
+    The calendar covers every day between the first and last observation of
+    any token. Missing days stay NaN and the returns on either side of a gap
+    are marked invalid, so cross-token alignment is by date, not by position.
+    """
+    
+    # Token universe (mirrors YieldFarmingSafetyEngine.SUPPORTED_TOKENS)
+    SUPPORTED_TOKENS = ['sol', 'jup', 'jupsol', 'pengu', 'usdt', 'usdc']
+    
+    # Days of history loaded per token
+    DEFAULT_HISTORY_DAYS = 400
+    
+    # Seconds between checks of the historical store for new data
+    REFRESH_INTERVAL = 300
+    
+    def __init__(
+        self,
+        data_loader: Callable[[str, int], pd.DataFrame],
+        tokens: Optional[List[str]] = None,
+        history_days: int = DEFAULT_HISTORY_DAYS,
+        refresh_interval: float = REFRESH_INTERVAL,
+        source_stat: Optional[Callable[[str], Optional[Tuple]]] = None
+    ):
+        """
+        Initialize the panel (built lazily on first access).
+        
+        Args:
+            data_loader: Callable (token, days) -> price DataFrame, e.g.
+                BoundsCalculator.fetch_historical_data
+            tokens: Token universe (defaults to SUPPORTED_TOKENS)
+            history_days: Days of history loaded per token
+            refresh_interval: Seconds between data-change checks
+            source_stat: Optional token -> file stat tuple (e.g.,
+                BoundsCalculator.historical_data_stat) used to detect new
+                data without loading it; without it the panel only changes
+                on an explicit refresh()
+        """
+        self.data_loader = data_loader
+        self.universe = [t.lower() for t in (tokens or self.SUPPORTED_TOKENS)]
+        self.history_days = history_days
+        self.refresh_interval = refresh_interval
+        self.source_stat = source_stat
+        
+        # Incremented on every rebuild so dependents can detect new data
+        self.version = 0
+        
+        self._lock = threading.Lock()
+        self._state = None
+        self._fingerprint = None
+        self._source_fingerprint = None
+        self._last_check = 0.0
+        self._refreshing = False
+    
+    @staticmethod
+    def _fingerprint_frame(df: pd.DataFrame) -> Tuple:
+        """Cheap change detector for a token's historical data."""
+        if df is None or df.empty:
+            return (0,)
+        price_col = 'price' if 'price' in df.columns else 'close'
+        return (len(df), str(df.index[-1]), float(df[price_col].iloc[-1]))
+    
+    def _stat_sources(self) -> Optional[Tuple]:
+        """File stats of every token's history (None without source_stat)."""
+        if self.source_stat is None:
+            return None
+        stats = []
+        for token in self.universe:
+            try:
+                stats.append(self.source_stat(token))
+            except Exception as e:
+                print(f"ReturnsPanel: failed to stat {token}: {e}")
+                stats.append(None)
+        return tuple(stats)
+    
+    def _load(self) -> Dict[str, pd.DataFrame]:
+        """Load history for every token in the universe."""
+        frames = {}
+        for token in self.universe:
+            try:
+                frames[token] = self.data_loader(token, self.history_days)
+            except Exception as e:
+                print(f"ReturnsPanel: failed to load {token}: {e}")
+                frames[token] = pd.DataFrame()
+        return frames
+    
+    def _build(self, frames: Dict[str, pd.DataFrame]) -> Dict:
+        """Align all tokens on one daily calendar and compute returns."""
+        series = {
+            token: daily_price_series(df)
+            for token, df in frames.items()
+            if df is not None and not df.empty
+        }
+        tokens = [t for t in self.universe if t in series and len(series[t])]
+        
+        if tokens:
+            days = {t: series[t].index.values.astype('datetime64[D]') for t in tokens}
+            start = min(d[0] for d in days.values())
+            end = max(d[-1] for d in days.values())
+            dates = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+        else:
+            dates = np.array([], dtype='datetime64[D]')
+        
+        prices = np.full((len(tokens), len(dates)), np.nan)
+        for i, token in enumerate(tokens):
+            positions = (days[token] - dates[0]).astype(np.int64)
+            prices[i, positions] = series[token].to_numpy(dtype=np.float64)
+        
+        returns = np.full_like(prices, np.nan)
+        log_returns = np.full_like(prices, np.nan)
+        valid = np.zeros(prices.shape, dtype=bool)
+        
+        if prices.shape[1] > 1:
+            previous, current = prices[:, :-1], prices[:, 1:]
+            valid[:, 1:] = np.isfinite(previous) & np.isfinite(current) & (previous > 0) & (current > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[:, 1:] = np.where(valid[:, 1:], current / previous - 1, np.nan)
+                log_returns[:, 1:] = np.where(valid[:, 1:], np.log(current / previous), np.nan)
+        
+        # Per-row history and its returns, as the rows were loaded
+        history = {t: frames[t] for t in tokens}
+        history_returns = {}
+        history_log_returns = {}
+        for token, df in history.items():
+            row_prices = df['price' if 'price' in df.columns else 'close']
+            history_returns[token] = row_prices.pct_change().dropna().to_numpy(dtype=np.float64)
+            history_log_returns[token] = np.log(row_prices / row_prices.shift(1)).dropna().to_numpy(dtype=np.float64)
+        
+        return {
+            'tokens': tokens,
+            'index': {t: i for i, t in enumerate(tokens)},
+            'history': history,
+            'history_returns': history_returns,
+            'history_log_returns': history_log_returns,
+            'dates': dates,
+            'prices': prices,
+            'returns': returns,
+            'log_returns': log_returns,
+            'valid': valid,
+            'built_at': time.time()
+        }
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the historical store and rebuild if the data changed.
+        
+        Args:
+            force: Rebuild even if the data fingerprint is unchanged
+        
+        Returns:
+            True if the panel was rebuilt
+        """
+        with self._lock:
+            self._last_check = time.time()
+            # Stat before loading so a file written mid-load is picked up next time
+            self._source_fingerprint = self._stat_sources()
+            frames = self._load()
+            fingerprint = tuple(self._fingerprint_frame(frames[t]) for t in self.universe)
+            
+            if not force and self._state is not None and fingerprint == self._fingerprint:
+                return False
+            
+            # Swap in a fully built state so concurrent readers never see a partial one
+            self._state = self._build(frames)
+            self._fingerprint = fingerprint
+            self.version += 1
+            return True
+    
+    def snapshot(self) -> Dict:
+        """
+        Current panel state, built on first use.
+        
+        When a data check is due, only the source files are stat'ed; if they
+        changed, the panel is reloaded on a background thread and this call
+        still returns the current state.
+        
+        Returns:
+            Dict with 'tokens', 'index', 'dates' (datetime64[D]),
+            (tokens x days) 'prices', 'returns', 'log_returns', 'valid' and
+            the per-token loaded rows: 'history', 'history_returns',
+            'history_log_returns'
+        """
+        state = self._state
+        if state is None:
+            self.refresh()
+            return self._state
+        
+        if self.source_stat is not None and time.time() - self._last_check > self.refresh_interval:
+            self._check_sources()
+        return state
+    
+    def _check_sources(self):
+        """Start a background reload if the source files changed."""
+        with self._lock:
+            if self._refreshing or time.time() - self._last_check <= self.refresh_interval:
+                return
+            self._last_check = time.time()
+            if self._stat_sources() == self._source_fingerprint:
+                return
+            self._refreshing = True
+        
+        threading.Thread(target=self._background_refresh, name='returns-panel-refresh', daemon=True).start()
+    
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"ReturnsPanel: refresh failed: {e}")
+        finally:
+            self._refreshing = False
+    
+    @property
+    def tokens(self) -> List[str]:
+        """Tokens with data in the panel."""
+        return self.snapshot()['tokens']
+    
+    def has_token(self, token: str) -> bool:
+        """Whether the panel has data for a token."""
+        return token.lower() in self.snapshot()['index']
+    
+    def recent_returns(self, token: str, n: Optional[int] = None, log: bool = False) -> np.ndarray:
+        """
+        Most recent valid daily returns of one token.
+        
+        Args:
+            token: Token symbol
+            n: Number of returns (all if None)
+            log: Return log returns instead of simple returns
+        
+        Returns:
+            1-D float64 array, oldest first (empty if the token is unknown)
+        """
+        state = self.snapshot()
+        i = state['index'].get(token.lower())
+        if i is None:
+            return np.empty(0)
+        
+        values = (state['log_returns'] if log else state['returns'])[i][state['valid'][i]]
+        return values if n is None else values[-n:]
+    
+    def history(self, token: str, rows: Optional[int] = None) -> pd.DataFrame:
+        """
+        Loaded history rows of one token (not calendar-aligned).
+        
+        Args:
+            token: Token symbol
+            rows: Number of most recent rows (all if None)
+        
+        Returns:
+            Price DataFrame as returned by the data loader (empty if unknown);
+            shared with the snapshot, so callers must not modify it
+        """
+        df = self.snapshot()['history'].get(token.lower())
+        if df is None:
+            return pd.DataFrame()
+        return df if rows is None else df.iloc[-rows:]
+    
+    def history_returns(self, token: str, n: Optional[int] = None, log: bool = False) -> np.ndarray:
+        """
+        Returns between consecutive loaded history rows of one token.
+        
+        Unlike recent_returns, rows on the same day each count, matching
+        returns computed directly from the history DataFrame.
+        
+        Args:
+            token: Token symbol
+            n: Number of returns (all if None)
+            log: Return log returns instead of simple returns
+        
+        Returns:
+            1-D float64 array, oldest first (empty if the token is unknown)
+        """
+        state = self.snapshot()
+        values = (state['history_log_returns'] if log else state['history_returns']).get(token.lower())
+        if values is None:
+            return np.empty(0)
+        return values if n is None else values[max(len(values) - n, 0):]
+    
+    def live_returns(self, token: str, live_price: Optional[float], n: int = 14) -> np.ndarray:
+        """
+        Last n history-row returns ending with the live price.
+        
+        Mirrors appending the live price to the stored history: the final
+        return is live_price against the most recent stored row.
+        
+        Args:
+            token: Token symbol
+            live_price: Current price (ignored unless positive)
+            n: Number of returns
+        
+        Returns:
+            1-D float64 array, oldest first (empty if the token is unknown)
+        """
+        history = self.history(token)
+        if history.empty:
+            return np.empty(0)
+        
+        last_price = float(history['price' if 'price' in history.columns else 'close'].iloc[-1])
+        if live_price and live_price > 0 and last_price > 0:
+            return np.append(self.history_returns(token, n - 1), live_price / last_price - 1)
+        return self.history_returns(token, n)
+    
+    def pair_returns(
+        self,
+        token_a: str,
+        token_b: str,
+        n: Optional[int] = None,
+        log: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns of two tokens on the days both are valid.
+        
+        Args:
+            token_a: First token symbol
+            token_b: Second token symbol
+            n: Number of most recent joint observations (all if None)
+            log: Return log returns instead of simple returns
+        
+        Returns:
+            Tuple of (dates, returns_a, returns_b), oldest first
+        """
+        state = self.snapshot()
+        i = state['index'].get(token_a.lower())
+        j = state['index'].get(token_b.lower())
+        if i is None or j is None:
+            return np.array([], dtype='datetime64[D]'), np.empty(0), np.empty(0)
+        
+        values = state['log_returns'] if log else state['returns']
+        both = state['valid'][i] & state['valid'][j]
+        dates, returns_a, returns_b = state['dates'][both], values[i][both], values[j][both]
+        
+        if n is not None:
+            dates, returns_a, returns_b = dates[-n:], returns_a[-n:], returns_b[-n:]
+        return dates, returns_a, returns_b
+    
+    def window_matrix(self, days: int, log: bool = False) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Returns of all tokens over the last `days` calendar days.
+        
+        Args:
+            days: Number of most recent calendar days
+            log: Return log returns instead of simple returns
+        
+        Returns:
+            Tuple of (tokens, dates, (days x tokens) returns with NaN where invalid)
+        """
+        state = self.snapshot()
+        values = state['log_returns'] if log else state['returns']
+        
+        # The first calendar day never has a return
+        start = max(1, values.shape[1] - days)
+        return state['tokens'], state['dates'][start:], values[:, start:].T
+    
+    def last_price(self, token: str) -> Tuple[Optional[np.datetime64], Optional[float]]:
+        """Date and value of a token's most recent price."""
+        state = self.snapshot()
+        i = state['index'].get(token.lower())
+        if i is None:
+            return None, None
+        
+        observed = np.flatnonzero(np.isfinite(state['prices'][i]))
+        if len(observed) == 0:
+            return None, None
+        last = observed[-1]
+        return state['dates'][last], float(state['prices'][i, last])
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  RETURNS PANEL TEST")
+    print("=" * 60)
+    
+    np.random.seed(42)
+    dates = pd.date_range(start='2024-01-01', periods=60, freq='D')
+    
+    sol_prices = 100 * np.cumprod(1 + np.random.normal(0.01, 0.05, 60))
+    usdc_prices = np.cumprod(1 + np.random.normal(0, 0.001, 60))
+    
+    sample = {
+        # SOL history ends three days earlier than USDC
+        'sol': pd.DataFrame({'date': dates[:-3], 'price': sol_prices[:-3]}),
+        # USDC is missing two days
+        'usdc': pd.DataFrame({'date': dates, 'price': usdc_prices}).drop(index=[45, 46])
+    }
+    
+    panel = ReturnsPanel(lambda token, days: sample.get(token, pd.DataFrame()).tail(days),
+                         tokens=['sol', 'usdc', 'jup'])
+    
+    state = panel.snapshot()
+    print(f"\n[Panel] tokens={panel.tokens}, days={len(state['dates'])}, "
+          f"{state['dates'][0]} -> {state['dates'][-1]}")
+    for token in panel.tokens:
+        print(f"  {token.upper():>5}: {len(panel.recent_returns(token))} valid returns")
+    
+    pair_dates, _, _ = panel.pair_returns('sol', 'usdc')
+    print(f"  SOL/USDC joint returns: {len(pair_dates)}")
+    print(f"  Rebuilt on unchanged data: {panel.refresh()}")
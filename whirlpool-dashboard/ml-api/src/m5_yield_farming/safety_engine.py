@@ -12,16 +12,25 @@ Combines all components into a final safety score (0-100) and recommendation:
 
 Uses REAL-TIME prices and historical data for accurate predictions.
 """
+import threading
+import time
+import uuid
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 import os
 
 from .bounds_calculator import BoundsCalculator, calculate_prediction_bounds
 from .il_calculator import ILCalculator, calculate_il_range
 from .correlation_analyzer import CorrelationAnalyzer, calculate_correlation_risk
+from .correlation_service import CorrelationService
+from .returns_panel import ReturnsPanel
+from .volatility_estimators import VolatilityEstimators
 from .volatility_analyzer import VolatilityAnalyzer, calculate_intra_week_volatility
 from .profitability_analyzer import ProfitabilityAnalyzer, calculate_breakeven_apy
+from .monte_carlo import MonteCarloILSimulator
 
 
 class YieldFarmingSafetyEngine:
@@ -30,6 +39,10 @@ class YieldFarmingSafetyEngine:
     
     Generates a safety score (0-100) and actionable recommendation
     based on real-time price data and ML predictions.
+    
+    calculate_safety runs as a staged pipeline: quotes and history are
+    fetched once per token, bounds (per token) and correlation run
+    concurrently, and IL, volatility and profitability reuse those outputs.
     """
     
     # Component weights for final score
@@ -51,13 +64,84 @@ class YieldFarmingSafetyEngine:
     # Supported tokens
     SUPPORTED_TOKENS = ['sol', 'jup', 'jupsol', 'pengu', 'usdt', 'usdc']
     
-    def __init__(self, models_dir: str = "models"):
-        """Initialize with models directory."""
-        self.bounds_calculator = BoundsCalculator(models_dir=models_dir)
+    # Days of history behind the correlation and volatility components
+    HISTORY_DAYS = 30
+    
+    # Fixed seed so identical inputs give identical IL tail risk
+    IL_SIMULATION_SEED = 42
+    
+    # Correlation component score per correlation risk level
+    CORRELATION_SCORES = {
+        'LOW_RISK': 90,
+        'MEDIUM_RISK': 60,
+        'HIGH_RISK': 30
+    }
+    
+    # Recommendation and suggested position size per threshold band
+    RECOMMENDATIONS = [
+        ('SAFE_TO_FARM', 1.0),
+        ('MODERATE_FARM', 0.5),
+        ('HIGH_RISK_FARM', 0.25),
+        ('DO_NOT_FARM', 0.0)
+    ]
+    
+    # Worker threads for concurrent per-token pipeline stages
+    MAX_WORKERS = 4
+    
+    # Seconds a stored analysis can be re-scored, and how many are kept
+    ANALYSIS_TTL = 900
+    MAX_ANALYSES = 1000
+    
+    def __init__(
+        self,
+        models_dir: str = "models",
+        max_workers: int = MAX_WORKERS,
+        bounds_calculator: Optional[BoundsCalculator] = None
+    ):
+        """
+        Initialize with models directory.
+        
+        Args:
+            models_dir: Directory with the LSTM models
+            max_workers: Threads for concurrent per-token stages (quotes,
+                history, bounds, correlation)
+            bounds_calculator: Optional already-loaded BoundsCalculator to share
+                (e.g., the API server's); it is not modified, the engine's
+                volatility estimators are passed per call
+        """
+        self.bounds_calculator = bounds_calculator or BoundsCalculator(models_dir=models_dir)
+        
+        # One returns panel read by every stage: date-aligned returns for
+        # correlation and the volatility models, and the loaded history rows
+        # for LSTM inputs and per-row sample volatility. Requests never read
+        # parquet; new files are detected by mtime / size and reloaded off-path
+        self.returns_panel = ReturnsPanel(
+            self.bounds_calculator.fetch_historical_data, tokens=self.SUPPORTED_TOKENS,
+            source_stat=self.bounds_calculator.historical_data_stat
+        )
+        
+        # EWMA / GARCH models fitted once at startup, then updated per new day
+        self.volatility_estimators = VolatilityEstimators(self.returns_panel)
+        self.volatility_estimators.fit()
+        
         self.il_calculator = ILCalculator()
         self.correlation_analyzer = CorrelationAnalyzer()
-        self.volatility_analyzer = VolatilityAnalyzer()
+        self.correlation_service = CorrelationService(self.returns_panel)
+        self.volatility_analyzer = VolatilityAnalyzer(
+            self.volatility_estimators, self.bounds_calculator.realized_volatility
+        )
+        # Path-dependent IL table simulated here, off the request path
+        self.volatility_analyzer.get_path_il_table()
         self.profitability_analyzer = ProfitabilityAnalyzer()
+        self.il_simulator = MonteCarloILSimulator(seed=self.IL_SIMULATION_SEED)
+        
+        # Stage pool owned by the engine, so callers running calculate_safety
+        # inside their own executor cannot starve it
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='safety-stage')
+        
+        # Market artifacts per analysis ID for what-if re-scoring
+        self._analyses: OrderedDict = OrderedDict()
+        self._analyses_lock = threading.Lock()
     
     def calculate_safety(
         self,
@@ -67,7 +151,9 @@ class YieldFarmingSafetyEngine:
         gas_fees: Optional[Dict] = None,
         confidence_level: float = 0.80,
         headlines_a: Optional[List[str]] = None,
-        headlines_b: Optional[List[str]] = None
+        headlines_b: Optional[List[str]] = None,
+        simulate_il_paths: Optional[int] = None,
+        volatility_estimator: str = 'sample'
     ) -> Dict:
         """
         THE COMPLETE YIELD FARMING SAFETY CALCULATION
@@ -80,6 +166,10 @@ class YieldFarmingSafetyEngine:
             confidence_level: Confidence interval for bounds (default 0.80)
             headlines_a: Optional news headlines for token A
             headlines_b: Optional news headlines for token B
+            simulate_il_paths: Optional Monte Carlo path count; adds the simulated
+                IL distribution (quantiles, VaR, CVaR) as 'il_tail_risk'
+            volatility_estimator: Volatility source for bounds and the volatility
+                component: 'sample', 'ewma', 'garch' or 'realized'
         
         Returns:
             Complete safety analysis with score, recommendation, and breakdown
@@ -90,24 +180,32 @@ class YieldFarmingSafetyEngine:
         if gas_fees is None:
             gas_fees = {'entry': 0.002, 'exit': 0.002}
         
-        print(f"\n[1/5] Calculating price bounds for {token_a.upper()}...")
-        token_a_bounds = self.bounds_calculator.calculate_bounds(
-            token=token_a,
-            headlines=headlines_a,
-            confidence_level=confidence_level
-        )
+        self._validate_estimator(volatility_estimator)
+        
+        tokens = list(dict.fromkeys([token_a, token_b]))
+        headlines = {token_b: headlines_b, token_a: headlines_a}
         
-        print(f"[2/5] Calculating price bounds for {token_b.upper()}...")
-        token_b_bounds = self.bounds_calculator.calculate_bounds(
-            token=token_b,
-            headlines=headlines_b,
-            confidence_level=confidence_level
+        # ═══════════════════════════════════════════════════════════
+        # Stage 1-2: Live quotes (one request per token) and panel history
+        # ═══════════════════════════════════════════════════════════
+        
+        print(f"\n[1/5] Fetching quotes and history for {token_a.upper()}/{token_b.upper()}...")
+        quotes, history = self._fetch_inputs(tokens)
+        
+        # ═══════════════════════════════════════════════════════════
+        # Stage 3: Price bounds per token, concurrently with correlation
+        # ═══════════════════════════════════════════════════════════
+        
+        print("[2/5] Calculating price bounds and correlation...")
+        bounds_futures = self._submit_bounds(
+            tokens, quotes, history, headlines, confidence_level, volatility_estimator
         )
+        corr_future = self._executor.submit(self._pair_correlation, token_a, token_b, history)
+        bounds = {t: future.result() for t, future in bounds_futures.items()}
+        corr_risk = corr_future.result()
         
-        # Fetch historical data for correlation and volatility
-        print("[3/5] Analyzing correlation and volatility...")
-        historical_data_a = self.bounds_calculator.fetch_historical_data(token_a, days=30)
-        historical_data_b = self.bounds_calculator.fetch_historical_data(token_b, days=30)
+        token_a_bounds = bounds[token_a]
+        token_b_bounds = bounds[token_b]
         
         # ═══════════════════════════════════════════════════════════
         # Component 1: Price Prediction Confidence
@@ -120,7 +218,7 @@ class YieldFarmingSafetyEngine:
         # Component 2: Impermanent Loss Risk
         # ═══════════════════════════════════════════════════════════
         
-        print("[4/5] Calculating impermanent loss scenarios...")
+        print("[3/5] Calculating impermanent loss scenarios...")
         il_range = self.il_calculator.calculate_il_range(token_a_bounds, token_b_bounds)
         
         # Lower IL = higher score
@@ -132,27 +230,17 @@ class YieldFarmingSafetyEngine:
         # Component 3: Correlation Risk
         # ═══════════════════════════════════════════════════════════
         
-        corr_risk = self.correlation_analyzer.calculate_correlation(
-            historical_data_a, historical_data_b
-        )
-        
-        if corr_risk['interpretation'] == 'LOW_RISK':
-            correlation_score = 90
-        elif corr_risk['interpretation'] == 'MEDIUM_RISK':
-            correlation_score = 60
-        else:
-            correlation_score = 30
+        correlation_score = self.CORRELATION_SCORES.get(corr_risk['interpretation'], 30)
         
         # ═══════════════════════════════════════════════════════════
         # Component 4: Volatility Risk
         # ═══════════════════════════════════════════════════════════
         
-        vol_a = self.volatility_analyzer.calculate_intra_week_volatility(
-            token_a_bounds, historical_data_a
-        )
-        vol_b = self.volatility_analyzer.calculate_intra_week_volatility(
-            token_b_bounds, historical_data_b
-        )
+        # Panel history-row log returns where available, else the history loaded above
+        print("[4/5] Analyzing volatility...")
+        vol = {t: self._token_volatility(t, bounds[t], history[t], volatility_estimator) for t in tokens}
+        vol_a = vol[token_a]
+        vol_b = vol[token_b]
         
         avg_vol_score = (vol_a['volatility_score'] + vol_b['volatility_score']) / 2
         
@@ -160,14 +248,147 @@ class YieldFarmingSafetyEngine:
         volatility_score = max(0, 100 - avg_vol_score)
         
         # ═══════════════════════════════════════════════════════════
-        # Component 5: Profitability Check
+        # Market artifacts: everything that does not depend on APY or gas
         # ═══════════════════════════════════════════════════════════
         
+        market = {
+            'scores': {
+                'price_confidence': price_confidence_score,
+                'il_risk': il_risk_score,
+                'correlation': correlation_score,
+                'volatility': volatility_score
+            },
+            'il_range': il_range,
+            'details': {
+                'expected_il_pct': round(il_range['expected_il'], 2),
+                'worst_case_il_pct': round(il_range['worst_il'], 2),
+                'correlation': round(corr_risk['correlation'], 4),
+                'correlation_risk': corr_risk['interpretation'],
+                
+                # Price ranges
+                'token_a': {
+                    'symbol': token_a.upper(),
+                    'current_price': token_a_bounds['current_price'],
+                    'predicted_price': token_a_bounds['predicted_price'],
+                    'lower_bound': token_a_bounds['lower_bound'],
+                    'upper_bound': token_a_bounds['upper_bound'],
+                    'range_width_pct': token_a_bounds['range_width_pct']
+                },
+                'token_b': {
+                    'symbol': token_b.upper(),
+                    'current_price': token_b_bounds['current_price'],
+                    'predicted_price': token_b_bounds['predicted_price'],
+                    'lower_bound': token_b_bounds['lower_bound'],
+                    'upper_bound': token_b_bounds['upper_bound'],
+                    'range_width_pct': token_b_bounds['range_width_pct']
+                },
+                
+                # Volatility details
+                'volatility': {
+                    token_a.upper(): {
+                        'weekly_pct': vol_a['weekly_volatility_pct'],
+                        'risk_level': vol_a['risk_level']
+                    },
+                    token_b.upper(): {
+                        'weekly_pct': vol_b['weekly_volatility_pct'],
+                        'risk_level': vol_b['risk_level']
+                    }
+                },
+                
+                # Metadata
+                'confidence_level': confidence_level,
+                'prediction_horizon': '7 days',
+                'volatility_estimator': volatility_estimator
+            }
+        }
+        
+        if simulate_il_paths:
+            simulation = self.il_simulator.simulate(
+                token_a_bounds, token_b_bounds, corr_risk, n_paths=simulate_il_paths
+            )
+            market['details']['il_tail_risk'] = {
+                **simulation['full_range'],
+                'n_paths': simulation['n_paths'],
+                'horizon_days': simulation['horizon_days']
+            }
+        
         print("[5/5] Analyzing profitability...")
+        analysis_id = self.store_analysis(market)
+        return self._score(market, pool_apy, gas_fees, analysis_id)
+    
+    def rescore(self, analysis_id: str, pool_apy: float, gas_fees: Optional[Dict] = None) -> Dict:
+        """
+        Re-score a previous analysis for a new pool APY and/or gas fees.
+        
+        Only the profitability component and the weighted total are recomputed;
+        bounds, IL, correlation and volatility come from the stored analysis.
+        
+        Args:
+            analysis_id: 'analysis_id' returned by calculate_safety
+            pool_apy: Pool APY in percentage
+            gas_fees: Optional gas fee overrides {'entry': float, 'exit': float}
+        
+        Returns:
+            Same structure as calculate_safety
+        
+        Raises:
+            KeyError: If the analysis is unknown or has expired
+        """
+        market = self.get_analysis(analysis_id)
+        if market is None:
+            raise KeyError(f"Unknown or expired analysis_id '{analysis_id}'")
+        return self._score(market, pool_apy, gas_fees, analysis_id)
+    
+    def store_analysis(self, market: Dict, analysis_id: Optional[str] = None) -> str:
+        """
+        Keep the market artifacts of an analysis for later re-scoring.
+        
+        Args:
+            market: Market artifacts (as returned by get_analysis)
+            analysis_id: Existing ID to store under (e.g., restored from a
+                shared cache); a new one is generated if None
+        
+        Returns:
+            The analysis ID
+        """
+        analysis_id = analysis_id or uuid.uuid4().hex
+        now = time.time()
+        with self._analyses_lock:
+            self._analyses[analysis_id] = (now, market)
+            self._analyses.move_to_end(analysis_id)
+            
+            # Drop expired entries (oldest first), then enforce the size cap
+            while self._analyses:
+                oldest_id, (stored_at, _) = next(iter(self._analyses.items()))
+                if now - stored_at <= self.ANALYSIS_TTL and len(self._analyses) <= self.MAX_ANALYSES:
+                    break
+                del self._analyses[oldest_id]
+        return analysis_id
+    
+    def get_analysis(self, analysis_id: str) -> Optional[Dict]:
+        """Market artifacts of a stored analysis, or None if unknown or expired."""
+        with self._analyses_lock:
+            entry = self._analyses.get(analysis_id)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ANALYSIS_TTL:
+                del self._analyses[analysis_id]
+                return None
+            return entry[1]
+    
+    def _score(self, market: Dict, pool_apy: float, gas_fees: Optional[Dict], analysis_id: str) -> Dict:
+        """Profitability, weighted total and recommendation on top of market artifacts."""
+        if gas_fees is None:
+            gas_fees = {'entry': 0.002, 'exit': 0.002}
+        
+        il_range = market['il_range']
+        scores = market['scores']
+        
+        # ═══════════════════════════════════════════════════════════
+        # Component 5: Profitability Check
+        # ═══════════════════════════════════════════════════════════
+        
         breakeven = self.profitability_analyzer.calculate_breakeven_apy(il_range, gas_fees)
-        profit_analysis = self.profitability_analyzer.calculate_expected_profit(
-            pool_apy, il_range, gas_fees
-        )
         
         # Compare pool APY to breakeven
         apy_margin = pool_apy - breakeven['expected_breakeven_apy']
@@ -185,10 +406,10 @@ class YieldFarmingSafetyEngine:
         # ═══════════════════════════════════════════════════════════
         
         total_safety_score = (
-            self.WEIGHTS['price_confidence'] * price_confidence_score +
-            self.WEIGHTS['il_risk'] * il_risk_score +
-            self.WEIGHTS['correlation'] * correlation_score +
-            self.WEIGHTS['volatility'] * volatility_score +
+            self.WEIGHTS['price_confidence'] * scores['price_confidence'] +
+            self.WEIGHTS['il_risk'] * scores['il_risk'] +
+            self.WEIGHTS['correlation'] * scores['correlation'] +
+            self.WEIGHTS['volatility'] * scores['volatility'] +
             self.WEIGHTS['profitability'] * profitability_score
         )
         
@@ -220,7 +441,8 @@ class YieldFarmingSafetyEngine:
         # RETURN COMPLETE ANALYSIS
         # ═══════════════════════════════════════════════════════════
         
-        return {
+        details = market['details']
+        result = {
             # Overall
             'total_safety_score': round(total_safety_score, 1),
             'recommendation': recommendation,
@@ -229,57 +451,297 @@ class YieldFarmingSafetyEngine:
             
             # Component scores
             'component_scores': {
-                'price_confidence': round(price_confidence_score, 1),
-                'il_risk': round(il_risk_score, 1),
-                'correlation': round(correlation_score, 1),
-                'volatility': round(volatility_score, 1),
+                'price_confidence': round(scores['price_confidence'], 1),
+                'il_risk': round(scores['il_risk'], 1),
+                'correlation': round(scores['correlation'], 1),
+                'volatility': round(scores['volatility'], 1),
                 'profitability': round(profitability_score, 1)
             },
             
             # Detailed metrics
-            'expected_il_pct': round(il_range['expected_il'], 2),
-            'worst_case_il_pct': round(il_range['worst_il'], 2),
-            'correlation': round(corr_risk['correlation'], 4),
-            'correlation_risk': corr_risk['interpretation'],
+            'expected_il_pct': details['expected_il_pct'],
+            'worst_case_il_pct': details['worst_case_il_pct'],
+            'correlation': details['correlation'],
+            'correlation_risk': details['correlation_risk'],
             'pool_apy': pool_apy,
             'breakeven_apy': round(breakeven['expected_breakeven_apy'], 1),
             'expected_net_apy': round(apy_margin, 1),
             
-            # Price ranges
-            'token_a': {
-                'symbol': token_a.upper(),
-                'current_price': token_a_bounds['current_price'],
-                'predicted_price': token_a_bounds['predicted_price'],
-                'lower_bound': token_a_bounds['lower_bound'],
-                'upper_bound': token_a_bounds['upper_bound'],
-                'range_width_pct': token_a_bounds['range_width_pct']
-            },
-            'token_b': {
-                'symbol': token_b.upper(),
-                'current_price': token_b_bounds['current_price'],
-                'predicted_price': token_b_bounds['predicted_price'],
-                'lower_bound': token_b_bounds['lower_bound'],
-                'upper_bound': token_b_bounds['upper_bound'],
-                'range_width_pct': token_b_bounds['range_width_pct']
-            },
+            **{key: value for key, value in details.items() if key not in (
+                'expected_il_pct', 'worst_case_il_pct', 'correlation', 'correlation_risk'
+            )},
             
-            # Volatility details
-            'volatility': {
-                token_a.upper(): {
-                    'weekly_pct': vol_a['weekly_volatility_pct'],
-                    'risk_level': vol_a['risk_level']
+            # Re-score handle (see rescore)
+            'analysis_id': analysis_id
+        }
+        
+        return result
+    
+    def rank_pairs(
+        self,
+        pool_apy: Union[float, Dict[Tuple[str, str], float]],
+        tokens: Optional[List[str]] = None,
+        gas_fees: Optional[Dict] = None,
+        confidence_level: float = 0.80,
+        headlines: Optional[Dict[str, List[str]]] = None,
+        volatility_estimator: str = 'sample'
+    ) -> List[Dict]:
+        """
+        Rank every token pair by total safety score.
+        
+        Per-token work (quote, history, bounds with LSTM and sentiment,
+        volatility) runs once per token; the pair components (IL, correlation,
+        profitability) are then evaluated as arrays over all pairs. Scores
+        match calculate_safety for each pair.
+        
+        Args:
+            pool_apy: Pool APY in percent for every pair, or a dict of
+                {(token_a, token_b): apy}; with a dict only the listed pairs
+                are ranked (either token order)
+            tokens: Token universe (defaults to SUPPORTED_TOKENS)
+            gas_fees: Optional gas fee overrides {'entry': float, 'exit': float}
+            confidence_level: Confidence interval for bounds (default 0.80)
+            headlines: Optional news headlines per token
+            volatility_estimator: 'sample', 'ewma', 'garch' or 'realized'
+        
+        Returns:
+            One row per pair, sorted by total_safety_score (highest first)
+        """
+        self._validate_estimator(volatility_estimator)
+        tokens = list(dict.fromkeys(t.lower() for t in (tokens or self.SUPPORTED_TOKENS)))
+        headlines = {t.lower(): h for t, h in (headlines or {}).items()}
+        
+        # Pairs to rank and their APYs
+        first, second = np.triu_indices(len(tokens), k=1)
+        if isinstance(pool_apy, dict):
+            apy_by_pair = {}
+            for (a, b), apy in pool_apy.items():
+                apy_by_pair[(a.lower(), b.lower())] = apy
+                apy_by_pair.setdefault((b.lower(), a.lower()), apy)
+            keep = [(tokens[i], tokens[j]) in apy_by_pair for i, j in zip(first, second)]
+            first, second = first[keep], second[keep]
+            apys = np.array([apy_by_pair[(tokens[i], tokens[j])] for i, j in zip(first, second)], dtype=np.float64)
+        else:
+            apys = np.full(len(first), float(pool_apy))
+        
+        if len(first) == 0:
+            return []
+        
+        # ═══════════════════════════════════════════════════════════
+        # Per-token stages: O(N) quotes, history, bounds, volatility
+        # ═══════════════════════════════════════════════════════════
+        
+        print(f"\n[1/3] Per-token analysis for {len(tokens)} tokens...")
+        quotes, history = self._fetch_inputs(tokens)
+        bounds_futures = self._submit_bounds(
+            tokens, quotes, history, headlines, confidence_level, volatility_estimator
+        )
+        bounds = {t: future.result() for t, future in bounds_futures.items()}
+        vol = {t: self._token_volatility(t, bounds[t], history[t], volatility_estimator) for t in tokens}
+        
+        def token_array(values) -> np.ndarray:
+            return np.array(list(values), dtype=np.float64)
+        
+        current = token_array(bounds[t]['current_price'] for t in tokens)
+        predicted = token_array(bounds[t]['predicted_price'] for t in tokens)
+        lower = token_array(bounds[t]['lower_bound'] for t in tokens)
+        upper = token_array(bounds[t]['upper_bound'] for t in tokens)
+        safety = token_array(bounds[t]['safety_score'] for t in tokens)
+        vol_score = token_array(vol[t]['volatility_score'] for t in tokens)
+        horizon = token_array(bounds[t].get('horizon_days', np.nan) for t in tokens)
+        
+        # ═══════════════════════════════════════════════════════════
+        # Pair components, vectorized over all pairs
+        # ═══════════════════════════════════════════════════════════
+        
+        print(f"[2/3] Scoring {len(first)} pairs...")
+        price_confidence_score = (safety[first] + safety[second]) / 2
+        
+        # IL over the four corners of each prediction box, and at the predicted center
+        current_ratio = current[first] / current[second]
+        corners = np.stack([
+            (lower[first] / lower[second]),
+            (lower[first] / upper[second]),
+            (upper[first] / lower[second]),
+            (upper[first] / upper[second])
+        ], axis=1) / current_ratio[:, None]
+        corner_il = self.il_calculator.calculate_il_array(corners) * 100
+        worst_il = corner_il.min(axis=1)
+        expected_il = self.il_calculator.calculate_il_array(
+            (predicted[first] / predicted[second]) / current_ratio
+        ) * 100
+        il_risk_score = np.maximum(0, 100 - np.abs(expected_il) * 10)
+        
+        # Correlation from the precomputed matrix; per-pair fallback outside it
+        pair_a = [tokens[i] for i in first]
+        pair_b = [tokens[j] for j in second]
+        corr = self.correlation_service.get_pair_arrays(pair_a, pair_b)
+        correlation = corr['correlation']
+        for k in np.flatnonzero(~corr['covered']):
+            correlation[k] = self._pair_correlation(pair_a[k], pair_b[k], history)['correlation']
+        thresholds = self.correlation_analyzer.RISK_THRESHOLDS
+        abs_corr = np.abs(correlation)
+        risk_levels = [abs_corr > thresholds['low'], abs_corr > thresholds['medium']]
+        correlation_risk = np.select(risk_levels, ['LOW_RISK', 'MEDIUM_RISK'], default='HIGH_RISK')
+        correlation_score = np.select(
+            risk_levels,
+            [self.CORRELATION_SCORES['LOW_RISK'], self.CORRELATION_SCORES['MEDIUM_RISK']],
+            default=self.CORRELATION_SCORES['HIGH_RISK']
+        ).astype(np.float64)
+        
+        volatility_score = np.maximum(0, 100 - (vol_score[first] + vol_score[second]) / 2)
+        
+        # Holding period follows the bounds horizon, as in calculate_breakeven_apy
+        holding_days = np.where(
+            horizon[first] == horizon[second], horizon[first], ProfitabilityAnalyzer.DEFAULT_HOLDING_DAYS
+        )
+        profit = self.profitability_analyzer.evaluate_profit(apys, holding_days, expected_il, gas_fees)
+        breakeven = profit['breakeven_apy']
+        apy_margin = profit['apy_margin']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profitability_score = np.select(
+                [apy_margin > breakeven, apy_margin > 0],
+                [100.0, 50 + apy_margin / np.maximum(breakeven, 1) * 50],
+                default=np.maximum(0, 50 + apy_margin)
+            )
+        
+        total_safety_score = (
+            self.WEIGHTS['price_confidence'] * price_confidence_score +
+            self.WEIGHTS['il_risk'] * il_risk_score +
+            self.WEIGHTS['correlation'] * correlation_score +
+            self.WEIGHTS['volatility'] * volatility_score +
+            self.WEIGHTS['profitability'] * profitability_score
+        )
+        
+        band = np.select(
+            [
+                (total_safety_score >= self.THRESHOLDS['safe']) & (profitability_score > 50),
+                (total_safety_score >= self.THRESHOLDS['moderate']) & (profitability_score > 30),
+                total_safety_score >= self.THRESHOLDS['high_risk']
+            ],
+            [0, 1, 2],
+            default=3
+        )
+        
+        # ═══════════════════════════════════════════════════════════
+        # Sorted table
+        # ═══════════════════════════════════════════════════════════
+        
+        print("[3/3] Ranking pairs...")
+        rows = []
+        for k in np.argsort(-total_safety_score, kind='stable'):
+            recommendation, position_size = self.RECOMMENDATIONS[band[k]]
+            rows.append({
+                'pair': f"{pair_a[k].upper()}/{pair_b[k].upper()}",
+                'token_a': pair_a[k].upper(),
+                'token_b': pair_b[k].upper(),
+                'total_safety_score': float(np.round(total_safety_score[k], 1)),
+                'recommendation': recommendation,
+                'suggested_position_size': position_size,
+                'component_scores': {
+                    'price_confidence': float(np.round(price_confidence_score[k], 1)),
+                    'il_risk': float(np.round(il_risk_score[k], 1)),
+                    'correlation': float(np.round(correlation_score[k], 1)),
+                    'volatility': float(np.round(volatility_score[k], 1)),
+                    'profitability': float(np.round(profitability_score[k], 1))
                 },
-                token_b.upper(): {
-                    'weekly_pct': vol_b['weekly_volatility_pct'],
-                    'risk_level': vol_b['risk_level']
-                }
-            },
-            
-            # Metadata
-            'confidence_level': confidence_level,
-            'prediction_horizon': '7 days'
+                'expected_il_pct': float(np.round(expected_il[k], 2)),
+                'worst_case_il_pct': float(np.round(worst_il[k], 2)),
+                'correlation': float(np.round(correlation[k], 4)),
+                'correlation_risk': str(correlation_risk[k]),
+                'pool_apy': float(apys[k]),
+                'breakeven_apy': float(np.round(breakeven[k], 1)),
+                'expected_net_apy': float(np.round(apy_margin[k], 1))
+            })
+        
+        return rows
+    
+    def _validate_estimator(self, volatility_estimator: str):
+        """Reject unknown volatility estimators before any data is fetched."""
+        if volatility_estimator not in self.bounds_calculator.VOLATILITY_ESTIMATORS:
+            raise ValueError(
+                f"Unknown volatility estimator '{volatility_estimator}'. "
+                f"Use one of {self.bounds_calculator.VOLATILITY_ESTIMATORS}"
+            )
+    
+    def _fetch_inputs(self, tokens: List[str]) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, pd.DataFrame]]:
+        """Quote and history stages: concurrent quote requests, history from the panel snapshot."""
+        quote_futures = {t: self._executor.submit(self.bounds_calculator.fetch_quote, t) for t in tokens}
+        history = {t: self._load_history(t) for t in tokens}
+        quotes = {t: future.result() for t, future in quote_futures.items()}
+        return quotes, history
+    
+    def _submit_bounds(
+        self,
+        tokens: List[str],
+        quotes: Dict[str, Tuple[float, float]],
+        history: Dict[str, pd.DataFrame],
+        headlines: Dict[str, Optional[List[str]]],
+        confidence_level: float,
+        volatility_estimator: str
+    ) -> Dict[str, Future]:
+        """Start the bounds stage for every token; returns one future per token."""
+        return {
+            t: self._executor.submit(
+                self._token_bounds, t, quotes[t], history[t], headlines.get(t),
+                confidence_level, volatility_estimator
+            )
+            for t in tokens
         }
     
+    def _token_volatility(
+        self,
+        token: str,
+        bounds: Dict,
+        historical_data: pd.DataFrame,
+        volatility_estimator: str
+    ) -> Dict:
+        """Volatility stage: sample volatility from the panel's history-row returns."""
+        log_returns = self.returns_panel.history_returns(token, self.HISTORY_DAYS - 1, log=True)
+        return self.volatility_analyzer.calculate_intra_week_volatility(
+            bounds, historical_data, log_returns=log_returns if len(log_returns) else None,
+            volatility_estimator=volatility_estimator
+        )
+    
+    def _load_history(self, token: str) -> pd.DataFrame:
+        """History stage: a token's recent history rows from the panel snapshot."""
+        return self.returns_panel.history(token, self.HISTORY_DAYS)
+    
+    def _token_bounds(
+        self,
+        token: str,
+        quote: Tuple[float, float],
+        historical_data: pd.DataFrame,
+        headlines: Optional[List[str]],
+        confidence_level: float,
+        volatility_estimator: str
+    ) -> Dict:
+        """Bounds stage: price bounds from the already fetched quote and history."""
+        price, change_24h = quote
+        
+        # Sample volatility returns from the panel, ending with the live price
+        recent_returns = None
+        if price and price > 0:
+            recent_returns = self.returns_panel.live_returns(token, price)
+        
+        return self.bounds_calculator.calculate_bounds(
+            token=token,
+            current_price=price,
+            historical_data=historical_data,
+            headlines=headlines,
+            confidence_level=confidence_level,
+            volatility_estimator=volatility_estimator,
+            price_change_24h=change_24h,
+            recent_returns=recent_returns,
+            volatility_estimators=self.volatility_estimators
+        )
+    
+    def _pair_correlation(self, token_a: str, token_b: str, history: Dict[str, pd.DataFrame]) -> Dict:
+        """Correlation stage: precomputed all-pairs matrix, else the loaded history."""
+        if self.correlation_service.has_pair(token_a, token_b):
+            return self.correlation_service.get_correlation(token_a, token_b)
+        return self.correlation_analyzer.calculate_correlation(history[token_a], history[token_b])
+    
     def get_supported_tokens(self) -> List[str]:
         """Get list of supported tokens."""
         return self.SUPPORTED_TOKENS
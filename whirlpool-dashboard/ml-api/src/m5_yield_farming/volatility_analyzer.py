@@ -4,6 +4,7 @@ Volatility Analyzer
 Calculates intra-week volatility within predicted bounds.
 Even if price stays in bounds, high volatility leads to more IL accumulation.
 """
+import threading
 import numpy as np
 import pandas as pd
 from typing import Dict, Optional
@@ -21,6 +22,34 @@ class VolatilityAnalyzer:
         'medium': 120   # Volatility score below this = MEDIUM risk
     }
     
+    # Default holding horizon (matches BoundsCalculator)
+    DEFAULT_HORIZON_DAYS = 7
+    
+    # Path-dependent IL lookup table (simulated once, then interpolated per request)
+    PATH_IL_VOL_BUCKETS = np.linspace(0.0, 0.15, 16)              # Daily volatility
+    PATH_IL_WIDTH_BUCKETS = np.geomspace(0.005, 1.6, 16)          # Range width / price
+    PATH_IL_HORIZON_DAYS = 7
+    PATH_IL_STEPS_PER_DAY = 24
+    PATH_IL_PATHS = 512
+    PATH_IL_SEED = 7
+    _path_il_table = None
+    _path_il_lock = threading.Lock()
+    
+    # Estimators forecast by the fitted models in VolatilityEstimators
+    MODEL_ESTIMATORS = ('ewma', 'garch')
+    
+    def __init__(self, volatility_estimators=None, realized_volatility=None):
+        """
+        Initialize the analyzer.
+        
+        Args:
+            volatility_estimators: Optional fitted VolatilityEstimators (EWMA / GARCH)
+            realized_volatility: Optional RealizedVolatility of live quotes
+                (used by the 'realized' estimator)
+        """
+        self.volatility_estimators = volatility_estimators
+        self.realized_volatility = realized_volatility
+    
     def calculate_historical_volatility(
         self,
         price_data: pd.DataFrame,
@@ -39,7 +68,24 @@ class VolatilityAnalyzer:
         price_col = 'price' if 'price' in price_data.columns else 'close'
         prices = price_data[price_col]
         
-        if len(prices) < 5:
+        # Calculate log returns for better volatility estimation
+        log_returns = np.log(prices / prices.shift(1)).dropna()
+        
+        return self.calculate_volatility_from_returns(log_returns.to_numpy(dtype=np.float64))
+    
+    def calculate_volatility_from_returns(self, log_returns: np.ndarray) -> Dict:
+        """
+        Volatility metrics from precomputed daily log returns.
+        
+        Args:
+            log_returns: Daily log returns, oldest first (e.g., from ReturnsPanel)
+        
+        Returns:
+            Volatility metrics (same structure as calculate_historical_volatility)
+        """
+        log_returns = np.asarray(log_returns, dtype=np.float64)
+        
+        if len(log_returns) < 4:
             return {
                 'daily_volatility_pct': 3.0,
                 'weekly_volatility_pct': 7.5,
@@ -47,14 +93,11 @@ class VolatilityAnalyzer:
                 'message': 'Insufficient data, using default volatility'
             }
         
-        # Calculate log returns for better volatility estimation
-        log_returns = np.log(prices / prices.shift(1)).dropna()
-        
         # Daily volatility (standard deviation of returns)
-        daily_vol = log_returns.std()
+        daily_vol = log_returns.std(ddof=1)
         
         # Recent volatility (last 7 days)
-        recent_vol = log_returns.iloc[-7:].std() if len(log_returns) >= 7 else daily_vol
+        recent_vol = log_returns[-7:].std(ddof=1) if len(log_returns) >= 7 else daily_vol
         
         # Weekly volatility (sqrt(7) scaling)
         weekly_vol = daily_vol * np.sqrt(7)
@@ -64,8 +107,8 @@ class VolatilityAnalyzer:
         
         # Volatility trend (is it increasing?)
         if len(log_returns) >= 14:
-            old_vol = log_returns.iloc[-14:-7].std()
-            new_vol = log_returns.iloc[-7:].std()
+            old_vol = log_returns[-14:-7].std(ddof=1)
+            new_vol = log_returns[-7:].std(ddof=1)
             vol_trend = 'increasing' if new_vol > old_vol * 1.1 else (
                 'decreasing' if new_vol < old_vol * 0.9 else 'stable'
             )
@@ -73,17 +116,20 @@ class VolatilityAnalyzer:
             vol_trend = 'unknown'
         
         return {
-            'daily_volatility_pct': round(daily_vol * 100, 2),
-            'weekly_volatility_pct': round(weekly_vol * 100, 2),
-            'recent_volatility_pct': round(recent_vol * 100, 2),
-            'annualized_volatility_pct': round(annualized_vol * 100, 2),
+            'daily_volatility_pct': round(float(daily_vol) * 100, 2),
+            'weekly_volatility_pct': round(float(weekly_vol) * 100, 2),
+            'recent_volatility_pct': round(float(recent_vol) * 100, 2),
+            'annualized_volatility_pct': round(float(annualized_vol) * 100, 2),
             'volatility_trend': vol_trend
         }
     
     def calculate_intra_week_volatility(
         self,
         bounds: Dict,
-        historical_data: pd.DataFrame
+        historical_data: Optional[pd.DataFrame] = None,
+        horizon_days: Optional[int] = None,
+        log_returns: Optional[np.ndarray] = None,
+        volatility_estimator: str = 'sample'
     ) -> Dict:
         """
         Calculate expected intra-week volatility within predicted bounds.
@@ -92,13 +138,26 @@ class VolatilityAnalyzer:
         
         Args:
             bounds: Price bounds from BoundsCalculator
-            historical_data: Historical price data
+            historical_data: Historical price data (ignored if log_returns is given)
+            horizon_days: Holding horizon in days (defaults to the bounds horizon, else 7)
+            log_returns: Optional precomputed daily log returns (e.g., from ReturnsPanel)
+            volatility_estimator: 'sample' compares against the sample std of
+                historical returns; 'ewma' / 'garch' compare against the fitted
+                model's forecast for the horizon and 'realized' against the
+                intraday realized volatility (both need bounds['token'] and
+                fall back to sample when unavailable)
         
         Returns:
             Volatility analysis with risk scoring
         """
+        if horizon_days is None:
+            horizon_days = bounds.get('horizon_days', self.DEFAULT_HORIZON_DAYS)
+        
         # Get historical volatility
-        hist_vol = self.calculate_historical_volatility(historical_data)
+        if log_returns is not None:
+            hist_vol = self.calculate_volatility_from_returns(log_returns)
+        else:
+            hist_vol = self.calculate_historical_volatility(historical_data)
         
         # Predicted volatility from bounds
         # If LSTM volatility is available, use it
@@ -109,12 +168,23 @@ class VolatilityAnalyzer:
             range_width = bounds.get('range_width_pct', 10) / 100
             predicted_weekly_vol = range_width / 2  # Approximate
         
-        # Compare predicted vs historical
+        # Compare predicted vs historical (or the model forecast for the horizon)
         historical_daily_vol = hist_vol['daily_volatility_pct'] / 100
         
+        forecast_daily_vol = None
+        if 'token' in bounds:
+            if volatility_estimator in self.MODEL_ESTIMATORS and self.volatility_estimators is not None:
+                forecast_daily_vol = self.volatility_estimators.forecast_daily_volatility(
+                    bounds['token'], horizon_days, volatility_estimator, live_price=bounds.get('current_price')
+                )
+            elif volatility_estimator == 'realized' and self.realized_volatility is not None:
+                forecast_daily_vol = self.realized_volatility.daily_volatility(bounds['token'])
+        if forecast_daily_vol is not None:
+            historical_daily_vol = forecast_daily_vol
+        
         # Volatility score: how much more volatile than usual?
         if historical_daily_vol > 0:
-            volatility_score = (predicted_weekly_vol / (historical_daily_vol * np.sqrt(7))) * 100
+            volatility_score = (predicted_weekly_vol / (historical_daily_vol * np.sqrt(horizon_days))) * 100
         else:
             volatility_score = 100
         
@@ -132,7 +202,9 @@ class VolatilityAnalyzer:
         # Estimate IL impact from intra-period volatility
         # More price swings = more IL even if final price is same
         estimated_rebalancing_il = self._estimate_path_dependent_il(
-            predicted_weekly_vol, hist_vol['daily_volatility_pct'] / 100
+            predicted_weekly_vol / np.sqrt(horizon_days),
+            bounds.get('range_width_pct', 10) / 100,
+            horizon_days
         )
         
         return {
@@ -144,30 +216,123 @@ class VolatilityAnalyzer:
             'volatility_trend': hist_vol.get('volatility_trend', 'unknown'),
             'risk_level': risk_level,
             'message': message,
-            'estimated_path_il_pct': round(estimated_rebalancing_il * 100, 2)
+            'estimated_path_il_pct': round(estimated_rebalancing_il * 100, 2),
+            'horizon_days': horizon_days,
+            'volatility_estimator': volatility_estimator if forecast_daily_vol is not None else 'sample',
+            'baseline_daily_volatility_pct': round(historical_daily_vol * 100, 2)
         }
     
+    @classmethod
+    def build_path_il_table(cls) -> np.ndarray:
+        """
+        Simulate path-dependent (LVR-style) loss for every table bucket.
+        
+        For each (daily volatility, range width) bucket, GBM paths are simulated
+        over PATH_IL_HORIZON_DAYS and a concentrated position centred on the
+        entry price is compared with a portfolio that continuously rebalances to
+        the same token holdings. The mean shortfall is the loss the LP pays to
+        arbitrageurs as price swings back and forth, independent of the final price.
+        
+        Returns:
+            Mean loss as a decimal, shape (len(PATH_IL_VOL_BUCKETS), len(PATH_IL_WIDTH_BUCKETS))
+        """
+        rng = np.random.default_rng(cls.PATH_IL_SEED)
+        steps = cls.PATH_IL_HORIZON_DAYS * cls.PATH_IL_STEPS_PER_DAY
+        dt = 1.0 / cls.PATH_IL_STEPS_PER_DAY
+        shocks = rng.standard_normal((cls.PATH_IL_PATHS, steps))
+        
+        # Ranges centred on the entry price (normalized to 1): shape (W, 1, 1)
+        widths = cls.PATH_IL_WIDTH_BUCKETS
+        sqrt_lower = np.sqrt(np.maximum(1 - widths / 2, 1e-6))[:, None, None]
+        sqrt_upper = np.sqrt(1 + widths / 2)[:, None, None]
+        
+        def position(prices: np.ndarray):
+            # Concentrated liquidity amounts per unit liquidity
+            sqrt_clipped = np.clip(np.sqrt(prices), sqrt_lower, sqrt_upper)
+            amount_a = 1.0 / sqrt_clipped - 1.0 / sqrt_upper
+            amount_b = sqrt_clipped - sqrt_lower
+            return amount_a, amount_a * prices + amount_b
+        
+        _, entry_value = position(np.ones((1, 1, 1)))
+        table = np.zeros((len(cls.PATH_IL_VOL_BUCKETS), len(widths)))
+        
+        for i, daily_vol in enumerate(cls.PATH_IL_VOL_BUCKETS):
+            if daily_vol <= 0:
+                continue
+            log_paths = np.cumsum(
+                -0.5 * daily_vol ** 2 * dt + daily_vol * np.sqrt(dt) * shocks, axis=1
+            )
+            prices = np.concatenate(
+                [np.ones((cls.PATH_IL_PATHS, 1)), np.exp(log_paths)], axis=1
+            )[None, :, :]
+            
+            amount_a, value = position(prices)
+            # Rebalancing portfolio gain minus LP gain per step (>= 0 by convexity)
+            shortfall = amount_a[:, :, :-1] * np.diff(prices, axis=2) - np.diff(value, axis=2)
+            table[i] = (shortfall.sum(axis=2) / entry_value[:, :, 0]).mean(axis=1)
+        
+        return table
+    
+    @classmethod
+    def get_path_il_table(cls) -> np.ndarray:
+        """
+        Return the memoized path IL table, simulating it on first use.
+        
+        Built once per process (concurrent first callers wait for the same
+        build); YieldFarmingSafetyEngine builds it at startup so requests
+        never pay for the simulation.
+        """
+        if cls._path_il_table is None:
+            with cls._path_il_lock:
+                if cls._path_il_table is None:
+                    cls._path_il_table = cls.build_path_il_table()
+        return cls._path_il_table
+    
     def _estimate_path_dependent_il(
         self,
-        weekly_vol: float,
-        daily_vol: float
+        daily_vol: float,
+        range_width: float,
+        horizon_days: int = DEFAULT_HORIZON_DAYS
     ) -> float:
         """
         Estimate additional IL from price path (not just final price).
         
         Concentrated liquidity pools are path-dependent - more swings = more IL.
+        Bilinear lookup in the simulated (volatility x range width) table,
+        scaled linearly in time from the table horizon.
+        
+        Args:
+            daily_vol: Daily volatility as a decimal
+            range_width: Total range width as a fraction of price (e.g., 0.10)
+            horizon_days: Holding horizon in days
+        
+        Returns:
+            Expected path-dependent loss as a decimal
         """
-        # Simplified model: each significant swing adds ~0.1% IL
-        # Number of expected significant swings in a week
-        if daily_vol > 0:
-            expected_swings = (weekly_vol / daily_vol) * 0.5
-        else:
-            expected_swings = 3.5
+        table = self.get_path_il_table()
+        vol_buckets = self.PATH_IL_VOL_BUCKETS
+        width_buckets = self.PATH_IL_WIDTH_BUCKETS
+        
+        daily_vol = float(np.clip(daily_vol, vol_buckets[0], vol_buckets[-1]))
+        range_width = float(np.clip(range_width, width_buckets[0], width_buckets[-1]))
+        
+        i = int(np.clip(np.searchsorted(vol_buckets, daily_vol) - 1, 0, len(vol_buckets) - 2))
+        j = int(np.clip(np.searchsorted(width_buckets, range_width) - 1, 0, len(width_buckets) - 2))
         
-        # Each swing adds approximately 0.1-0.2% IL
-        path_il = expected_swings * 0.001 * max(1, weekly_vol * 10)
+        vol_weight = (daily_vol - vol_buckets[i]) / (vol_buckets[i + 1] - vol_buckets[i])
+        # Widths are log-spaced, so interpolate in log width
+        width_weight = (np.log(range_width) - np.log(width_buckets[j])) / (
+            np.log(width_buckets[j + 1]) - np.log(width_buckets[j])
+        )
+        
+        path_il = (
+            table[i, j] * (1 - vol_weight) * (1 - width_weight) +
+            table[i + 1, j] * vol_weight * (1 - width_weight) +
+            table[i, j + 1] * (1 - vol_weight) * width_weight +
+            table[i + 1, j + 1] * vol_weight * width_weight
+        )
         
-        return min(path_il, 0.05)  # Cap at 5%
+        return float(path_il * horizon_days / self.PATH_IL_HORIZON_DAYS)
     
     def compare_pair_volatility(
         self,
@@ -210,7 +375,8 @@ class VolatilityAnalyzer:
 
 def calculate_intra_week_volatility(
     bounds: Dict,
-    historical_data: pd.DataFrame
+    historical_data: pd.DataFrame,
+    horizon_days: Optional[int] = None
 ) -> Dict:
     """
     Convenience function to calculate intra-week volatility.
@@ -218,12 +384,13 @@ def calculate_intra_week_volatility(
     Args:
         bounds: Price bounds dictionary
         historical_data: Historical price data
+        horizon_days: Optional holding horizon in days
     
     Returns:
         Volatility analysis result
     """
     analyzer = VolatilityAnalyzer()
-    return analyzer.calculate_intra_week_volatility(bounds, historical_data)
+    return analyzer.calculate_intra_week_volatility(bounds, historical_data, horizon_days)
 
 
 if __name__ == "__main__":
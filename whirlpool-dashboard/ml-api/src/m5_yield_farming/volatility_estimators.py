@@ -0,0 +1,386 @@
+"""
+Volatility Estimators
+=====================
+EWMA and GARCH(1,1) conditional volatility per token.
+
+Models are fitted once (at startup, from the shared ReturnsPanel) and then
+updated in O(1) per new daily return. Any request can ask for a volatility
+forecast over any horizon without touching the price history again.
+"""
+import copy
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Dict, List, Optional
+
+from .returns_panel import ReturnsPanel
+
+
+class VolatilityEstimator(ABC):
+    """Base class: conditional daily variance with O(1) updates."""
+    
+    name = 'base'
+    
+    def __init__(self):
+        # Conditional variance of the next daily log return
+        self.variance = np.nan
+        self.observations = 0
+    
+    @abstractmethod
+    def fit(self, returns: np.ndarray) -> 'VolatilityEstimator':
+        """Fit parameters and filter the variance through the returns."""
+    
+    @abstractmethod
+    def preview(self, log_return: float) -> float:
+        """Next-day variance if log_return were observed (state unchanged)."""
+    
+    def update(self, log_return: float) -> float:
+        """Observe one daily log return in O(1); returns the new variance."""
+        self.variance = self.preview(log_return)
+        self.observations += 1
+        return self.variance
+    
+    @abstractmethod
+    def forecast_variance(self, horizon_days: float, variance: Optional[float] = None) -> float:
+        """Total log-return variance over the horizon."""
+    
+    def forecast_daily_volatility(self, horizon_days: float, variance: Optional[float] = None) -> float:
+        """Average daily volatility over the horizon (sqrt(total variance / days))."""
+        return float(np.sqrt(self.forecast_variance(horizon_days, variance) / horizon_days))
+    
+    def params(self) -> Dict:
+        """Fitted parameters for reporting."""
+        return {}
+
+
+class EWMAEstimator(VolatilityEstimator):
+    """
+    RiskMetrics-style EWMA variance: var = lambda * var + (1 - lambda) * r^2.
+    
+    Forecasts are flat (no mean reversion), so horizon variance = days * var.
+    """
+    
+    name = 'ewma'
+    
+    # RiskMetrics daily decay
+    DEFAULT_LAMBDA = 0.94
+    
+    # Returns used to seed the variance before filtering
+    SEED_RETURNS = 20
+    
+    def __init__(self, decay: float = DEFAULT_LAMBDA):
+        super().__init__()
+        self.decay = decay
+    
+    def fit(self, returns: np.ndarray) -> 'EWMAEstimator':
+        returns = np.asarray(returns, dtype=np.float64)
+        if len(returns) < 2:
+            return self
+        
+        self.variance = float(np.var(returns[:self.SEED_RETURNS], ddof=1))
+        for r in returns:
+            self.variance = self.decay * self.variance + (1 - self.decay) * r * r
+        self.observations = len(returns)
+        return self
+    
+    def preview(self, log_return: float) -> float:
+        return self.decay * self.variance + (1 - self.decay) * log_return * log_return
+    
+    def forecast_variance(self, horizon_days: float, variance: Optional[float] = None) -> float:
+        variance = self.variance if variance is None else variance
+        return float(variance * horizon_days)
+    
+    def params(self) -> Dict:
+        return {'lambda': self.decay}
+
+
+class GARCHEstimator(VolatilityEstimator):
+    """
+    GARCH(1,1): var = omega + alpha * r^2 + beta * var.
+    
+    Fitted by Gaussian maximum likelihood over an (alpha, beta) grid with
+    variance targeting (omega = long_run_var * (1 - alpha - beta)); the
+    likelihood of every grid point is filtered in one vectorized pass.
+    Forecasts mean-revert to the long-run variance at rate alpha + beta.
+    """
+    
+    name = 'garch'
+    
+    ALPHA_GRID = np.linspace(0.01, 0.30, 30)
+    BETA_GRID = np.linspace(0.50, 0.98, 49)
+    
+    # Upper bound on alpha + beta (keeps the process stationary)
+    MAX_PERSISTENCE = 0.995
+    
+    # Minimum returns for a grid fit; fewer keeps the default alpha / beta
+    MIN_RETURNS = 30
+    
+    def __init__(self):
+        super().__init__()
+        self.omega = np.nan
+        self.alpha = 0.05
+        self.beta = 0.90
+        self.long_run_variance = np.nan
+        self.log_likelihood = np.nan
+    
+    @classmethod
+    def _grid(cls):
+        alpha, beta = np.meshgrid(cls.ALPHA_GRID, cls.BETA_GRID, indexing='ij')
+        keep = alpha + beta < cls.MAX_PERSISTENCE
+        return alpha[keep], beta[keep]
+    
+    def fit(self, returns: np.ndarray) -> 'GARCHEstimator':
+        returns = np.asarray(returns, dtype=np.float64)
+        if len(returns) < 2:
+            return self
+        
+        self.long_run_variance = float(np.var(returns, ddof=1))
+        
+        if len(returns) >= self.MIN_RETURNS and self.long_run_variance > 0:
+            alpha, beta = self._grid()
+            omega = self.long_run_variance * (1 - alpha - beta)
+            
+            # Filter all grid points together; each step is one vector op
+            variance = np.full(alpha.shape, self.long_run_variance)
+            log_likelihood = np.zeros(alpha.shape)
+            for r in returns:
+                log_likelihood -= 0.5 * (np.log(variance) + r * r / variance)
+                variance = omega + alpha * r * r + beta * variance
+            
+            best = int(np.argmax(log_likelihood))
+            self.alpha, self.beta = float(alpha[best]), float(beta[best])
+            self.log_likelihood = float(log_likelihood[best])
+        
+        self.omega = self.long_run_variance * (1 - self.alpha - self.beta)
+        
+        self.variance = self.long_run_variance
+        for r in returns:
+            self.variance = self.omega + self.alpha * r * r + self.beta * self.variance
+        self.observations = len(returns)
+        return self
+    
+    def preview(self, log_return: float) -> float:
+        return self.omega + self.alpha * log_return * log_return + self.beta * self.variance
+    
+    def forecast_variance(self, horizon_days: float, variance: Optional[float] = None) -> float:
+        variance = self.variance if variance is None else variance
+        persistence = self.alpha + self.beta
+        
+        # sum_{k=0}^{h-1} [VL + p^k (var - VL)]
+        decay_sum = (1 - persistence ** horizon_days) / (1 - persistence)
+        return float(horizon_days * self.long_run_variance + (variance - self.long_run_variance) * decay_sum)
+    
+    def params(self) -> Dict:
+        return {
+            'omega': self.omega,
+            'alpha': round(self.alpha, 4),
+            'beta': round(self.beta, 4),
+            'persistence': round(self.alpha + self.beta, 4),
+            'long_run_daily_volatility_pct': round(float(np.sqrt(self.long_run_variance)) * 100, 3)
+        }
+
+
+class VolatilityEstimators:
+    """
+    Per-token EWMA and GARCH estimators fed by the shared ReturnsPanel.
+    
+    fit() estimates parameters once; afterwards new panel days are applied as
+    O(1) updates. Request-time forecasts can include the live price as a
+    provisional return without mutating the fitted state.
+    """
+    
+    ESTIMATORS = {
+        'ewma': EWMAEstimator,
+        'garch': GARCHEstimator
+    }
+    
+    def __init__(self, panel: ReturnsPanel, tokens: Optional[List[str]] = None):
+        """
+        Initialize (fitted lazily on first use, or explicitly via fit()).
+        
+        Args:
+            panel: Shared returns panel
+            tokens: Tokens to model (defaults to every token in the panel)
+        """
+        self.panel = panel
+        self.tokens = [t.lower() for t in tokens] if tokens else None
+        # Fitted estimators and last stored prices, published together in one
+        # assignment and never mutated afterwards, so readers need no lock
+        self._current = {'models': {}, 'last_price': {}}
+        
+        self._lock = threading.Lock()
+        self._last_date: Dict[str, np.datetime64] = {}
+        self._panel_version = None
+    
+    @property
+    def models(self) -> Dict[str, Dict[str, VolatilityEstimator]]:
+        """Fitted estimators per token and estimator name."""
+        return self._current['models']
+    
+    def fit(self) -> Dict[str, Dict]:
+        """
+        Fit every estimator for every token from the full panel history.
+        
+        Returns:
+            Fitted parameters per token and estimator
+        """
+        state = self.panel.snapshot()
+        with self._lock:
+            models, last_price = {}, {}
+            for token in (self.tokens or state['tokens']):
+                i = state['index'].get(token)
+                if i is None:
+                    continue
+                valid = state['valid'][i]
+                returns = state['log_returns'][i][valid]
+                if len(returns) < 2:
+                    continue
+                
+                models[token] = {name: cls().fit(returns) for name, cls in self.ESTIMATORS.items()}
+                self._last_date[token] = state['dates'][valid][-1]
+            
+            for token in models:
+                _, last_price[token] = self.panel.last_price(token)
+            
+            self._current = {'models': models, 'last_price': last_price}
+            self._panel_version = self.panel.version
+        
+        return {token: self.describe(token) for token in self.models}
+    
+    def sync(self) -> int:
+        """
+        Apply panel returns newer than the last observed day as O(1) updates.
+        
+        Updated tokens get fresh copies of their estimators; the new models are
+        published in one assignment, so concurrent readers see either the old
+        or the new state, never a half-applied one.
+        
+        Returns:
+            Number of returns applied
+        """
+        if self._panel_version is None:
+            self.fit()
+            return 0
+        
+        state = self.panel.snapshot()
+        if self._panel_version == self.panel.version:
+            return 0
+        
+        applied = 0
+        with self._lock:
+            if self._panel_version == self.panel.version:
+                return 0
+            
+            models = dict(self._current['models'])
+            last_price = dict(self._current['last_price'])
+            for token, estimators in models.items():
+                i = state['index'].get(token)
+                if i is None:
+                    continue
+                new = state['valid'][i] & (state['dates'] > self._last_date[token])
+                if not new.any():
+                    continue
+                
+                estimators = {name: copy.copy(estimator) for name, estimator in estimators.items()}
+                for r in state['log_returns'][i][new]:
+                    for estimator in estimators.values():
+                        estimator.update(float(r))
+                    applied += 1
+                models[token] = estimators
+                self._last_date[token] = state['dates'][new][-1]
+                _, last_price[token] = self.panel.last_price(token)
+            
+            self._current = {'models': models, 'last_price': last_price}
+            self._panel_version = self.panel.version
+        
+        return applied
+    
+    def has(self, token: str) -> bool:
+        """Whether a token has fitted estimators."""
+        self.sync()
+        return token.lower() in self.models
+    
+    def forecast_daily_volatility(
+        self,
+        token: str,
+        horizon_days: float,
+        estimator: str = 'garch',
+        live_price: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Average daily volatility forecast over a horizon.
+        
+        Args:
+            token: Token symbol
+            horizon_days: Forecast horizon in days
+            estimator: 'ewma' or 'garch'
+            live_price: Optional live price, applied as a provisional return
+                from the last stored close (the fitted state is not changed)
+        
+        Returns:
+            Daily volatility as a decimal, or None if the token is not modelled
+        """
+        if estimator not in self.ESTIMATORS:
+            raise ValueError(f"Unknown volatility estimator '{estimator}'. Use one of {list(self.ESTIMATORS)}")
+        
+        self.sync()
+        token = token.lower()
+        current = self._current
+        model = current['models'].get(token, {}).get(estimator)
+        if model is None:
+            return None
+        
+        variance = None
+        last_price = current['last_price'].get(token)
+        if live_price and live_price > 0 and last_price:
+            variance = model.preview(float(np.log(live_price / last_price)))
+        
+        return model.forecast_daily_volatility(horizon_days, variance)
+    
+    def describe(self, token: str) -> Dict:
+        """Current volatility and parameters of every estimator for a token."""
+        estimators = self.models.get(token.lower(), {})
+        return {
+            name: {
+                'daily_volatility_pct': round(float(np.sqrt(model.variance)) * 100, 3),
+                'observations': model.observations,
+                **model.params()
+            }
+            for name, model in estimators.items()
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    
+    print("=" * 60)
+    print("  VOLATILITY ESTIMATORS TEST")
+    print("=" * 60)
+    
+    # Simulated GARCH(1,1) returns with a volatility spike at the end
+    rng = np.random.default_rng(42)
+    n_days = 400
+    variance = 0.03 ** 2
+    log_returns = np.empty(n_days)
+    for t in range(n_days):
+        log_returns[t] = np.sqrt(variance) * rng.standard_normal()
+        variance = 0.03 ** 2 * 0.05 + 0.10 * log_returns[t] ** 2 + 0.85 * variance
+    log_returns[-5:] *= 3
+    
+    dates = pd.date_range(start='2024-01-01', periods=n_days + 1, freq='D')
+    prices = 100 * np.exp(np.concatenate([[0.0], np.cumsum(log_returns)]))
+    sample = {'sol': pd.DataFrame({'date': dates, 'price': prices})}
+    
+    panel = ReturnsPanel(lambda token, days: sample.get(token, pd.DataFrame()).tail(days), tokens=['sol'])
+    estimators = VolatilityEstimators(panel)
+    
+    fitted = estimators.fit()
+    garch = fitted['sol']['garch']
+    print(f"\n[GARCH(1,1) fit] alpha={garch['alpha']}, beta={garch['beta']}, "
+          f"long-run daily vol={garch['long_run_daily_volatility_pct']}%")
+    
+    print("\n[Daily volatility forecasts]")
+    for days in (1, 7, 30, 90):
+        ewma = estimators.forecast_daily_volatility('sol', days, 'ewma')
+        garch = estimators.forecast_daily_volatility('sol', days, 'garch')
+        print(f"  {days:>3}d: EWMA {ewma * 100:.2f}%  GARCH {garch * 100:.2f}%")
@@ -3,19 +3,52 @@ Staking API Module - Fetches REAL-TIME liquid staking APY data
 ===============================================================
 Provides live staking APY for Solana LSTs (JupSOL, mSOL, jitoSOL, bSOL)
 using multiple API sources: Jito API, Marinade API, Sanctum API
+
+Each upstream source is cached on its own TTL with stale-while-revalidate:
+once warmed, requests are answered from the cache and expired sources are
+refreshed in the background, one fetch per source at a time. With Redis
+configured the cache is shared across workers.
 """
 import httpx
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Cache for staking APY data
-_staking_cache: Dict = {}
-_cache_timestamp: Optional[datetime] = None
-CACHE_DURATION = timedelta(minutes=5)
+# Seconds each source stays fresh (Jito and Marinade publish daily series,
+# inflation only changes per epoch)
+SOURCE_TTLS = {
+    'jito': 1800,
+    'marinade': 3600,
+    'base': 6 * 3600
+}
+
+# Seconds before a failed source is retried (the last good value is kept)
+RETRY_INTERVAL = 60
+
+# Seconds a shared (Redis) entry is kept for stale reads
+SHARED_RETENTION = 24 * 3600
+
+# Seconds a worker holds the shared refresh lock of a source
+REFRESH_LOCK_SECONDS = 15
+
+# Deletes a refresh lock only if it still holds our token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Base staking APY (%) used while no base source has answered
+DEFAULT_BASE_STAKING_APY = 6.5
+
+_redis = None
 
 # Supported LST tokens with their identifiers
 LST_TOKENS = {
@@ -139,9 +172,10 @@ async def fetch_sanctum_lst_apy() -> Dict:
     return None
 
 
-async def fetch_base_staking_apy() -> float:
+async def fetch_base_staking_apy() -> Optional[float]:
     """
     Fetch base Solana staking APY from multiple sources.
+    Returns None if every source failed (the caller applies the default).
     """
     # 1. Try RPC Inflation Rate (Fastest & Most Reliable)
     try:
@@ -159,10 +193,11 @@ async def fetch_base_staking_apy() -> float:
             
             if response.status_code == 200:
                 data = response.json()
-                result = data.get('result', {})
+                result = data.get('result') or {}
                 # Total inflation rate approximately tracks staking APY
-                total = result.get('total', 0.065)
-                return round(total * 100, 2)
+                total = result.get('total')
+                if total:
+                    return round(total * 100, 2)
     except Exception as e:
         logger.warning(f"RPC inflation rate failed: {e}")
 
@@ -182,38 +217,234 @@ async def fetch_base_staking_apy() -> float:
     except Exception as e:
         logger.warning(f"Solana Beach API failed: {e}")
     
-    return 6.5  # Default fallback
+    return None
 
 
-async def get_staking_apy() -> Dict:
+class SourceCache:
     """
-    Get current staking APY for all supported LSTs.
-    Fetches from multiple real-time APIs concurrently.
+    Cached value of one upstream source with stale-while-revalidate.
+    
+    A fresh value is returned as is. An expired value is still returned
+    while a single background task refreshes it; only a cold cache (no
+    value yet) waits for the upstream. With Redis configured, workers share
+    entries and a short lock keeps them from refreshing the same source
+    at once.
     """
-    global _staking_cache, _cache_timestamp
     
-    # Check cache validity
-    now = datetime.now()
-    if _cache_timestamp and (now - _cache_timestamp) < CACHE_DURATION:
-        return _staking_cache
+    def __init__(self, name: str, fetch: Callable[[], Awaitable[Any]], ttl: float):
+        """
+        Args:
+            name: Source name (also the Redis key suffix)
+            fetch: Coroutine function returning the value, or None on failure
+            ttl: Seconds the value stays fresh
+        """
+        self.name = name
+        self.fetch = fetch
+        self.ttl = ttl
+        self.value = None
+        self.fetched_at = None
+        self.expires_at = None
+        # Time of the last refresh attempt, and when to retry after a failure
+        self.checked_at = None
+        self.retry_at = None
+        self._task = None
+    
+    @property
+    def key(self) -> str:
+        return f"staking:source:{self.name}"
+    
+    def is_fresh(self) -> bool:
+        """Whether the value was fetched within its TTL."""
+        return self.expires_at is not None and time.time() < self.expires_at
+    
+    def is_retry_pending(self) -> bool:
+        """Whether the last refresh failed and its retry is not yet due."""
+        return self.retry_at is not None and time.time() < self.retry_at
+    
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the value was fetched, or None if never."""
+        return None if self.fetched_at is None else time.time() - self.fetched_at
+    
+    async def get(self) -> Any:
+        """
+        Current value of the source.
+        
+        Returns:
+            Cached value (possibly stale, refreshed in the background), or
+            None if the source has never answered
+        """
+        if not self.is_fresh() and not self.is_retry_pending():
+            await self._load_shared()
+        
+        if self.is_fresh() or self.is_retry_pending():
+            return self.value
+        
+        task = self.refresh()
+        if self.checked_at is None:
+            # Cold cache: wait for the first fetch (shielded, other callers share it)
+            await asyncio.shield(task)
+        return self.value
+    
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is already running; returns its task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+        return self._task
+    
+    async def _refresh(self):
+        cold = self.checked_at is None
+        
+        # Another worker may have refreshed (or failed and backed off) already
+        if await self._load_shared() and (self.is_fresh() or self.is_retry_pending()):
+            return
+        # A cold cache fetches even without the lock (it has nothing to serve)
+        acquired, lock_token = await self._acquire_lock()
+        if not acquired and not cold:
+            return
+        
+        try:
+            value = await self.fetch()
+        except Exception as e:
+            logger.warning(f"{self.name} staking source failed: {e}")
+            value = None
+        
+        now = time.time()
+        self.checked_at = now
+        if value is not None:
+            self.value = value
+            self.fetched_at = now
+            self.expires_at = now + self.ttl
+            self.retry_at = None
+        else:
+            # Keep the last good value (if any) and its expiry; retry soon
+            self.retry_at = now + RETRY_INTERVAL
+        await self._store_shared()
+        if lock_token is not None:
+            await self._release_lock(lock_token)
+    
+    async def _load_shared(self) -> bool:
+        """Adopt the shared entry if it was checked after ours."""
+        if _redis is None:
+            return False
+        try:
+            raw = await _redis.get(self.key)
+            entry = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Redis read of {self.key} failed: {e}")
+            return False
+        checked_at = entry.get('checked_at') if entry else None
+        if checked_at is None or (self.checked_at is not None and checked_at <= self.checked_at):
+            return False
+        
+        # A failed refresh elsewhere never replaces a good value here
+        if entry['value'] is not None or self.value is None:
+            self.value = entry['value']
+            self.fetched_at = entry['fetched_at']
+            self.expires_at = entry['expires_at']
+        self.checked_at = checked_at
+        self.retry_at = entry.get('retry_at')
+        return True
+    
+    async def _store_shared(self):
+        if _redis is None:
+            return
+        entry = {
+            'value': self.value,
+            'fetched_at': self.fetched_at,
+            'expires_at': self.expires_at,
+            'checked_at': self.checked_at,
+            'retry_at': self.retry_at
+        }
+        try:
+            await _redis.set(self.key, json.dumps(entry), ex=SHARED_RETENTION)
+        except Exception as e:
+            logger.warning(f"Redis write of {self.key} failed: {e}")
     
-    print("[Staking API] Fetching real-time APY data from live APIs...")
+    @property
+    def lock_key(self) -> str:
+        return f"{self.key}:lock"
     
-    # Fetch all data concurrently
-    jito_task = asyncio.create_task(fetch_jitosol_apy())
-    msol_task = asyncio.create_task(fetch_msol_apy())
-    sanctum_task = asyncio.create_task(fetch_sanctum_lst_apy())
-    base_apy_task = asyncio.create_task(fetch_base_staking_apy())
+    async def _acquire_lock(self) -> Tuple[bool, Optional[str]]:
+        """
+        Take the cross-worker refresh lock.
+        
+        Returns:
+            Tuple of (may refresh, lock token to release); always granted,
+            without a token, when Redis is not configured or fails
+        """
+        if _redis is None:
+            return True, None
+        token = uuid.uuid4().hex
+        try:
+            acquired = await _redis.set(self.lock_key, token, nx=True, ex=REFRESH_LOCK_SECONDS)
+        except Exception as e:
+            logger.warning(f"Redis lock of {self.key} failed: {e}")
+            return True, None
+        return (True, token) if acquired else (False, None)
     
-    # Wait for all tasks
+    async def _release_lock(self, token: str):
+        """Release our refresh lock (a lock that expired and was retaken is left alone)."""
+        try:
+            await _redis.eval(RELEASE_LOCK_SCRIPT, 1, self.lock_key, token)
+        except Exception as e:
+            logger.warning(f"Redis unlock of {self.key} failed: {e}")
+
+
+_sources = {
+    'jito': SourceCache('jito', fetch_jitosol_apy, SOURCE_TTLS['jito']),
+    'marinade': SourceCache('marinade', fetch_msol_apy, SOURCE_TTLS['marinade']),
+    'base': SourceCache('base', fetch_base_staking_apy, SOURCE_TTLS['base'])
+}
+
+
+def configure_cache(redis_client=None):
+    """
+    Share the per-source caches across workers through Redis.
+    
+    Args:
+        redis_client: redis.asyncio client (decode_responses=True), or None
+            to keep the caches per process
+    """
+    global _redis
+    _redis = redis_client
+
+
+async def warm_staking_cache():
+    """Fetch every source once (call at startup so requests never wait on upstream)."""
+    await asyncio.gather(*(source.get() for source in _sources.values()), return_exceptions=True)
+
+
+def staking_cache_status() -> Dict:
+    """Age and freshness of each cached source (stale until it has answered within its TTL)."""
+    status = {}
+    for name, source in _sources.items():
+        age = source.age_seconds()
+        status[name] = {
+            'age_seconds': round(age, 1) if age is not None else None,
+            'stale': not source.is_fresh(),
+            'retrying': source.is_retry_pending(),
+            'ttl_seconds': source.ttl
+        }
+    return status
+
+
+async def get_staking_apy() -> Dict:
+    """
+    Get current staking APY for all supported LSTs.
+    Each source is served from its own cache (see SourceCache).
+    """
+    # Read all sources concurrently (only cold sources wait on upstream)
     jito_data, msol_data, sanctum_data, base_apy = await asyncio.gather(
-        jito_task, msol_task, sanctum_task, base_apy_task,
+        _sources['jito'].get(),
+        _sources['marinade'].get(),
+        fetch_sanctum_lst_apy(),
+        _sources['base'].get(),
         return_exceptions=True
     )
     
     # Handle exceptions
-    if isinstance(base_apy, Exception):
-        base_apy = 6.5
+    if isinstance(base_apy, Exception) or base_apy is None:
+        base_apy = DEFAULT_BASE_STAKING_APY
     if isinstance(jito_data, Exception):
         jito_data = None
     if isinstance(msol_data, Exception):
@@ -314,21 +545,18 @@ async def get_staking_apy() -> Dict:
     else:
         source = "estimated"
     
-    print(f"[Staking API] APY data fetched. Sources: {source}")
+    # Oldest source that contributed
+    fetched = [s.fetched_at for s in _sources.values() if s.fetched_at is not None]
+    last_updated = datetime.fromtimestamp(min(fetched)) if fetched else datetime.now()
     
-    result = {
+    return {
         'lsts': lst_apy_data,
         'base_staking_apy': round(base_apy, 2),
         'source': source,
-        'last_updated': now.isoformat(),
-        'cache_duration_minutes': 5
+        'last_updated': last_updated.isoformat(),
+        'cache_duration_minutes': round(min(SOURCE_TTLS.values()) / 60),
+        'sources': staking_cache_status()
     }
-    
-    # Update cache
-    _staking_cache = result
-    _cache_timestamp = now
-    
-    return result
 
 
 def is_lst_token(token: str) -> bool:
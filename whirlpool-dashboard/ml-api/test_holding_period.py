@@ -0,0 +1,60 @@
+"""Check the holding-period solver against the per-period profit loop on random inputs."""
+import sys
+import numpy as np
+sys.path.insert(0, 'src')
+
+from m5_yield_farming.profitability_analyzer import ProfitabilityAnalyzer
+
+analyzer = ProfitabilityAnalyzer()
+
+
+def reference_optimal_holding_period(pool_apy, il_range, max_days=90):
+    """Step-grid loop over calculate_expected_profit (the original implementation)."""
+    best_profit_rate = float('-inf')
+    optimal_days = 7
+    results = []
+    for days in [1, 3, 7, 14, 30, 60, 90]:
+        if days > max_days:
+            break
+        profit = analyzer.calculate_expected_profit(pool_apy, il_range, None, days)
+        daily_profit_rate = profit['expected_period_profit_pct'] / days
+        results.append({
+            'holding_days': days,
+            'period_profit_pct': profit['expected_period_profit_pct'],
+            'daily_profit_rate': round(daily_profit_rate, 4),
+            'assessment': profit['assessment']
+        })
+        if daily_profit_rate > best_profit_rate and profit['expected_period_profit_pct'] > 0:
+            best_profit_rate = daily_profit_rate
+            optimal_days = days
+    return {
+        'optimal_holding_days': optimal_days,
+        'best_daily_profit_rate': round(best_profit_rate, 4),
+        'analysis_by_period': results
+    }
+
+
+rng = np.random.default_rng(7)
+cases = [(7.35, -1.41, 90)] + [
+    (round(float(rng.uniform(0, 150)), 2), round(float(-rng.uniform(0, 8)), 2), int(rng.choice([1, 5, 30, 45, 90])))
+    for _ in range(5000)
+]
+
+print("Holding period solver vs per-period loop:")
+print("=" * 50)
+
+mismatches = 0
+for apy, il, max_days in cases:
+    il_range = {'expected_il': il}
+    expected = reference_optimal_holding_period(apy, il_range, max_days)
+    actual = analyzer.calculate_optimal_holding_period(apy, il_range, max_days=max_days)
+    if actual != expected:
+        mismatches += 1
+        if mismatches <= 3:
+            print(f"  apy={apy} il={il} max_days={max_days}\n    expected {expected}\n    actual   {actual}")
+
+print(f"  {len(cases)} cases, {mismatches} mismatches")
+if mismatches:
+    print("\n[FAIL] Solver disagrees with the per-period loop.")
+    sys.exit(1)
+print("\n[SUCCESS] Solver reproduces the per-period loop exactly.")
@@ -0,0 +1,30 @@
+import requests
+import time
+
+url = "http://localhost:8000/api/farming/safety"
+payload = {
+    "token_a": "sol",
+    "token_b": "jup",
+    "pool_apy": 45.0,
+    "confidence_level": 0.80
+}
+headers = {
+    "Content-Type": "application/json"
+}
+
+try:
+    # Second request should be served from the result cache
+    for attempt in ["cold", "cached"]:
+        start = time.time()
+        response = requests.post(url, json=payload, headers=headers)
+        elapsed = (time.time() - start) * 1000
+        print(f"[{attempt}] Status Code: {response.status_code} ({elapsed:.0f} ms)")
+        if response.status_code == 200:
+            result = response.json()
+            print(f"  Safety Score: {result['total_safety_score']}")
+            print(f"  Recommendation: {result['recommendation']}")
+            print(f"  Components: {result['component_scores']}")
+        else:
+            print(f"  Response: {response.text}")
+except Exception as e:
+    print(f"Error: {e}")